@@ -0,0 +1,330 @@
+"""
+Сервисы (бэкенды) машинного перевода
+"""
+import asyncio
+import json
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from batching import BATCH_DELIMITER
+
+
+class BackendThrottled(Exception):
+    """Сервис ограничил частоту запросов (HTTP 429/503)"""
+
+
+class BackendTimeout(Exception):
+    """Сервис не ответил вовремя"""
+
+
+def is_congestion_error(error: Exception) -> bool:
+    """
+    Проверяет, говорит ли ошибка о перегрузке сервиса перевода
+    (ограничение частоты, таймаут, обрыв соединения)
+
+    Args:
+        error: Исключение, полученное при запросе
+
+    Returns:
+        True если запрос стоит повторить с меньшей нагрузкой
+    """
+    if isinstance(error, (BackendThrottled, BackendTimeout)):
+        return True
+    # Ошибки deep_translator и requests проверяем по имени класса, чтобы
+    # не требовать эти пакеты для офлайн-бэкендов
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if names & {'TooManyRequests', 'RequestError', 'Timeout', 'ConnectionError'}:
+        return True
+    message = str(error).lower()
+    return '429' in message or 'too many requests' in message or 'timed out' in message
+
+
+def is_payload_error(error: Exception) -> bool:
+    """
+    Проверяет, говорит ли ошибка о том, что сервис не принял сам запрос
+    (слишком длинный или некорректный текст), - такой пакет стоит разделить
+
+    Args:
+        error: Исключение, полученное при запросе
+
+    Returns:
+        True если запрос с меньшим числом строк может пройти
+    """
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if names & {'NotValidLength', 'NotValidPayload'}:
+        return True
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) in (400, 413, 414, 422):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in ('413', '414', 'too large', 'too long', 'payload'))
+
+
+class TranslationBackend:
+    """
+    Базовый класс сервиса перевода.
+
+    Наследники реализуют translate_batch; остальные методы выражены через него.
+    Атрибуты класса описывают возможности сервиса и используются при
+    упаковке строк в запросы.
+    """
+
+    # Имя бэкенда для командной строки
+    name = 'base'
+    # Максимальная длина одного запроса в символах
+    max_batch_chars = 5000
+    # Максимальное количество строк в одном запросе
+    max_batch_items = 100
+    # Разделитель строк внутри запроса (None - сервис принимает список строк)
+    batch_delimiter: Optional[str] = None
+
+    def __init__(self, source_lang: str, target_lang: str):
+        """
+        Args:
+            source_lang: Исходный язык
+            target_lang: Целевой язык
+        """
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+
+    def translate(self, text: str) -> str:
+        """
+        Переводит одну строку
+
+        Args:
+            text: Текст для перевода
+
+        Returns:
+            Перевод (исключение при ошибке)
+        """
+        return self.translate_batch([text])[0]
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        """
+        Переводит несколько строк одним запросом
+
+        Args:
+            texts: Строки для перевода
+
+        Returns:
+            Переводы в том же порядке. Если сервис вернул другое количество
+            строк, список может иметь другую длину - вызывающий код это проверяет.
+        """
+        raise NotImplementedError
+
+    async def translate_async(self, text: str) -> str:
+        """Асинхронная версия translate (по умолчанию - в пуле потоков)"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self.translate, text)
+
+    async def translate_batch_async(self, texts: List[str]) -> List[str]:
+        """Асинхронная версия translate_batch (по умолчанию - в пуле потоков)"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self.translate_batch, texts)
+
+    def close(self) -> None:
+        """Освобождает ресурсы (соединения)"""
+
+
+class GoogleBackend(TranslationBackend):
+    """Google Translate через deep_translator"""
+
+    name = 'google'
+    # deep_translator принимает тексты короче 5000 символов
+    max_batch_chars = 4999
+    max_batch_items = 100
+    batch_delimiter = BATCH_DELIMITER
+
+    def __init__(self, source_lang: str, target_lang: str):
+        super().__init__(source_lang, target_lang)
+        # GoogleTranslator хранит параметры запроса в самом объекте,
+        # поэтому каждому потоку нужен свой экземпляр
+        self._local = threading.local()
+
+    def _translator(self):
+        translator = getattr(self._local, 'translator', None)
+        if translator is None:
+            from deep_translator import GoogleTranslator
+            translator = GoogleTranslator(source=self.source_lang, target=self.target_lang)
+            self._local.translator = translator
+        return translator
+
+    def translate(self, text: str) -> str:
+        return self._translator().translate(text)
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        if len(texts) == 1:
+            return [self.translate(texts[0])]
+
+        # translate_batch у deep_translator отправляет строки по одной,
+        # поэтому склеиваем их в один запрос через разделитель.
+        # Пробелы по краям строк сервис не сохраняет, поэтому отправляем без них.
+        cores = [text.strip() for text in texts]
+        translated = self.translate(self.batch_delimiter.join(cores))
+        parts = (translated or '').split(self.batch_delimiter)
+        if len(parts) != len(texts):
+            return parts
+
+        results = []
+        for text, core, part in zip(texts, cores, parts):
+            start = text.index(core)
+            results.append(text[:start] + part.strip() + text[start + len(core):])
+        return results
+
+
+# Таблица псевдоперевода: латиница -> похожие по звучанию буквы кириллицы
+_PSEUDO_LATIN = 'abcdefghijklmnopqrstuvwxyz'
+_PSEUDO_CYRILLIC = 'абцдефгхийклмнопкрстуввксз'
+_PSEUDO_TABLE = str.maketrans(_PSEUDO_LATIN + _PSEUDO_LATIN.upper(),
+                              _PSEUDO_CYRILLIC + _PSEUDO_CYRILLIC.upper())
+
+# Фрагменты, которые псевдоперевод не трогает: %s, %1$d, §a, {0}, \n
+_PSEUDO_KEEP = re.compile(r'%(?:\d+\$)?[-#+ 0,(]*\d*(?:\.\d+)?[a-zA-Z%]|§.|\{[^{}]*\}|\\n')
+
+
+class PseudoBackend(TranslationBackend):
+    """
+    Детерминированный офлайн-перевод: сначала словарь, иначе транслитерация
+    латиницы в кириллицу. Нужен для проверки и замеров без сети.
+    """
+
+    name = 'pseudo'
+    max_batch_chars = 5000
+    max_batch_items = 100
+
+    def __init__(self, source_lang: str, target_lang: str, dictionary: Optional[Dict[str, str]] = None,
+                 dictionary_path: Optional[str] = None, latency: float = 0.0, latency_per_char: float = 0.0):
+        """
+        Args:
+            source_lang: Исходный язык
+            target_lang: Целевой язык
+            dictionary: Готовые переводы {исходная строка: перевод}
+            dictionary_path: JSON файл с такими переводами
+            latency: Задержка каждого запроса в секундах (имитация сети для замеров)
+            latency_per_char: Дополнительная задержка на символ запроса
+        """
+        super().__init__(source_lang, target_lang)
+        self.dictionary = dict(dictionary or {})
+        if dictionary_path:
+            with open(dictionary_path, 'r', encoding='utf-8') as f:
+                self.dictionary.update(json.load(f))
+        self.latency = latency
+        self.latency_per_char = latency_per_char
+
+    def translate_one(self, text: str) -> str:
+        """Переводит строку без обращения к сети"""
+        if text in self.dictionary:
+            return self.dictionary[text]
+        parts = []
+        position = 0
+        for match in _PSEUDO_KEEP.finditer(text):
+            parts.append(text[position:match.start()].translate(_PSEUDO_TABLE))
+            parts.append(match.group(0))
+            position = match.end()
+        parts.append(text[position:].translate(_PSEUDO_TABLE))
+        return ''.join(parts)
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        if self.latency or self.latency_per_char:
+            time.sleep(self.latency + self.latency_per_char * sum(len(text) for text in texts))
+        return [self.translate_one(text) for text in texts]
+
+
+class HttpBackend(TranslationBackend):
+    """
+    Сервис перевода с JSON API (например, локальная модель или stub_server.py):
+    POST {url}/translate {"source", "target", "q": [...]} -> {"translations": [...]}
+
+    Соединения переиспользуются: у каждого потока своя сессия requests.
+    """
+
+    name = 'http'
+    max_batch_chars = 20000
+    max_batch_items = 200
+
+    def __init__(self, source_lang: str, target_lang: str, url: str = 'http://127.0.0.1:8765',
+                 timeout: float = 30.0):
+        """
+        Args:
+            source_lang: Исходный язык
+            target_lang: Целевой язык
+            url: Адрес сервиса
+            timeout: Таймаут запроса в секундах
+        """
+        super().__init__(source_lang, target_lang)
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+        self._load_capabilities()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+            session = requests.Session()
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def _load_capabilities(self) -> None:
+        """Берет лимиты запроса у сервиса, если он их сообщает"""
+        try:
+            response = self._session().get(f"{self.url}/capabilities", timeout=self.timeout)
+            if response.status_code == 200:
+                capabilities = response.json()
+                self.max_batch_chars = int(capabilities.get('max_chars', self.max_batch_chars))
+                self.max_batch_items = int(capabilities.get('max_items', self.max_batch_items))
+        except Exception:
+            pass
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        import requests
+        try:
+            response = self._session().post(
+                f"{self.url}/translate",
+                json={'source': self.source_lang, 'target': self.target_lang, 'q': texts},
+                timeout=self.timeout,
+            )
+        except requests.exceptions.Timeout as e:
+            raise BackendTimeout(str(e)) from e
+        if response.status_code in (429, 503):
+            raise BackendThrottled(f"HTTP {response.status_code}")
+        response.raise_for_status()
+        return response.json()['translations']
+
+    def close(self) -> None:
+        with self._sessions_lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
+
+
+# Доступные бэкенды по имени
+BACKENDS = {
+    GoogleBackend.name: GoogleBackend,
+    PseudoBackend.name: PseudoBackend,
+    HttpBackend.name: HttpBackend,
+}
+
+
+def create_backend(name: str, source_lang: str, target_lang: str, **options) -> TranslationBackend:
+    """
+    Создает бэкенд перевода по имени
+
+    Args:
+        name: Имя бэкенда (google, pseudo, http)
+        source_lang: Исходный язык
+        target_lang: Целевой язык
+        **options: Параметры конкретного бэкенда (url, dictionary_path, ...)
+
+    Returns:
+        Экземпляр бэкенда
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Неизвестный бэкенд перевода: {name} (доступны: {', '.join(BACKENDS)})")
+    return BACKENDS[name](source_lang, target_lang, **options)
@@ -0,0 +1,102 @@
+"""
+Упаковка строк в пакетные запросы к сервису перевода
+"""
+from typing import Callable, Dict, List, Optional
+
+
+# Разделитель строк внутри одного запроса. Google Translate сохраняет переводы
+# строк, поэтому перевод можно разбить обратно по тому же разделителю.
+BATCH_DELIMITER = '\n'
+
+
+class BatchFailed(Exception):
+    """Запрос не выполнен по причине, не связанной с составом пакета (сеть, ошибка сервиса)"""
+
+
+def can_batch(text: str, delimiter: Optional[str] = BATCH_DELIMITER) -> bool:
+    """
+    Проверяет, можно ли отправить строку в составе пакета
+
+    Args:
+        text: Строка для перевода
+        delimiter: Разделитель строк в пакете (None - сервис принимает список строк)
+
+    Returns:
+        True если строка не содержит разделитель
+    """
+    return not delimiter or delimiter not in text
+
+
+def pack_batches(texts: List[str], max_chars: int, max_items: int,
+                 delimiter: Optional[str] = BATCH_DELIMITER) -> List[List[str]]:
+    """
+    Раскладывает строки по пакетам так, чтобы каждый пакет был как можно ближе
+    к лимиту символов запроса (алгоритм First Fit Decreasing)
+
+    Args:
+        texts: Строки для перевода (без разделителя внутри)
+        max_chars: Максимальная длина одного запроса в символах
+        max_items: Максимальное количество строк в одном запросе
+        delimiter: Разделитель строк в запросе (учитывается в длине запроса)
+
+    Returns:
+        Список пакетов, каждый пакет - список строк
+    """
+    batches: List[List[str]] = []
+    sizes: List[int] = []
+    delimiter = delimiter or ''
+    # Пакеты до first_open заполнены по количеству строк, их не перебираем
+    first_open = 0
+
+    for text in sorted(texts, key=len, reverse=True):
+        extra = len(text) + len(delimiter)
+        for index in range(first_open, len(batches)):
+            batch = batches[index]
+            if len(batch) < max_items and sizes[index] + extra <= max_chars:
+                batch.append(text)
+                sizes[index] += extra
+                break
+        else:
+            batches.append([text])
+            sizes.append(len(text))
+        while first_open < len(batches) and len(batches[first_open]) >= max_items:
+            first_open += 1
+
+    return batches
+
+
+def translate_packed(batch: List[str],
+                     send_batch: Callable[[List[str]], Optional[List[str]]]) -> Dict[str, Optional[str]]:
+    """
+    Переводит пакет одним запросом и раскладывает результат обратно по строкам.
+
+    Если сервис вернул другое количество строк или пустые строки либо не
+    принял сам запрос, пакет делится пополам и половины переводятся отдельно,
+    так что по одной отправляются только строки, на которых пакетный запрос
+    действительно ломается. При ошибке, не связанной с составом пакета
+    (BatchFailed), пакет не делится: при недоступном сервисе каждая половина
+    тоже завершилась бы ошибкой, а запросов стало бы 2N-1 вместо одного.
+
+    Args:
+        batch: Строки пакета
+        send_batch: Функция, переводящая список строк одним запросом (None, если
+            сервис не принял запрос; BatchFailed при остальных ошибках)
+
+    Returns:
+        Словарь {исходная строка: перевод или None}
+    """
+    try:
+        translated = send_batch(batch)
+    except BatchFailed:
+        return dict.fromkeys(batch)
+    if len(batch) == 1:
+        return {batch[0]: translated[0] if translated else None}
+
+    if translated is not None and len(translated) == len(batch) and all(
+            isinstance(part, str) and part.strip() for part in translated):
+        return dict(zip(batch, translated))
+
+    middle = len(batch) // 2
+    results = translate_packed(batch[:middle], send_batch)
+    results.update(translate_packed(batch[middle:], send_batch))
+    return results
@@ -0,0 +1,69 @@
+"""
+Сравнение скорости упаковки .jar: прежний pack_jar против параллельного
+
+Запуск:
+    py benchmarks/bench_pack_jar.py --entries 10000
+"""
+import argparse
+import hashlib
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from jar_handler import _is_signature_file, pack_jar  # noqa: E402
+from synthetic import make_mod_dir  # noqa: E402
+
+
+def pack_jar_baseline(mod_dir: Path, output_jar: Path) -> Path:
+    """Прежняя реализация pack_jar: один поток, все файлы через ZIP_DEFLATED"""
+    with zipfile.ZipFile(output_jar, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for file_path in mod_dir.rglob('*'):
+            if file_path.is_file():
+                arcname = file_path.relative_to(mod_dir)
+                if _is_signature_file(arcname):
+                    continue
+                zipf.write(file_path, arcname)
+    return output_jar
+
+
+def _digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Бенчмарк упаковки .jar')
+    parser.add_argument('--entries', type=int, default=10000, help='Количество файлов в моде')
+    parser.add_argument('--workers', type=int, default=None, help='Потоков сжатия (по умолчанию число ядер)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        mod_dir = temp_path / 'mod'
+        print(f"Генерация мода из {args.entries} файлов...")
+        make_mod_dir(mod_dir, keys=2000, binary_entries=args.entries)
+
+        started = time.perf_counter()
+        baseline = pack_jar_baseline(mod_dir, temp_path / 'baseline.jar')
+        baseline_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        first = pack_jar(mod_dir, temp_path / 'parallel1.jar', workers=args.workers)
+        parallel_time = time.perf_counter() - started
+        second = pack_jar(mod_dir, temp_path / 'parallel2.jar', workers=args.workers)
+
+        with zipfile.ZipFile(first) as zip_ref:
+            assert zip_ref.testzip() is None
+
+        print(f"Прежний pack_jar:      {baseline_time:.2f} с, {baseline.stat().st_size / 1e6:.1f} МБ")
+        print(f"Параллельный pack_jar: {parallel_time:.2f} с, {first.stat().st_size / 1e6:.1f} МБ")
+        print(f"Ускорение: {baseline_time / parallel_time:.1f}x")
+        print(f"Повторная сборка побайтно совпадает: {_digest(first) == _digest(second)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+"""
+Бенчмарк всего конвейера перевода на синтетических модах
+
+Генерирует мод и модпак, затем замеряет распаковку .jar, поиск файлов
+переводов, перевод (через офлайн-бэкенд с моделью задержки сети), упаковку
+.jar, перевод .jar целиком и перевод модпака. Результаты сохраняются в JSON,
+чтобы сравнивать запуски между собой.
+
+Запуск:
+    py benchmarks/bench_suite.py --keys 5000 --binary-entries 2000 --mods 10 --latency 0.2
+    py benchmarks/bench_suite.py --compare benchmarks/results/bench-20240101-120000.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from backends import PseudoBackend  # noqa: E402
+from jar_handler import extract_jar, pack_jar, translate_jar_mod  # noqa: E402
+from lang_discovery import discover_lang_files  # noqa: E402
+from modpack import translate_modpack  # noqa: E402
+from synthetic import make_mod_jar, make_modpack  # noqa: E402
+from translation_memory import TranslationMemory  # noqa: E402
+from translator import MinecraftModTranslator  # noqa: E402
+
+
+# Папка для результатов по умолчанию
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+
+class CountingBackend(PseudoBackend):
+    """Псевдоперевод с задержкой, считающий запросы и отправленные символы"""
+
+    name = 'bench'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.chars = 0
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        with self._lock:
+            self.requests += 1
+            self.chars += sum(len(text) for text in texts)
+        return super().translate_batch(texts)
+
+
+def peak_rss_mb(children: bool = False) -> Optional[float]:
+    """
+    Пиковое потребление памяти процессом (или его дочерними процессами) в МБ
+
+    Returns:
+        Размер в МБ или None, если платформа его не сообщает
+    """
+    try:
+        import resource
+    except ImportError:
+        # Windows: берем пиковый рабочий набор через psutil, если он установлен
+        if children:
+            return None
+        try:
+            import psutil
+            return round(psutil.Process().memory_info().peak_wset / 2 ** 20, 1)
+        except (ImportError, AttributeError):
+            return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # Linux сообщает килобайты, macOS - байты
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return round(usage.ru_maxrss * scale / 2 ** 20, 1)
+
+
+def _git_commit() -> Optional[str]:
+    """Текущий коммит репозитория (если это git)"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=Path(__file__).resolve().parent,
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Phases:
+    """Замер времени фаз бенчмарка"""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.metrics: Dict[str, Dict[str, Any]] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        print(f"  {name}...", end='', flush=True)
+        started = time.perf_counter()
+        metrics: Dict[str, Any] = {}
+        yield metrics
+        self.seconds[name] = round(time.perf_counter() - started, 4)
+        if metrics:
+            self.metrics[name] = metrics
+        print(f" {self.seconds[name]:.2f} с")
+
+
+def _make_translator(args, backend: PseudoBackend, memory: Optional[TranslationMemory]) -> MinecraftModTranslator:
+    return MinecraftModTranslator(memory=memory, workers=args.workers, backend=backend)
+
+
+def _translation_metrics(translator: MinecraftModTranslator, backend: CountingBackend,
+                         seconds: float) -> Dict[str, Any]:
+    """Показатели фазы перевода"""
+    stats = translator.stats()
+    return {
+        'strings': stats['translated'],
+        'strings_per_sec': round(stats['translated'] / seconds, 1) if seconds else None,
+        'requests': backend.requests,
+        'chars_sent': backend.chars,
+        'retries': stats['retries'],
+        'failed': stats['failed'],
+    }
+
+
+def run(args) -> Dict[str, Any]:
+    """
+    Выполняет все фазы бенчмарка
+
+    Returns:
+        Результаты запуска
+    """
+    phases = Phases()
+    backend_options = {'latency': args.latency, 'latency_per_char': args.latency_per_char}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        generator = {
+            'duplicate_ratio': args.duplicate_ratio,
+            'placeholder_density': args.placeholder_density,
+            'seed': args.seed,
+        }
+
+        with phases.phase('generate'):
+            jar = make_mod_jar(temp_path / 'bench.jar', 'bench', args.keys, args.binary_entries, **generator)
+            if args.mods:
+                make_modpack(temp_path / 'mods', args.mods, args.keys // 4 or 1,
+                             args.binary_entries // 4 or 1, **generator)
+
+        mod_dir = temp_path / 'extracted'
+        with phases.phase('extract') as metrics:
+            extract_jar(jar, mod_dir)
+            metrics['jar_mb'] = round(jar.stat().st_size / 2 ** 20, 2)
+
+        with phases.phase('discovery') as metrics:
+            lang_files = discover_lang_files(mod_dir)
+            metrics['lang_files'] = len(lang_files)
+
+        backend = CountingBackend('en', 'ru', **backend_options)
+        translator = _make_translator(args, backend, None)
+        with phases.phase('translate_folder') as metrics:
+            started = time.perf_counter()
+            translator.translate_mod(str(mod_dir), str(temp_path / 'translated'))
+            metrics.update(_translation_metrics(translator, backend, time.perf_counter() - started))
+
+        with phases.phase('pack') as metrics:
+            packed = pack_jar(mod_dir, temp_path / 'repacked.jar')
+            metrics['jar_mb'] = round(packed.stat().st_size / 2 ** 20, 2)
+
+        # Перевод .jar целиком: повторяющиеся строки мода попадают в память переводов
+        backend = CountingBackend('en', 'ru', **backend_options)
+        memory = TranslationMemory(temp_path / 'memory.sqlite3')
+        try:
+            translator = _make_translator(args, backend, memory)
+            with phases.phase('translate_jar') as metrics:
+                started = time.perf_counter()
+                translate_jar_mod(jar, translator, temp_path / 'bench_ru.jar')
+                metrics.update(_translation_metrics(translator, backend, time.perf_counter() - started))
+                metrics['memory_hits'] = memory.stats()['hits']
+        finally:
+            memory.close()
+
+        if args.mods:
+            with phases.phase('modpack') as metrics:
+                report = translate_modpack(
+                    temp_path / 'mods', temp_path / 'mods_ru',
+                    translator_options={'workers': args.workers, 'backend': 'pseudo',
+                                        'backend_options': backend_options},
+                    cache_path=str(temp_path / 'modpack_memory.sqlite3'),
+                    processes=args.processes
+                )
+                summary = report['summary']
+                metrics['mods'] = summary['mods']
+                metrics['errors'] = summary['errors']
+                metrics['strings'] = summary['translated']
+                metrics['strings_per_sec'] = (round(summary['translated'] / summary['seconds'], 1)
+                                              if summary['seconds'] else None)
+
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'phases': phases.seconds,
+        'metrics': phases.metrics,
+        'peak_rss_mb': peak_rss_mb(),
+        'peak_rss_children_mb': peak_rss_mb(children=True),
+    }
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Выводит изменение времени фаз относительно прежнего запуска"""
+    print(f"\nСравнение с запуском {baseline.get('created')} ({baseline.get('commit')}):")
+    for name, seconds in result['phases'].items():
+        before = baseline.get('phases', {}).get(name)
+        if before:
+            print(f"  {name:18} {before:8.2f} с -> {seconds:8.2f} с ({(seconds - before) / before:+.0%})")
+        else:
+            print(f"  {name:18} {'-':>8}   -> {seconds:8.2f} с")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Бенчмарк конвейера перевода на синтетических модах')
+    parser.add_argument('--keys', type=int, default=5000, help='Ключей в en_us.json мода')
+    parser.add_argument('--binary-entries', type=int, default=2000, help='Двоичных файлов в .jar мода')
+    parser.add_argument('--duplicate-ratio', type=float, default=0.2, help='Доля повторяющихся строк')
+    parser.add_argument('--placeholder-density', type=float, default=0.3, help='Доля строк с подстановками')
+    parser.add_argument('--mods', type=int, default=5, help='Модов в синтетическом модпаке (0 - без модпака)')
+    parser.add_argument('--latency', type=float, default=0.05, help='Задержка запроса к сервису, с')
+    parser.add_argument('--latency-per-char', type=float, default=0.000002, help='Задержка на символ, с')
+    parser.add_argument('--workers', type=int, default=8, help='Одновременных запросов')
+    parser.add_argument('--processes', type=int, default=None, help='Процессов для модпака')
+    parser.add_argument('--seed', type=int, default=42, help='Зерно генератора')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Файл результатов (по умолчанию benchmarks/results/bench-<время>.json)')
+    parser.add_argument('--compare', type=str, default=None, help='Сравнить с сохраненным результатом')
+    args = parser.parse_args()
+
+    print("Фазы:")
+    result = run(args)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    for name, metrics in result['metrics'].items():
+        if 'strings_per_sec' in metrics:
+            requests = f", запросов {metrics['requests']}" if 'requests' in metrics else ''
+            print(f"{name}: {metrics['strings']} строк, {metrics['strings_per_sec']} строк/с{requests}")
+    print(f"Пиковая память: {result['peak_rss_mb']} МБ (дочерние процессы: {result['peak_rss_children_mb']} МБ)")
+    print(f"Результаты сохранены: {output}")
+
+    if args.compare:
+        compare(result, json.loads(Path(args.compare).read_text(encoding='utf-8')))
+
+
+if __name__ == '__main__':
+    main()
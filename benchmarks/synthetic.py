@@ -0,0 +1,186 @@
+"""
+Генератор синтетических модов и модпаков для бенчмарков
+"""
+import json
+import random
+import zipfile
+from pathlib import Path
+from typing import Dict, List
+
+
+# Слова для названий предметов и описаний
+_ADJECTIVES = ['Iron', 'Golden', 'Ancient', 'Reinforced', 'Enchanted', 'Cursed', 'Mechanical',
+               'Crystal', 'Frozen', 'Blazing', 'Hardened', 'Mystic', 'Copper', 'Obsidian']
+_NOUNS = ['Sword', 'Pickaxe', 'Furnace', 'Chest', 'Pipe', 'Generator', 'Altar', 'Backpack',
+          'Gear', 'Ingot', 'Plate', 'Wand', 'Conveyor', 'Tank', 'Crate', 'Lantern', 'Ore']
+_SENTENCES = [
+    'Right-click to open the {noun} interface.',
+    'Stores items and fluids for later use.',
+    'Requires a {adj} {noun} to craft.',
+    'Shift-click to toggle the working mode.',
+    'Generates energy while exposed to sunlight.',
+    'This block can be rotated with a wrench.',
+    'Place it next to a {noun} to link them together.',
+    'Does not work in the Nether.',
+]
+_PLACEHOLDERS = ['%s', '%d', '%1$s', '%2$s', '%.1f', '{0}', '{1}']
+_CATEGORIES = ['item', 'block', 'tooltip', 'gui', 'message', 'advancement']
+
+# Расширения двоичных файлов мода и доля каждого вида
+_BINARY_KINDS = [('class', 0.6), ('png', 0.3), ('ogg', 0.1)]
+
+
+def make_lang_data(keys: int, namespace: str = 'example', duplicate_ratio: float = 0.2,
+                   placeholder_density: float = 0.3, seed: int = 42) -> Dict[str, str]:
+    """
+    Создает содержимое en_us.json, похожее на настоящие моды
+
+    Args:
+        keys: Количество ключей
+        namespace: Пространство имен мода (входит в ключи)
+        duplicate_ratio: Доля значений, повторяющих уже встречавшиеся
+        placeholder_density: Доля значений с подстановками (%s, {0})
+        seed: Зерно генератора случайных чисел
+
+    Returns:
+        Словарь {ключ: строка}
+    """
+    rng = random.Random(seed)
+    data: Dict[str, str] = {}
+    values: List[str] = []
+    for index in range(keys):
+        category = rng.choice(_CATEGORIES)
+        key = f"{category}.{namespace}.{rng.choice(_NOUNS).lower()}_{index}"
+        if values and rng.random() < duplicate_ratio:
+            value = rng.choice(values)
+        else:
+            adj, noun = rng.choice(_ADJECTIVES), rng.choice(_NOUNS)
+            if category in ('item', 'block'):
+                value = f"{adj} {noun}"
+            else:
+                value = rng.choice(_SENTENCES).format(adj=adj, noun=noun)
+            if rng.random() < placeholder_density:
+                value = f"{value} {rng.choice(_PLACEHOLDERS)}"
+            # Номер делает строку уникальной, как в настоящих модах
+            # (уровни, тиры, варианты одного предмета)
+            value = f"{value} {index}" if rng.random() < 0.5 else value
+            values.append(value)
+        data[key] = value
+    return data
+
+
+def _random_bytes(rng: random.Random, size: int) -> bytes:
+    """Несжимаемые данные, одинаковые при одинаковом зерне"""
+    return rng.getrandbits(size * 8).to_bytes(size, 'little')
+
+
+def _binary_payload(rng: random.Random, kind: str) -> bytes:
+    """Содержимое двоичного файла: классы хорошо сжимаются, медиа - нет"""
+    if kind == 'class':
+        words = [b'public', b'class', b'void', b'return', b'java/lang/Object', b'net/minecraft', b'getItem']
+        return b'\xca\xfe\xba\xbe' + b' '.join(rng.choice(words) for _ in range(rng.randint(200, 2000)))
+    if kind == 'png':
+        return b'\x89PNG' + _random_bytes(rng, rng.randint(500, 4000))
+    return b'OggS' + _random_bytes(rng, rng.randint(5000, 40000))
+
+
+def _binary_entries(namespace: str, count: int, seed: int):
+    """Имена и содержимое двоичных файлов мода"""
+    rng = random.Random(seed)
+    for index in range(count):
+        roll = rng.random()
+        for kind, share in _BINARY_KINDS:
+            roll -= share
+            if roll < 0:
+                break
+        if kind == 'class':
+            name = f"com/{namespace}/pkg{index % 50}/Class{index}.class"
+        elif kind == 'png':
+            name = f"assets/{namespace}/textures/item/tex{index}.png"
+        else:
+            name = f"assets/{namespace}/sounds/sound{index}.ogg"
+        yield name, _binary_payload(rng, kind)
+
+
+def make_mod_dir(root: Path, namespace: str = 'example', keys: int = 1000, binary_entries: int = 100,
+                 duplicate_ratio: float = 0.2, placeholder_density: float = 0.3, seed: int = 42) -> Path:
+    """
+    Создает папку мода с en_us.json и двоичными файлами
+
+    Args:
+        root: Папка мода
+        namespace: Пространство имен мода
+        keys: Количество ключей в en_us.json
+        binary_entries: Количество двоичных файлов (классы, текстуры, звуки)
+        duplicate_ratio: Доля повторяющихся строк
+        placeholder_density: Доля строк с подстановками
+        seed: Зерно генератора случайных чисел
+
+    Returns:
+        Путь к папке мода
+    """
+    root = Path(root)
+    for name, payload in _binary_entries(namespace, binary_entries, seed):
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(payload)
+
+    lang = root / 'assets' / namespace / 'lang' / 'en_us.json'
+    lang.parent.mkdir(parents=True, exist_ok=True)
+    data = make_lang_data(keys, namespace, duplicate_ratio, placeholder_density, seed)
+    lang.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+    return root
+
+
+def make_mod_jar(jar_path: Path, namespace: str = 'example', keys: int = 1000, binary_entries: int = 100,
+                 duplicate_ratio: float = 0.2, placeholder_density: float = 0.3, seed: int = 42) -> Path:
+    """
+    Создает .jar мода без промежуточной папки (параметры как у make_mod_dir)
+
+    Returns:
+        Путь к .jar файлу
+    """
+    jar_path = Path(jar_path)
+    jar_path.parent.mkdir(parents=True, exist_ok=True)
+    data = make_lang_data(keys, namespace, duplicate_ratio, placeholder_density, seed)
+    with zipfile.ZipFile(jar_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        zipf.writestr('META-INF/MANIFEST.MF', 'Manifest-Version: 1.0\n')
+        zipf.writestr('META-INF/mods.toml', f'[[mods]]\nmodId="{namespace}"\n')
+        for name, payload in _binary_entries(namespace, binary_entries, seed):
+            compress = zipfile.ZIP_STORED if not name.endswith('.class') else zipfile.ZIP_DEFLATED
+            zipf.writestr(name, payload, compress_type=compress)
+        zipf.writestr(f'assets/{namespace}/lang/en_us.json',
+                      json.dumps(data, ensure_ascii=False, indent=2))
+    return jar_path
+
+
+def make_modpack(mods_dir: Path, mods: int = 10, keys: int = 1000, binary_entries: int = 100,
+                 duplicate_ratio: float = 0.2, placeholder_density: float = 0.3,
+                 seed: int = 42) -> List[Path]:
+    """
+    Создает папку mods с несколькими синтетическими модами разного размера
+
+    Args:
+        mods_dir: Папка mods
+        mods: Количество модов
+        keys: Среднее количество ключей в моде
+        binary_entries: Среднее количество двоичных файлов в моде
+        duplicate_ratio: Доля повторяющихся строк внутри мода
+        placeholder_density: Доля строк с подстановками
+        seed: Зерно генератора случайных чисел
+
+    Returns:
+        Список путей к .jar файлам
+    """
+    rng = random.Random(seed)
+    jars = []
+    for index in range(mods):
+        # Размеры модов сильно различаются: от мелких утилит до крупных модов
+        scale = rng.choice([0.1, 0.3, 0.5, 1.0, 1.0, 2.0, 4.0])
+        jars.append(make_mod_jar(
+            Path(mods_dir) / f"mod{index:03d}.jar", f"mod{index:03d}",
+            keys=max(1, int(keys * scale)), binary_entries=max(1, int(binary_entries * scale)),
+            duplicate_ratio=duplicate_ratio, placeholder_density=placeholder_density,
+            seed=seed + index
+        ))
+    return jars
@@ -0,0 +1,450 @@
+"""
+Фоновый сервис перевода: держит переводчик "прогретым" между заданиями
+
+Обычный запуск translator.py или gui.py каждый раз заново импортирует
+сервис перевода, открывает соединения и память переводов. Сервис запускается
+один раз и принимает задания (.jar, папка мода, модпак) в очередь по локальному
+HTTP; соединения с сервисом перевода, память переводов и ограничители частоты
+запросов сохраняются между заданиями. CLI и GUI работают как тонкие клиенты:
+отправляют задание и выводят его журнал по мере выполнения.
+
+Запуск:
+    py daemon.py --port 8766
+    py translator.py МОД.jar --daemon
+    py translator.py mods --modpack --daemon http://127.0.0.1:8766
+"""
+import argparse
+import itertools
+import json
+import queue
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from output_store import DEFAULT_STORE_PATH, OutputStore
+from resource_pack import DEFAULT_PACK_FORMAT
+from translation_memory import DEFAULT_MEMORY_PATH, TranslationMemory
+
+
+DEFAULT_DAEMON_URL = 'http://127.0.0.1:8766'
+
+# Виды заданий
+JOB_KINDS = ('jar', 'folder', 'modpack')
+
+# Параметры переводчика, от которых зависят сервис перевода и ограничители:
+# переводчик с такими же параметрами берется из уже созданных
+_TRANSLATOR_KEYS = ('source_lang', 'target_lang', 'workers', 'max_rps', 'max_retries',
+                    'backend', 'backend_options')
+# Параметры, которые можно поменять у готового переводчика перед заданием
+_JOB_FLAGS = ('incremental', 'resume', 'fuzzy', 'keep_existing')
+
+# Как часто клиент спрашивает о ходе задания
+POLL_INTERVAL = 0.2
+
+# Сколько завершенных заданий хранится (старые удаляются вместе с журналами)
+MAX_FINISHED_JOBS = 100
+
+
+class DaemonError(Exception):
+    """Ошибка обращения к фоновому сервису"""
+
+
+@dataclass
+class Job:
+    """Задание фонового сервиса"""
+
+    id: str
+    # Вид задания (jar, folder или modpack)
+    kind: str
+    # Параметры задания (пути и параметры переводчика, см. submit_job)
+    spec: Dict[str, Any]
+    # queued, running, done или error
+    status: str = 'queued'
+    # Строки журнала задания (то, что переводчик выводит в консоль)
+    log: List[str] = field(default_factory=list)
+    # Итог задания: статистика (jar, folder) или отчет (modpack)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    submitted: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+    def to_dict(self, since: int = 0) -> Dict[str, Any]:
+        """
+        Состояние задания для клиента
+
+        Args:
+            since: С какой строки журнала отдавать (строки до нее клиент уже получил)
+        """
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'log': self.log[since:],
+            'next': len(self.log),
+            'result': self.result,
+            'error': self.error,
+            'queue_seconds': round((self.started or time.time()) - self.submitted, 3),
+        }
+
+
+class _JobLog:
+    """Поток для redirect_stdout: собирает вывод задания построчно"""
+
+    def __init__(self, job: Job, lock: threading.Lock):
+        self.job = job
+        self.lock = lock
+        self._line = ''
+
+    def write(self, text: str) -> int:
+        lines = (self._line + text).split('\n')
+        self._line = lines.pop()
+        with self.lock:
+            self.job.log.extend(line for line in lines if line.strip())
+        return len(text)
+
+    def flush(self) -> None:
+        if self._line.strip():
+            with self.lock:
+                self.job.log.append(self._line)
+        self._line = ''
+
+
+class TranslationDaemon(ThreadingHTTPServer):
+    """
+    Локальный HTTP сервис с очередью заданий перевода
+
+    Задания выполняются по одному в отдельном потоке, поэтому переводчики
+    и память переводов не используются двумя заданиями одновременно.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, memory: Optional[TranslationMemory] = None,
+                 output_store: Optional[OutputStore] = None):
+        """
+        Args:
+            address: Адрес (host, port)
+            memory: Память переводов, общая для всех заданий (None - без памяти)
+            output_store: Хранилище результатов, общее для всех заданий (None - без хранилища)
+        """
+        super().__init__(address, _Handler)
+        self.memory = memory
+        self.output_store = output_store
+        self.jobs: Dict[str, Job] = {}
+        self.lock = threading.Lock()
+        self._queue: 'queue.Queue[Optional[Job]]' = queue.Queue()
+        self._ids = itertools.count(1)
+        # Созданные переводчики по параметрам (см. _TRANSLATOR_KEYS)
+        self._translators: Dict[str, Any] = {}
+        self._worker = threading.Thread(target=self._work, name='translation-jobs', daemon=True)
+        self._worker.start()
+
+    @property
+    def url(self) -> str:
+        """Адрес сервиса для --daemon"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def submit(self, spec: Dict[str, Any]) -> Job:
+        """
+        Ставит задание в очередь
+
+        Args:
+            spec: Параметры задания (см. submit_job)
+
+        Returns:
+            Созданное задание
+
+        Raises:
+            ValueError: Неизвестный вид задания или путь не существует
+        """
+        kind = spec.get('kind')
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Неизвестный вид задания: {kind}")
+        if not spec.get('path') or not Path(spec['path']).exists():
+            raise ValueError(f"Путь не существует: {spec.get('path')}")
+        with self.lock:
+            job = Job(str(next(self._ids)), kind, spec)
+            self.jobs[job.id] = job
+        self._queue.put(job)
+        return job
+
+    def status(self) -> Dict[str, Any]:
+        """Состояние сервиса: задания по статусам, прогретые переводчики, память, хранилище результатов"""
+        with self.lock:
+            counts: Dict[str, int] = {}
+            for job in self.jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            translators = len(self._translators)
+        return {
+            'jobs': counts,
+            'translators': translators,
+            'memory': self.memory.stats() if self.memory is not None else None,
+            'output_store': self.output_store.stats() if self.output_store is not None else None,
+        }
+
+    def stop(self) -> None:
+        """Останавливает обработку очереди (текущее задание доделывается)"""
+        self._queue.put(None)
+        self._worker.join()
+
+    def _translator(self, options: Dict[str, Any]):
+        """Переводчик для параметров задания (создается при первом обращении)"""
+        from translator import MinecraftModTranslator
+
+        key = json.dumps({name: options.get(name) for name in _TRANSLATOR_KEYS}, sort_keys=True)
+        translator = self._translators.get(key)
+        if translator is None:
+            settings = {name: options[name] for name in _TRANSLATOR_KEYS if options.get(name) is not None}
+            translator = MinecraftModTranslator(memory=self.memory, output_store=self.output_store, **settings)
+            with self.lock:
+                self._translators[key] = translator
+        for target in translator.targets:
+            for name in _JOB_FLAGS:
+                if name in options:
+                    setattr(target, name, bool(options[name]))
+        return translator
+
+    def _work(self) -> None:
+        """Выполняет задания из очереди по одному"""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self.lock:
+                job.status = 'running'
+                job.started = time.time()
+            log = _JobLog(job, self.lock)
+            try:
+                with redirect_stdout(log):
+                    result = self._run(job)
+                status, error = 'done', None
+            except Exception as e:
+                result, status, error = None, 'error', f"{type(e).__name__}: {e}"
+            finally:
+                log.flush()
+                if self.memory is not None:
+                    self.memory.flush()
+            with self.lock:
+                job.result = result
+                job.error = error
+                job.status = status
+                job.finished = time.time()
+                finished = [item.id for item in self.jobs.values() if item.finished is not None]
+                for job_id in finished[:-MAX_FINISHED_JOBS]:
+                    del self.jobs[job_id]
+
+    def _run(self, job: Job) -> Dict[str, Any]:
+        """Выполняет одно задание"""
+        from jar_handler import translate_jar_mod
+        from modpack import translate_modpack
+        from resource_pack import ResourcePackBuilder
+
+        spec = job.spec
+        translator = self._translator(spec.get('translator_options', {}))
+        output = spec.get('output')
+        pack_format = spec.get('pack_format', DEFAULT_PACK_FORMAT)
+
+        if job.kind == 'modpack':
+            report = translate_modpack(
+                Path(spec['path']), Path(output) if output else None,
+                resource_pack_path=Path(spec['resource_pack']) if spec.get('resource_pack') else None,
+                pack_format=pack_format, translator=translator
+            )
+            return {'report': report}
+
+        if job.kind == 'jar':
+            resource_pack = None
+            if spec.get('resource_pack'):
+                resource_pack = ResourcePackBuilder(Path(spec['resource_pack']), pack_format)
+                resource_pack.load()
+            previous = spec.get('previous')
+            result = translate_jar_mod(Path(spec['path']), translator, Path(output) if output else None,
+                                       Path(previous) if previous else None, resource_pack)
+            if resource_pack is not None:
+                resource_pack.write()
+            print(f"Переведенный мод сохранен: {result}")
+            return {'output': str(result), 'stats': translator.stats()}
+
+        stats = translator.translate_mod(spec['path'], output)
+        return {'output': output or spec['path'], 'stats': stats}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Обработчик запросов фонового сервиса"""
+
+    server: TranslationDaemon
+
+    def log_message(self, format, *args):
+        # Клиент опрашивает ход задания несколько раз в секунду
+        pass
+
+    def _reply(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        if url.path == '/status':
+            self._reply(200, server.status())
+            return
+        if url.path.startswith('/jobs/'):
+            with server.lock:
+                job = server.jobs.get(url.path[len('/jobs/'):])
+                if job is not None:
+                    try:
+                        since = int(parse_qs(url.query).get('since', ['0'])[0])
+                    except ValueError:
+                        since = 0
+                    payload = job.to_dict(since)
+            if job is None:
+                self._reply(404, {'error': 'job not found'})
+            else:
+                self._reply(200, payload)
+            return
+        self._reply(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path != '/jobs':
+            self._reply(404, {'error': 'not found'})
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            spec = json.loads(self.rfile.read(length).decode('utf-8'))
+            job = self.server.submit(spec)
+        except (ValueError, UnicodeDecodeError, AttributeError) as e:
+            self._reply(400, {'error': str(e)})
+            return
+        self._reply(202, {'id': job.id})
+
+
+def _request(url: str, payload: Optional[Dict[str, Any]] = None, timeout: float = 30) -> Dict[str, Any]:
+    """Отправляет запрос сервису и возвращает ответ"""
+    data = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json; charset=utf-8'})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as e:
+        try:
+            message = json.loads(e.read().decode('utf-8')).get('error', e.reason)
+        except ValueError:
+            message = e.reason
+        raise DaemonError(f"Сервис ответил {e.code}: {message}") from e
+    except (urllib.error.URLError, OSError) as e:
+        raise DaemonError(f"Фоновый сервис недоступен по адресу {url} ({e}), "
+                          f"запустите его командой: py daemon.py") from e
+
+
+def submit_job(url: str, kind: str, path: str, output: Optional[str] = None,
+               translator_options: Optional[Dict[str, Any]] = None, previous: Optional[str] = None,
+               resource_pack: Optional[str] = None, pack_format: int = DEFAULT_PACK_FORMAT) -> str:
+    """
+    Отправляет задание фоновому сервису
+
+    Пути передаются абсолютными: сервис может быть запущен из другой папки.
+
+    Args:
+        url: Адрес сервиса (например, http://127.0.0.1:8766)
+        kind: Вид задания (jar, folder или modpack)
+        path: Путь к .jar, папке мода или папке mods
+        output: Путь для сохранения (как -o у translator.py)
+        translator_options: Параметры MinecraftModTranslator (языки, сервис перевода,
+            потоки, max_rps, incremental, resume, fuzzy)
+        previous: Ранее переведенный .jar для инкрементального режима
+        resource_pack: Собирать переводы в этот ресурспак
+        pack_format: pack_format ресурспака
+
+    Returns:
+        Идентификатор задания
+
+    Raises:
+        DaemonError: Сервис недоступен или отклонил задание
+    """
+    def absolute(value: Optional[str]) -> Optional[str]:
+        return str(Path(value).resolve()) if value else None
+
+    spec = {
+        'kind': kind,
+        'path': absolute(path),
+        'output': absolute(output),
+        'previous': absolute(previous),
+        'resource_pack': absolute(resource_pack),
+        'pack_format': pack_format,
+        'translator_options': translator_options or {},
+    }
+    return _request(f"{url.rstrip('/')}/jobs", spec)['id']
+
+
+def follow_job(url: str, job_id: str, on_line: Callable[[str], None] = print,
+               poll_interval: float = POLL_INTERVAL) -> Dict[str, Any]:
+    """
+    Ждет завершения задания, передавая новые строки его журнала в on_line
+
+    Args:
+        url: Адрес сервиса
+        job_id: Идентификатор задания
+        on_line: Вызывается для каждой строки журнала
+        poll_interval: Пауза между запросами в секундах
+
+    Returns:
+        Итоговое состояние задания (status - done или error, result, error)
+
+    Raises:
+        DaemonError: Сервис недоступен
+    """
+    since = 0
+    while True:
+        state = _request(f"{url.rstrip('/')}/jobs/{job_id}?since={since}")
+        for line in state['log']:
+            on_line(line)
+        since = state['next']
+        if state['status'] in ('done', 'error'):
+            return state
+        time.sleep(poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Фоновый сервис перевода модов Minecraft')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Адрес (по умолчанию: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8766, help='Порт (по умолчанию: 8766)')
+    parser.add_argument('--cache', type=str, default=str(DEFAULT_MEMORY_PATH),
+                        help=f'Путь к памяти переводов (по умолчанию: {DEFAULT_MEMORY_PATH})')
+    parser.add_argument('--no-cache', action='store_true', help='Не использовать память переводов')
+    parser.add_argument('--output-store', type=str, default=str(DEFAULT_STORE_PATH),
+                        help=f'Путь к хранилищу результатов (по умолчанию: {DEFAULT_STORE_PATH})')
+    parser.add_argument('--no-output-store', action='store_true', help='Не использовать хранилище результатов')
+    args = parser.parse_args()
+
+    memory = None if args.no_cache else TranslationMemory(Path(args.cache))
+    store = None if args.no_output_store else OutputStore(Path(args.output_store))
+    server = TranslationDaemon((args.host, args.port), memory, store)
+    print(f"Фоновый сервис перевода запущен: {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.stop()
+        if memory is not None:
+            memory.close()
+        if store is not None:
+            store.close()
+
+
+if __name__ == '__main__':
+    main()
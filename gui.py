@@ -4,29 +4,61 @@
 from __future__ import annotations
 
 import os
+import queue
 import threading
 from pathlib import Path
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, ttk
 from tkinter.scrolledtext import ScrolledText
 
+from backends import BACKENDS
+from daemon import DEFAULT_DAEMON_URL, follow_job, submit_job
 from translator import MinecraftModTranslator
 from jar_handler import translate_jar_mod
+from metrics import format_phases, write_json
+from modpack import translate_modpack
+from resource_pack import ResourcePackBuilder
+from output_store import DEFAULT_STORE_PATH, OutputStore
+from progress import CancelToken, ProgressChannel, ProgressTracker, TranslationCancelled
+from translation_memory import DEFAULT_MEMORY_PATH, TranslationMemory
+
+
+# Метрики последнего запуска из GUI (консольный вывод в GUI не виден)
+METRICS_PATH = DEFAULT_MEMORY_PATH.parent / "last_run_metrics.json"
+
+# Как часто (мс) переносить в окно строки лога и ход перевода из рабочего потока
+POLL_MS = 200
 
 
 class TranslatorGUI:
     def __init__(self, root: tk.Tk) -> None:
         self.root = root
         self.root.title("Переводчик модов Minecraft")
-        self.root.geometry("700x520")
+        self.root.geometry("700x650")
 
         self.mode_var = tk.StringVar(value="jar")
         self.path_var = tk.StringVar()
         self.output_var = tk.StringVar()
         self.source_var = tk.StringVar(value="en")
         self.target_var = tk.StringVar(value="ru")
+        self.workers_var = tk.StringVar(value="8")
+        self.max_rps_var = tk.StringVar(value="0")
+        self.incremental_var = tk.BooleanVar(value=False)
+        self.resume_var = tk.BooleanVar(value=False)
+        self.resource_pack_var = tk.BooleanVar(value=False)
+        self.backend_var = tk.StringVar(value="google")
+        self.backend_url_var = tk.StringVar(value="http://127.0.0.1:8765")
+        self.daemon_var = tk.BooleanVar(value=False)
+        self.daemon_url_var = tk.StringVar(value=DEFAULT_DAEMON_URL)
+
+        # Строки лога и события прогресса из рабочего потока; окно забирает их по таймеру
+        self._log_queue: queue.SimpleQueue[str] = queue.SimpleQueue()
+        self.progress: ProgressChannel | None = None
+        self.tracker: ProgressTracker | None = None
+        self.cancel_token: CancelToken | None = None
 
         self._build_ui()
+        self.root.after(POLL_MS, self._poll)
 
     def _build_ui(self) -> None:
         header = tk.Label(self.root, text="Переводчик модов Minecraft", font=("Segoe UI", 14, "bold"))
@@ -41,6 +73,10 @@ class TranslatorGUI:
         tk.Radiobutton(
             mode_frame, text="Перевести папку", value="folder", variable=self.mode_var, command=self._on_mode_change
         ).pack(side="left", padx=8, pady=6)
+        tk.Radiobutton(
+            mode_frame, text="Перевести модпак (папка mods)", value="modpack", variable=self.mode_var,
+            command=self._on_mode_change
+        ).pack(side="left", padx=8, pady=6)
 
         path_frame = tk.LabelFrame(self.root, text="Входной файл / папка")
         path_frame.pack(fill="x", padx=12, pady=6)
@@ -60,13 +96,46 @@ class TranslatorGUI:
         self.output_button = tk.Button(output_frame, text="Выбрать...", command=self._browse_output)
         self.output_button.pack(side="left", padx=8, pady=6)
 
+        tk.Checkbutton(
+            output_frame, text="Ресурспак вместо .jar", variable=self.resource_pack_var
+        ).pack(side="left", padx=8, pady=6)
+
         lang_frame = tk.LabelFrame(self.root, text="Языки")
         lang_frame.pack(fill="x", padx=12, pady=6)
 
         tk.Label(lang_frame, text="Исходный:").pack(side="left", padx=8)
         tk.Entry(lang_frame, textvariable=self.source_var, width=6).pack(side="left", padx=4)
-        tk.Label(lang_frame, text="Целевой:").pack(side="left", padx=8)
-        tk.Entry(lang_frame, textvariable=self.target_var, width=6).pack(side="left", padx=4)
+        tk.Label(lang_frame, text="Целевые (через запятую):").pack(side="left", padx=8)
+        tk.Entry(lang_frame, textvariable=self.target_var, width=12).pack(side="left", padx=4)
+        tk.Label(lang_frame, text="Сервис:").pack(side="left", padx=8)
+        tk.OptionMenu(lang_frame, self.backend_var, *sorted(BACKENDS)).pack(side="left", padx=4)
+        tk.Label(lang_frame, text="Адрес (http):").pack(side="left", padx=8)
+        tk.Entry(lang_frame, textvariable=self.backend_url_var, width=24).pack(side="left", padx=4)
+
+        speed_frame = tk.LabelFrame(self.root, text="Скорость")
+        speed_frame.pack(fill="x", padx=12, pady=6)
+
+        tk.Label(speed_frame, text="Потоков (макс.):").pack(side="left", padx=8)
+        tk.Entry(speed_frame, textvariable=self.workers_var, width=6).pack(side="left", padx=4)
+        tk.Label(speed_frame, text="Запросов в секунду (0 - без лимита):").pack(side="left", padx=8)
+        tk.Entry(speed_frame, textvariable=self.max_rps_var, width=6).pack(side="left", padx=4)
+
+        options_frame = tk.LabelFrame(self.root, text="Обновление перевода")
+        options_frame.pack(fill="x", padx=12, pady=6)
+
+        tk.Checkbutton(options_frame, text="Только изменения", variable=self.incremental_var).pack(side="left", padx=8)
+        tk.Checkbutton(
+            options_frame, text="Продолжить прерванный", variable=self.resume_var
+        ).pack(side="left", padx=8)
+
+        daemon_frame = tk.LabelFrame(self.root, text="Фоновый сервис (py daemon.py)")
+        daemon_frame.pack(fill="x", padx=12, pady=6)
+
+        tk.Checkbutton(
+            daemon_frame, text="Переводить через сервис", variable=self.daemon_var
+        ).pack(side="left", padx=8)
+        tk.Label(daemon_frame, text="Адрес:").pack(side="left", padx=8)
+        tk.Entry(daemon_frame, textvariable=self.daemon_url_var, width=24).pack(side="left", padx=4)
 
         action_frame = tk.Frame(self.root)
         action_frame.pack(fill="x", padx=12, pady=8)
@@ -74,6 +143,10 @@ class TranslatorGUI:
         self.start_button = tk.Button(action_frame, text="Начать перевод", command=self._start_translation)
         self.start_button.pack(side="left", padx=8)
 
+        self.stop_button = tk.Button(action_frame, text="Остановить", command=self._cancel_translation,
+                                     state="disabled")
+        self.stop_button.pack(side="left", padx=8)
+
         self.clear_button = tk.Button(action_frame, text="Очистить лог", command=self._clear_log)
         self.clear_button.pack(side="left", padx=8)
 
@@ -84,6 +157,11 @@ class TranslatorGUI:
         self.log_box.pack(fill="both", expand=True, padx=8, pady=6)
         self.log_box.config(state="disabled")
 
+        self.progress_bar = ttk.Progressbar(self.root, maximum=1.0)
+        self.progress_bar.pack(fill="x", padx=12, pady=(6, 0))
+        self.progress_label = tk.Label(self.root, text="", anchor="w")
+        self.progress_label.pack(fill="x", padx=12)
+
         self.status_label = tk.Label(self.root, text="Готово", anchor="w")
         self.status_label.pack(fill="x", padx=12, pady=6)
 
@@ -101,6 +179,8 @@ class TranslatorGUI:
                 title="Выберите .jar файл",
                 filetypes=[("Minecraft Mod", "*.jar"), ("Все файлы", "*.*")],
             )
+        elif self.mode_var.get() == "modpack":
+            path = filedialog.askdirectory(title="Выберите папку mods")
         else:
             path = filedialog.askdirectory(title="Выберите папку мода")
 
@@ -108,7 +188,13 @@ class TranslatorGUI:
             self.path_var.set(path)
 
     def _browse_output(self) -> None:
-        if self.mode_var.get() == "jar":
+        if self.resource_pack_var.get():
+            path = filedialog.asksaveasfilename(
+                title="Куда сохранить ресурспак",
+                defaultextension=".zip",
+                filetypes=[("Ресурспак", "*.zip"), ("Все файлы", "*.*")],
+            )
+        elif self.mode_var.get() == "jar":
             path = filedialog.asksaveasfilename(
                 title="Куда сохранить .jar",
                 defaultextension=".jar",
@@ -121,16 +207,30 @@ class TranslatorGUI:
             self.output_var.set(path)
 
     def _set_status(self, text: str) -> None:
-        self.status_label.config(text=text)
+        self.root.after(0, lambda: self.status_label.config(text=text))
 
     def _log(self, text: str) -> None:
-        def _append() -> None:
+        self._log_queue.put(text)
+
+    def _poll(self) -> None:
+        """Переносит в окно накопившиеся строки лога и ход перевода (одним обновлением)"""
+        lines = []
+        while True:
+            try:
+                lines.append(self._log_queue.get_nowait())
+            except queue.Empty:
+                break
+        if lines:
             self.log_box.config(state="normal")
-            self.log_box.insert(tk.END, text + "\n")
+            self.log_box.insert(tk.END, "\n".join(lines) + "\n")
             self.log_box.see(tk.END)
             self.log_box.config(state="disabled")
 
-        self.root.after(0, _append)
+        if self.progress is not None and self.tracker is not None:
+            self.tracker.update(self.progress.drain())
+            self.progress_bar["value"] = self.tracker.fraction()
+            self.progress_label.config(text=self.tracker.summary())
+        self.root.after(POLL_MS, self._poll)
 
     def _clear_log(self) -> None:
         self.log_box.config(state="normal")
@@ -144,23 +244,105 @@ class TranslatorGUI:
             return
 
         self.start_button.config(state="disabled")
+        self.progress = ProgressChannel()
+        self.tracker = ProgressTracker()
+        self.cancel_token = CancelToken()
+        self.progress_bar["value"] = 0
+        # Задание фонового сервиса выполняется в другом процессе, его отсюда не остановить
+        if not self.daemon_var.get():
+            self.stop_button.config(state="normal")
         self._set_status("Перевод в процессе...")
         self._log("=== Старт перевода ===")
 
         thread = threading.Thread(target=self._run_translation, daemon=True)
         thread.start()
 
+    def _cancel_translation(self) -> None:
+        if self.cancel_token is not None:
+            self.cancel_token.cancel()
+        self.stop_button.config(state="disabled")
+        self._set_status("Остановка...")
+        self._log("Остановка: дожидаемся уже отправленных запросов...")
+
     def _run_translation(self) -> None:
         try:
             source_lang = self.source_var.get().strip() or "en"
             target_lang = self.target_var.get().strip() or "ru"
-
-            translator = MinecraftModTranslator(source_lang=source_lang, target_lang=target_lang)
+            workers = int(self.workers_var.get().strip() or 1)
+            max_rps = float(self.max_rps_var.get().strip() or 0)
+            incremental = self.incremental_var.get()
+            backend = self.backend_var.get()
+            backend_options = {}
+            if backend == "http":
+                backend_options["url"] = self.backend_url_var.get().strip()
 
             input_path = Path(self.path_var.get().strip())
             output_path = self.output_var.get().strip()
 
-            if self.mode_var.get() == "jar" or input_path.suffix.lower() == ".jar":
+            if self.daemon_var.get():
+                self._run_daemon(input_path, output_path, source_lang, target_lang, workers, max_rps, incremental,
+                                 backend, backend_options)
+            elif self.mode_var.get() == "modpack":
+                self._run_modpack(input_path, output_path, source_lang, target_lang, workers, max_rps, incremental,
+                                  backend, backend_options)
+            else:
+                self._run_single(input_path, output_path, source_lang, target_lang, workers, max_rps, incremental,
+                                  backend, backend_options)
+
+            self._set_status("Перевод завершен")
+            self._log("=== Завершено ===")
+            self.root.after(0, lambda: messagebox.showinfo("Готово", "Перевод завершен."))
+        except TranslationCancelled:
+            self._log("=== Перевод остановлен ===")
+            self._log("Полученные переводы сохранены в журнале: включите «Продолжить прерванный», "
+                      "чтобы продолжить с того же места")
+            self._set_status("Остановлено")
+        except Exception as exc:
+            self._log(f"Ошибка: {exc}")
+            self._set_status("Ошибка")
+            self.root.after(0, lambda: messagebox.showerror("Ошибка", str(exc)))
+        finally:
+            self.root.after(0, lambda: self.start_button.config(state="normal"))
+            self.root.after(0, lambda: self.stop_button.config(state="disabled"))
+
+    def _run_single(
+        self,
+        input_path: Path,
+        output_path: str,
+        source_lang: str,
+        target_lang: str,
+        workers: int,
+        max_rps: float,
+        incremental: bool,
+        backend: str,
+        backend_options: dict,
+    ) -> None:
+        memory = TranslationMemory()
+        store = OutputStore()
+        try:
+            translator = MinecraftModTranslator(
+                source_lang=source_lang,
+                target_lang=target_lang,
+                memory=memory,
+                workers=workers,
+                max_rps=max_rps,
+                incremental=incremental,
+                resume=self.resume_var.get(),
+                backend=backend,
+                backend_options=backend_options,
+                output_store=store,
+                progress=self.progress,
+                cancel_token=self.cancel_token,
+            )
+
+            if self.resource_pack_var.get() and input_path.suffix.lower() == ".jar":
+                resource_pack = ResourcePackBuilder(self._resource_pack_path(input_path.parent, output_path))
+                resource_pack.load()
+                self._log(f"Режим: JAR -> ресурспак ({input_path})")
+                translate_jar_mod(input_path, translator, resource_pack=resource_pack)
+                self._log(f"Готово: {resource_pack.write()}")
+                stats = translator.stats()
+            elif self.mode_var.get() == "jar" or input_path.suffix.lower() == ".jar":
                 out = None
                 if output_path:
                     out_path = Path(output_path)
@@ -172,22 +354,161 @@ class TranslatorGUI:
                 self._log(f"Режим: JAR ({input_path})")
                 result = translate_jar_mod(input_path, translator, out)
                 self._log(f"Готово: {result}")
+                stats = translator.stats()
             else:
                 self._log(f"Режим: папка ({input_path})")
                 stats = translator.translate_mod(str(input_path), output_path or None)
-                self._log(
-                    f"Файлов: {stats['files_processed']} | Переведено: {stats['translated']} | Пропущено: {stats['skipped']}"
-                )
 
-            self._set_status("Перевод завершен")
-            self._log("=== Завершено ===")
-            self.root.after(0, lambda: messagebox.showinfo("Готово", "Перевод завершен."))
-        except Exception as exc:
-            self._log(f"Ошибка: {exc}")
-            self._set_status("Ошибка")
-            self.root.after(0, lambda: messagebox.showerror("Ошибка", str(exc)))
+            self._log_stats(stats, incremental)
+
+            cache = memory.stats()
+            self._log(f"Память переводов: попаданий {cache['hits']} | промахов {cache['misses']}")
         finally:
-            self.root.after(0, lambda: self.start_button.config(state="normal"))
+            memory.close()
+            store.close()
+
+    def _run_modpack(
+        self,
+        mods_dir: Path,
+        output_path: str,
+        source_lang: str,
+        target_lang: str,
+        workers: int,
+        max_rps: float,
+        incremental: bool,
+        backend: str,
+        backend_options: dict,
+    ) -> None:
+        self._log(f"Режим: модпак ({mods_dir})")
+        resource_pack_path = None
+        if self.resource_pack_var.get():
+            resource_pack_path = self._resource_pack_path(mods_dir, output_path)
+            output_path = ""
+        report = translate_modpack(
+            mods_dir,
+            Path(output_path) if output_path else None,
+            translator_options={
+                "source_lang": source_lang,
+                "target_lang": target_lang,
+                "workers": workers,
+                "incremental": incremental,
+                "resume": self.resume_var.get(),
+                "backend": backend,
+                "backend_options": backend_options,
+            },
+            cache_path=str(DEFAULT_MEMORY_PATH),
+            store_path=str(DEFAULT_STORE_PATH),
+            max_rps=max_rps,
+            resource_pack_path=resource_pack_path,
+            progress=self.progress,
+            cancel_token=self.cancel_token,
+        )
+        self._log_report(report, resource_pack_path)
+        if report["summary"]["cancelled"]:
+            raise TranslationCancelled()
+
+    def _run_daemon(
+        self,
+        input_path: Path,
+        output_path: str,
+        source_lang: str,
+        target_lang: str,
+        workers: int,
+        max_rps: float,
+        incremental: bool,
+        backend: str,
+        backend_options: dict,
+    ) -> None:
+        url = self.daemon_url_var.get().strip() or DEFAULT_DAEMON_URL
+        if self.mode_var.get() == "modpack":
+            kind = "modpack"
+        elif self.mode_var.get() == "jar" or input_path.suffix.lower() == ".jar":
+            kind = "jar"
+        else:
+            kind = "folder"
+
+        resource_pack_path = None
+        if self.resource_pack_var.get() and kind != "folder":
+            parent = input_path if kind == "modpack" else input_path.parent
+            resource_pack_path = self._resource_pack_path(parent, output_path)
+            output_path = ""
+        elif kind == "jar" and output_path and Path(output_path).is_dir():
+            output_path = str(Path(output_path) / f"{input_path.stem}_ru.jar")
+
+        job_id = submit_job(
+            url, kind, str(input_path), output_path or None,
+            translator_options={
+                "source_lang": source_lang,
+                "target_lang": target_lang,
+                "workers": workers,
+                "max_rps": max_rps,
+                "incremental": incremental,
+                "resume": self.resume_var.get(),
+                "backend": backend,
+                "backend_options": backend_options,
+            },
+            resource_pack=str(resource_pack_path) if resource_pack_path else None,
+        )
+        self._log(f"Задание {job_id} отправлено сервису {url}")
+        state = follow_job(url, job_id, on_line=self._log)
+        if state["status"] == "error":
+            raise RuntimeError(state["error"])
+
+        result = state["result"]
+        if "report" in result:
+            self._log_report(result["report"], resource_pack_path)
+        else:
+            self._log_stats(result["stats"], incremental)
+
+    def _log_stats(self, stats: dict, incremental: bool) -> None:
+        self._log(
+            f"Файлов: {stats['files_processed']} | Переведено: {stats['translated']} | Пропущено: {stats['skipped']}"
+        )
+        self._log(
+            f"Повторов: {stats['retries']} | Перегрузок: {stats['throttles']} | Потоков: {stats['concurrency']}"
+        )
+        if incremental:
+            self._log(f"Взято из предыдущего перевода: {stats['carried']}")
+        if stats["resumed"]:
+            self._log(f"Взято из журнала прерванного перевода: {stats['resumed']}")
+        if stats.get("kept"):
+            self._log(f"Сохранено из перевода в моде: {stats['kept']}")
+        if stats["metrics"]["counters"].get("store_hits"):
+            self._log("Мод не изменился, перевод взят из хранилища результатов")
+        self._log_metrics(stats)
+
+    def _log_report(self, report: dict, resource_pack_path: Path | None) -> None:
+        for result in report["mods"]:
+            line = f"{Path(result['jar']).name}: {result['status']}"
+            if result["error"]:
+                line += f" ({result['error']})"
+            self._log(line)
+
+        summary = report["summary"]
+        self._log(
+            f"Модов: {summary['mods']} | Успешно: {summary['ok']} | Без переводов: {summary['no_lang']} "
+            f"| С ошибками: {summary['errors']} | Остановлено: {summary['cancelled']} "
+            f"| Переведено строк: {summary['translated']}"
+        )
+        self._log_metrics(summary)
+        if resource_pack_path:
+            self._log(f"Ресурспак: {resource_pack_path}")
+        else:
+            self._log(f"Переведенные моды: {report['output_dir']}")
+
+    def _log_metrics(self, stats: dict) -> None:
+        counters = stats["metrics"]["counters"]
+        self._log(f"Время по фазам: {format_phases(stats['metrics'])}")
+        self._log(f"Запросов: {counters['requests']} | Отправлено: {counters['bytes_sent'] / 1024:.1f} КБ")
+        write_json(stats, METRICS_PATH)
+        self._log(f"Метрики запуска: {METRICS_PATH}")
+
+    @staticmethod
+    def _resource_pack_path(mods_dir: Path, output_path: str) -> Path:
+        if output_path:
+            return Path(output_path)
+        # По умолчанию кладем ресурспак в .minecraft/resourcepacks рядом с папкой mods
+        return mods_dir.parent / "resourcepacks" / "mod_translations_ru.zip"
 
 
 def main() -> None:
@@ -0,0 +1,211 @@
+"""
+Сбор готовых переводов из модов в память переводов
+
+Многие моды уже содержат ru_ru.json (полный или частичный): строка из
+en_us.json сопоставляется по ключу со строкой из ru_ru.json. Из результатов
+самой программы (перевод с манифестом, см. manifest.py) берутся только ключи,
+сохраненные из перевода мода, исходная строка которых не изменилась, -
+машинный перевод в память не попадает.
+Архивы .jar читаются по центральному каталогу, без распаковки; читаются
+только пары файлов переводов.
+
+Запуск (заполнить память переводами из всех модов папки mods):
+    py harvest.py "путь\\к\\mods" --target-lang ru uk
+"""
+import argparse
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from json_stream import read_leaves
+from lang_discovery import discover_jar_lang_files, discover_lang_files, locale_for, target_path
+from legacy_lang import read_lang_values
+from manifest import MANIFEST_SUFFIX, hash_value, load_kept
+from translation_memory import DEFAULT_MEMORY_PATH, TranslationMemory
+
+
+def read_values(text: Optional[str], file_format: str) -> Dict[str, str]:
+    """
+    Читает строки файла переводов в словарь {ключ: строка}
+
+    Args:
+        text: Текст файла (None или пустая строка - пустой словарь)
+        file_format: Формат файла (json, book или lang)
+
+    Returns:
+        Строки файла; ключи вложенных значений - JSON Pointer (см. json_stream.leaf_id)
+    """
+    return read_lang_values(text) if file_format == 'lang' else read_leaves(text)
+
+
+def existing_translations(source: Dict[str, str], target: Dict[str, str],
+                          kept_hashes: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Выбирает из файла перевода ключи, которые действительно переведены
+
+    Args:
+        source: Строки исходного файла {ключ: строка}
+        target: Строки имеющегося файла перевода {ключ: строка}
+        kept_hashes: Для перевода, записанного программой, - хэши исходных строк
+            ключей, сохраненных из перевода мода (см. manifest.load_kept);
+            None - перевод поставлен с модом и манифеста нет
+
+    Returns:
+        Словарь {ключ: перевод} для ключей, которые есть в обоих файлах и
+        перевод которых отличается от исходной строки (скопированный без
+        перевода английский текст не считается переводом). Если заданы
+        kept_hashes, берутся только перечисленные в них ключи с неизменившейся
+        исходной строкой
+    """
+    result = {}
+    for key, value in source.items():
+        translated = target.get(key)
+        if isinstance(value, str) and isinstance(translated, str) and translated.strip() and translated != value:
+            if kept_hashes is None or kept_hashes.get(key) == hash_value(value):
+                result[key] = translated
+    return result
+
+
+def harvest_pairs(source_text: str, target_text: str, file_format: str,
+                  kept_hashes: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Сопоставляет строки исходного файла и файла перевода по ключам
+
+    Args:
+        source_text: Текст исходного файла
+        target_text: Текст файла перевода
+        file_format: Формат файлов (json, book или lang)
+        kept_hashes: Хэши сохраненных ключей из манифеста перевода
+            (см. existing_translations)
+
+    Returns:
+        Словарь {исходная строка: перевод}
+    """
+    source = read_values(source_text, file_format)
+    translated = existing_translations(source, read_values(target_text, file_format), kept_hashes)
+    return {source[key]: value for key, value in translated.items()}
+
+
+def harvest_jar(jar_path: Path, memory: TranslationMemory, source_lang: str, target_langs: List[str]) -> int:
+    """
+    Заносит в память переводы, которые уже есть в .jar мода
+
+    Args:
+        jar_path: Путь к .jar файлу
+        memory: Память переводов
+        source_lang: Исходный язык
+        target_langs: Целевые языки
+
+    Returns:
+        Количество сохраненных переводов
+    """
+    count = 0
+    try:
+        with zipfile.ZipFile(jar_path, 'r') as zip_ref:
+            names = zip_ref.namelist()
+            existing = set(names)
+            sources = [lang_file for lang_file in discover_jar_lang_files(names)
+                       if lang_file.format in ('json', 'book', 'lang')]
+            for target_lang in target_langs:
+                locale = locale_for(target_lang)
+                for lang_file in sources:
+                    name = target_path(lang_file.path, lang_file.format, locale)
+                    if name not in existing:
+                        continue
+                    kept_hashes = None
+                    if name + MANIFEST_SUFFIX in existing:
+                        kept_hashes = load_kept(zip_ref.read(name + MANIFEST_SUFFIX).decode('utf-8'),
+                                                source_lang, target_lang)
+                    pairs = harvest_pairs(zip_ref.read(lang_file.path).decode('utf-8-sig'),
+                                          zip_ref.read(name).decode('utf-8-sig'), lang_file.format, kept_hashes)
+                    count += memory.put_many(source_lang, target_lang, pairs)
+    except (zipfile.BadZipFile, UnicodeDecodeError, OSError) as e:
+        print(f"\nНе удалось прочитать переводы из {jar_path}: {e}")
+    return count
+
+
+def harvest_folder(mod_path: Path, memory: TranslationMemory, source_lang: str, target_langs: List[str]) -> int:
+    """
+    Заносит в память переводы, которые уже есть в папке мода
+
+    Args:
+        mod_path: Путь к папке мода
+        memory: Память переводов
+        source_lang: Исходный язык
+        target_langs: Целевые языки
+
+    Returns:
+        Количество сохраненных переводов
+    """
+    count = 0
+    sources = [lang_file for lang_file in discover_lang_files(Path(mod_path))
+               if lang_file.format in ('json', 'book', 'lang')]
+    for target_lang in target_langs:
+        locale = locale_for(target_lang)
+        for lang_file in sources:
+            path = Path(target_path(str(lang_file.path), lang_file.format, locale))
+            if not path.is_file():
+                continue
+            manifest_path = path.with_name(path.name + MANIFEST_SUFFIX)
+            try:
+                kept_hashes = None
+                if manifest_path.is_file():
+                    kept_hashes = load_kept(manifest_path.read_text(encoding='utf-8'), source_lang, target_lang)
+                pairs = harvest_pairs(lang_file.path.read_text(encoding='utf-8-sig'),
+                                      path.read_text(encoding='utf-8-sig'), lang_file.format, kept_hashes)
+            except (UnicodeDecodeError, OSError) as e:
+                print(f"\nНе удалось прочитать {path}: {e}")
+                continue
+            count += memory.put_many(source_lang, target_lang, pairs)
+    return count
+
+
+def harvest_mods(jars: List[Path], memory: TranslationMemory, source_lang: str, target_langs: List[str]) -> int:
+    """
+    Заносит в память переводы из всех модов (например, перед переводом модпака)
+
+    Args:
+        jars: Пути к .jar файлам модов
+        memory: Память переводов
+        source_lang: Исходный язык
+        target_langs: Целевые языки
+
+    Returns:
+        Количество сохраненных переводов
+    """
+    count = sum(harvest_jar(jar, memory, source_lang, target_langs) for jar in jars)
+    if count:
+        print(f"Готовых переводов из модов занесено в память: {count}")
+    return count
+
+
+def main():
+    from modpack import find_mod_jars
+    from translator import parse_languages
+
+    parser = argparse.ArgumentParser(description='Занести готовые переводы модов в память переводов')
+    parser.add_argument('path', type=str, help='Папка mods, .jar файл или папка мода')
+    parser.add_argument('--source-lang', type=str, default='en', help='Исходный язык (по умолчанию: en)')
+    parser.add_argument('--target-lang', type=str, nargs='+', default=['ru'],
+                        help='Целевые языки (по умолчанию: ru)')
+    parser.add_argument('--cache', type=str, default=str(DEFAULT_MEMORY_PATH),
+                        help=f'Путь к памяти переводов (по умолчанию: {DEFAULT_MEMORY_PATH})')
+    args = parser.parse_args()
+
+    path = Path(args.path)
+    languages = parse_languages(args.target_lang)
+    memory = TranslationMemory(Path(args.cache))
+    try:
+        if path.is_file():
+            count = harvest_jar(path, memory, args.source_lang, languages)
+        elif any(path.glob('*.jar')):
+            count = harvest_mods(find_mod_jars(path), memory, args.source_lang, languages)
+        else:
+            count = harvest_folder(path, memory, args.source_lang, languages)
+        print(f"Сохранено переводов: {count}, записей в памяти: {len(memory)}")
+    finally:
+        memory.close()
+
+
+if __name__ == '__main__':
+    main()
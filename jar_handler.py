@@ -1,10 +1,44 @@
 """
 Утилита для работы с .jar файлами модов
 """
+import copy
+import io
+import os
+import posixpath
+import struct
 import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
-import tempfile
+from typing import BinaryIO, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from journal import atomic_path, open_journal
+from harvest import read_values
+from lang_discovery import discover_jar_lang_files, target_path
+from manifest import MANIFEST_SUFFIX, dump_manifest, load_kept
+from progress import FILE_DONE, FILES_TOTAL
+from resource_pack import ResourcePackBuilder
+from translator import StreamTarget
+
+
+# Размер фиксированной части локального заголовка записи zip
+_LOCAL_HEADER_SIZE = 30
+# Флаг "размеры и CRC записаны после данных" (data descriptor)
+_FLAG_DATA_DESCRIPTOR = 0x08
+# Идентификатор дополнительного поля zip64
+_ZIP64_EXTRA_ID = 0x0001
+
+# Уровень сжатия по умолчанию (как у zipfile)
+DEFAULT_COMPRESS_LEVEL = 6
+
+# Форматы, которые уже сжаты: повторное сжатие почти ничего не дает
+STORED_EXTENSIONS = {
+    '.png', '.jpg', '.jpeg', '.gif', '.webp',
+    '.ogg', '.mp3',
+    '.zip', '.jar', '.gz', '.xz', '.bz2', '.7z',
+    '.nbt',
+}
 
 
 def extract_jar(jar_path: Path, output_dir: Path) -> Path:
@@ -36,13 +70,52 @@ def extract_jar(jar_path: Path, output_dir: Path) -> Path:
     return extract_path
 
 
-def pack_jar(mod_dir: Path, output_jar: Path) -> Path:
+def _compress_file(file_path: Path, arcname: str, level: int) -> Tuple[zipfile.ZipInfo, bytes]:
+    """
+    Читает и сжимает один файл для записи в .jar
+    
+    Args:
+        file_path: Путь к файлу
+        arcname: Имя записи в архиве
+        level: Уровень сжатия deflate
+        
+    Returns:
+        Описание записи и ее сжатые данные
+    """
+    info = zipfile.ZipInfo.from_file(file_path, arcname)
+    data = file_path.read_bytes()
+    info.file_size = len(data)
+    info.CRC = zlib.crc32(data)
+    
+    # Уже сжатые форматы (картинки, звуки, архивы) повторно не сжимаем
+    if posixpath.splitext(arcname)[1].lower() not in STORED_EXTENSIONS:
+        # zlib отпускает GIL, поэтому потоки сжимают файлы действительно параллельно
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        compressed = compressor.compress(data) + compressor.flush()
+        if len(compressed) < len(data):
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.compress_size = len(compressed)
+            return info, compressed
+    
+    info.compress_type = zipfile.ZIP_STORED
+    info.compress_size = len(data)
+    return info, data
+
+
+def pack_jar(mod_dir: Path, output_jar: Path, workers: Optional[int] = None,
+             level: int = DEFAULT_COMPRESS_LEVEL) -> Path:
     """
     Упаковывает папку мода обратно в .jar файл
     
+    Файлы сжимаются параллельно в нескольких потоках, уже сжатые форматы
+    сохраняются без сжатия. Записи идут в порядке имен, поэтому повторная
+    упаковка той же папки дает побайтно одинаковый .jar.
+    
     Args:
         mod_dir: Путь к папке мода
         output_jar: Путь для сохранения .jar файла
+        workers: Количество потоков сжатия (по умолчанию число ядер)
+        level: Уровень сжатия deflate (0-9)
         
     Returns:
         Путь к созданному .jar файлу
@@ -50,15 +123,32 @@ def pack_jar(mod_dir: Path, output_jar: Path) -> Path:
     if not mod_dir.exists():
         raise FileNotFoundError(f"Папка не найдена: {mod_dir}")
     
-    # Создаем .jar файл
-    with zipfile.ZipFile(output_jar, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for file_path in mod_dir.rglob('*'):
-            if file_path.is_file():
-                arcname = file_path.relative_to(mod_dir)
-                # Убираем файлы подписи, иначе мод может не загрузиться
-                if _is_signature_file(arcname):
-                    continue
-                zipf.write(file_path, arcname)
+    files = []
+    for file_path in mod_dir.rglob('*'):
+        if file_path.is_file():
+            arcname = file_path.relative_to(mod_dir)
+            # Убираем файлы подписи, иначе мод может не загрузиться
+            if _is_signature_file(arcname):
+                continue
+            files.append((arcname.as_posix(), file_path))
+    files.sort()
+    
+    workers = workers or os.cpu_count() or 1
+    # Держим в памяти не больше нескольких сжатых файлов на поток
+    window = workers * 4
+    
+    # Создаем .jar файл (атомарно: недописанный .jar не заменит готовый)
+    with atomic_path(output_jar) as temp_jar, zipfile.ZipFile(temp_jar, 'w', zipfile.ZIP_DEFLATED) as zipf, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: Deque[Future] = deque()
+        for arcname, file_path in files:
+            pending.append(executor.submit(_compress_file, file_path, arcname, level))
+            if len(pending) >= window:
+                info, data = pending.popleft().result()
+                _write_raw_entry(zipf, info, [data])
+        while pending:
+            info, data = pending.popleft().result()
+            _write_raw_entry(zipf, info, [data])
     
     return output_jar
 
@@ -82,40 +172,294 @@ def _is_signature_file(arcname: Path) -> bool:
     return False
 
 
-def translate_jar_mod(jar_path: Path, translator, output_jar: Optional[Path] = None) -> Path:
+def _strip_zip64_extra(extra: bytes) -> bytes:
+    """Удаляет поле zip64 из дополнительных полей записи (zipfile добавит его сам при необходимости)"""
+    result = b''
+    offset = 0
+    while offset + 4 <= len(extra):
+        field_id, size = struct.unpack('<HH', extra[offset:offset + 4])
+        if field_id != _ZIP64_EXTRA_ID:
+            result += extra[offset:offset + 4 + size]
+        offset += 4 + size
+    return result
+
+
+def _write_raw_entry(target: zipfile.ZipFile, entry: zipfile.ZipInfo, chunks: Iterable[bytes]) -> None:
+    """
+    Добавляет в архив запись с уже сжатыми данными
+    
+    Args:
+        target: Архив, открытый на запись
+        entry: Описание записи с заполненными CRC, размерами и методом сжатия
+        chunks: Сжатые данные записи (в сумме ровно entry.compress_size байт)
+    """
+    # Размеры и CRC известны заранее, поэтому пишем их прямо в заголовок
+    entry.flag_bits &= ~_FLAG_DATA_DESCRIPTOR
+    
+    # zipfile не умеет записывать готовые сжатые данные, поэтому запись
+    # добавляется в архив тем же способом, что и в ZipFile.write
+    with target._lock:
+        target.fp.seek(target.start_dir)
+        entry.header_offset = target.fp.tell()
+        target.fp.write(entry.FileHeader())
+        for chunk in chunks:
+            target.fp.write(chunk)
+        target.start_dir = target.fp.tell()
+        target.filelist.append(entry)
+        target.NameToInfo[entry.filename] = entry
+        target._didModify = True
+
+
+def _copy_raw_entry(source: BinaryIO, info: zipfile.ZipInfo, target: zipfile.ZipFile) -> None:
+    """
+    Копирует запись из одного архива в другой без распаковки и повторного сжатия
+    
+    Args:
+        source: Открытый на чтение исходный .jar файл
+        info: Описание записи в исходном архиве
+        target: Архив, открытый на запись
+    """
+    source.seek(info.header_offset)
+    header = source.read(_LOCAL_HEADER_SIZE)
+    name_length, extra_length = struct.unpack('<HH', header[26:30])
+    source.seek(info.header_offset + _LOCAL_HEADER_SIZE + name_length + extra_length)
+    
+    def read_chunks() -> Iterator[bytes]:
+        remaining = info.compress_size
+        while remaining > 0:
+            chunk = source.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                raise zipfile.BadZipFile(f"Обрезанная запись {info.filename}")
+            yield chunk
+            remaining -= len(chunk)
+    
+    entry = copy.copy(info)
+    entry.extra = _strip_zip64_extra(info.extra)
+    _write_raw_entry(target, entry, read_chunks())
+
+
+def _read_previous(previous_jar: Optional[Path], names: List[str]) -> Dict[str, Tuple[str, str]]:
+    """
+    Читает переводы и манифесты из ранее переведенного .jar
+    
+    Args:
+        previous_jar: Путь к ранее переведенному .jar (или None)
+        names: Имена файлов переводов, которые нужно прочитать
+        
+    Returns:
+        Словарь {имя файла перевода: (перевод, манифест)} для найденных файлов
+    """
+    previous: Dict[str, Tuple[str, str]] = {}
+    if previous_jar is None or not previous_jar.exists():
+        return previous
+    
+    try:
+        with zipfile.ZipFile(previous_jar, 'r') as zip_ref:
+            existing = set(zip_ref.namelist())
+            for name in names:
+                if name in existing and name + MANIFEST_SUFFIX in existing:
+                    previous[name] = (
+                        zip_ref.read(name).decode('utf-8-sig'),
+                        zip_ref.read(name + MANIFEST_SUFFIX).decode('utf-8'),
+                    )
+    except (zipfile.BadZipFile, UnicodeDecodeError) as e:
+        print(f"\nНе удалось прочитать предыдущий перевод {previous_jar}: {e}")
+    return previous
+
+
+def translate_jar_mod(jar_path: Path, translator, output_jar: Optional[Path] = None,
+                      previous_jar: Optional[Path] = None,
+                      resource_pack: Optional[ResourcePackBuilder] = None) -> Path:
     """
     Переводит мод прямо из .jar файла
     
+    Читаются только файлы переводов; остальные записи копируются в новый
+    .jar в сжатом виде, без распаковки на диск и повторного сжатия.
+    Полученные переводы сразу пишутся в журнал, а .jar записывается
+    атомарно, поэтому прерванный перевод можно продолжить (translator.resume).
+    Если у переводчика есть хранилище результатов (translator.output_store) и
+    этот .jar уже переводился с теми же параметрами, переводы берутся оттуда.
+    При отмене (translator.cancel_token) выбрасывается TranslationCancelled,
+    прежний результат не меняется, а журнал остается для продолжения.
+    
     Args:
         jar_path: Путь к .jar файлу мода
         translator: Экземпляр MinecraftModTranslator
         output_jar: Путь для сохранения переведенного .jar (если None, создается рядом)
+        previous_jar: Ранее переведенный .jar (или ресурспак) для инкрементального
+            режима (если None, используется выходной файл, если он уже существует)
+        resource_pack: Если указан, переводы добавляются в этот ресурспак,
+            а .jar мода не переписывается
         
     Returns:
-        Путь к переведенному .jar файлу
+        Путь к переведенному .jar файлу (или к ресурспаку)
+        
+    Raises:
+        ValueError: output_jar совпадает с исходным .jar
     """
+    if not jar_path.exists():
+        raise FileNotFoundError(f"Файл не найден: {jar_path}")
     
-    # Создаем временную папку
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_path = Path(temp_dir)
-        
-        # Распаковываем .jar
-        print(f"Распаковка {jar_path.name}...")
-        extracted = extract_jar(jar_path, temp_path)
-        
-        # Переводим мод
-        print("Перевод мода...")
-        translator.translate_mod(str(extracted))
+    # Определяем путь для сохранения
+    if output_jar is None:
+        output_jar = jar_path.parent / f"{jar_path.stem}_ru.jar"
+    if resource_pack is None and Path(output_jar).resolve() == jar_path.resolve():
+        raise ValueError(f"Переведенный мод нельзя сохранить поверх исходного: {output_jar}")
+    
+    translator.reset_stats()
+    
+    # Неизмененный мод: переводы из хранилища результатов. В инкрементальном
+    # режиме результат зависит от предыдущего перевода, поэтому хранилище не используется
+    store = translator.output_store if not translator.incremental else None
+    store_key = None
+    if store is not None:
+        with translator.metrics.phase('store'):
+            store_key = store.key(store.content_hash(jar_path), translator.output_config())
+            stored = store.get(store_key)
+        if stored is not None:
+            print(f"{jar_path.name} уже переводился с теми же параметрами, перевод взят из хранилища результатов")
+            translator.metrics.increment('store_hits')
+            translator.files_processed = sum(
+                not name.endswith(MANIFEST_SUFFIX) for name in stored
+            ) // len(translator.targets)
+            translator.emit(FILES_TOTAL, translator.files_processed)
+            translator.emit(FILE_DONE, translator.files_processed)
+            return _write_translated(jar_path, translator, stored, output_jar, resource_pack)
+    
+    # Журнал лежит рядом с результатом; для ресурспака - отдельный на каждый мод
+    journal_target = output_jar if resource_pack is None else \
+        resource_pack.path.with_name(f"{resource_pack.path.name}.{jar_path.name}")
+    translator.set_journal(open_journal(journal_target, translator.source_lang,
+                                        translator.target_label, translator.resume))
+    finished = False
+    try:
+        translated = _translate_jar_entries(jar_path, translator, output_jar, previous_jar, resource_pack)
+        result = _write_translated(jar_path, translator, translated, output_jar, resource_pack)
+        finished = True
+    finally:
+        complete = finished and translator.failed_count == 0
+        # Ресурспак записывается позже, поэтому его журнал удаляется после записи
+        translator.journal.close(remove=complete and resource_pack is None)
+        if complete and resource_pack is not None:
+            resource_pack.attach_journal(translator.journal.path)
+        translator.set_journal(None)
+    # В хранилище попадает только полный результат: строки с ошибками перевода
+    # или испорченными подстановками при следующем запуске переводятся снова
+    if (store_key is not None and complete
+            and translator.metrics.counters.get('placeholder_failures', 0) == 0):
+        with translator.metrics.phase('store'):
+            store.put(store_key, translated)
+    return result
+
+
+def _translate_jar_entries(jar_path: Path, translator, output_jar: Path, previous_jar: Optional[Path],
+                           resource_pack: Optional[ResourcePackBuilder]) -> Dict[str, bytes]:
+    """
+    Переводит файлы переводов .jar (см. translate_jar_mod)
+    
+    Returns:
+        Переведенные файлы {путь в .jar: содержимое}
+    """
+    metrics = translator.metrics
+    with zipfile.ZipFile(jar_path, 'r') as source_zip:
+        with metrics.phase('discovery'):
+            lang_entries = {
+                lang_file.path: lang_file.format
+                for lang_file in discover_jar_lang_files(source_zip.namelist(), translator.target_locale)
+                if lang_file.format in ('json', 'book', 'lang')
+            }
+        print(f"Найдено {len(lang_entries)} файлов переводов в {jar_path.name}")
+        translator.emit(FILES_TOTAL, len(lang_entries))
         
-        # Определяем путь для сохранения
-        if output_jar is None:
-            output_jar = jar_path.parent / f"{jar_path.stem}_ru.jar"
+        # Имена файлов перевода на каждый целевой язык (в порядке translator.targets)
+        output_names: Dict[str, List[str]] = {
+            name: [target_path(name, file_format, target.target_locale) for target in translator.targets]
+            for name, file_format in lang_entries.items()
+        }
+        # Файлы переводов, которые уже есть в моде
+        shipped = set(source_zip.namelist()) if translator.keep_existing else set()
         
-        # Упаковываем обратно
-        print(f"Упаковка в {output_jar.name}...")
-        pack_jar(extracted, output_jar)
+        # В инкрементальном режиме переводим только изменившиеся строки
+        previous_files: Dict[str, Tuple[str, str]] = {}
+        if translator.incremental:
+            if previous_jar is None:
+                previous_jar = resource_pack.path if resource_pack is not None else output_jar
+            with metrics.phase('jar_unpack'):
+                previous_files = _read_previous(previous_jar, [output_name for names in output_names.values()
+                                                               for output_name in names])
         
-        return output_jar
+        # Переводим файлы переводов
+        translated: Dict[str, bytes] = {}
+        for name, file_format in lang_entries.items():
+            translator.check_cancelled()
+            targets = []
+            for target, output_name in zip(translator.targets, output_names[name]):
+                previous, previous_hashes = target.load_previous(
+                    *previous_files.get(output_name, (None, None)), file_format=file_format
+                )
+                existing, existing_hashes = {}, None
+                if output_name in shipped:
+                    try:
+                        existing = read_values(source_zip.read(output_name).decode('utf-8-sig'), file_format)
+                        # Перевод с манифестом записан программой: из него берутся только
+                        # ключи, сохраненные из перевода мода для той же исходной строки
+                        if output_name + MANIFEST_SUFFIX in shipped:
+                            existing_hashes = load_kept(
+                                source_zip.read(output_name + MANIFEST_SUFFIX).decode('utf-8'),
+                                target.source_lang, target.target_lang
+                            )
+                            existing = {key: value for key, value in existing.items() if key in existing_hashes}
+                    except UnicodeDecodeError as e:
+                        print(f"\nНе удалось прочитать имеющийся перевод {output_name}: {e}")
+                targets.append(StreamTarget(target, io.StringIO(), previous, previous_hashes, output_name,
+                                            existing, existing_hashes))
+            # Запись читается потоком прямо из архива, без распаковки целиком,
+            # и один раз для всех языков
+            try:
+                with source_zip.open(name) as raw, io.TextIOWrapper(raw, encoding='utf-8-sig', newline='') as text:
+                    hashes = translator.translate_stream_targets(
+                        text, targets, desc=f"Перевод {posixpath.basename(name)}", file_format=file_format
+                    )
+            except ValueError as e:
+                print(f"\nОшибка парсинга файла {name}: {e}")
+                translator.emit(FILE_DONE)
+                continue
+            
+            with metrics.phase('write'):
+                for target in targets:
+                    translated[target.file_id] = target.output.getvalue().encode('utf-8')
+                    translated[target.file_id + MANIFEST_SUFFIX] = dump_manifest(
+                        hashes, target.translator.source_lang, target.translator.target_lang, target.kept_keys
+                    ).encode('utf-8')
+            translator.files_processed += 1
+            translator.emit(FILE_DONE)
+    return translated
+
+
+def _write_translated(jar_path: Path, translator, translated: Dict[str, bytes], output_jar: Path,
+                      resource_pack: Optional[ResourcePackBuilder]) -> Path:
+    """Записывает переведенные файлы в новый .jar или ресурспак (см. translate_jar_mod)"""
+    if resource_pack is not None:
+        for name, payload in translated.items():
+            if not resource_pack.add(name, payload):
+                print(f"\nФайл {name} вне assets/ и не может быть в ресурспаке, пропущен")
+        return resource_pack.path
+    
+    # Собираем новый .jar: старые записи копируем как есть, переводы добавляем
+    print(f"Упаковка в {output_jar.name}...")
+    with zipfile.ZipFile(jar_path, 'r') as source_zip, open(jar_path, 'rb') as source:
+        with translator.metrics.phase('jar_pack'), atomic_path(output_jar) as temp_jar, \
+                zipfile.ZipFile(temp_jar, 'w', zipfile.ZIP_DEFLATED) as target:
+            for info in source_zip.infolist():
+                # Убираем файлы подписи, иначе мод может не загрузиться
+                if _is_signature_file(Path(info.filename)) or info.filename in translated:
+                    continue
+                _copy_raw_entry(source, info, target)
+            
+            for name, payload in translated.items():
+                target.writestr(name, payload)
+    
+    return output_jar
 
 
 if __name__ == '__main__':
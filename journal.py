@@ -0,0 +1,193 @@
+"""
+Журнал перевода для продолжения после сбоя и атомарная запись результатов
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Tuple
+
+
+# Суффикс файла журнала рядом с результатом перевода
+JOURNAL_SUFFIX = '.journal'
+
+# Версия формата журнала
+JOURNAL_VERSION = 1
+
+
+def journal_path(target: Path) -> Path:
+    """
+    Возвращает путь к журналу для результата перевода
+
+    Args:
+        target: Выходной .jar, ресурспак или папка
+
+    Returns:
+        Путь к файлу журнала рядом с результатом
+    """
+    target = Path(target)
+    return target.with_name(target.name + JOURNAL_SUFFIX)
+
+
+@contextmanager
+def atomic_path(path: Path):
+    """
+    Дает временный путь рядом с path; после успешного выхода из блока
+    временный файл заменяет path, при ошибке - удаляется. Так наполовину
+    записанный файл никогда не заменит готовый.
+
+    Args:
+        path: Итоговый путь файла
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(path.name + '.tmp')
+    try:
+        yield temp_path
+        os.replace(temp_path, path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """
+    Атомарно записывает текстовый файл (UTF-8)
+
+    Args:
+        path: Путь к файлу
+        text: Содержимое
+    """
+    with atomic_path(path) as temp_path:
+        temp_path.write_text(text, encoding='utf-8')
+
+
+class TranslationJournal:
+    """
+    Журнал с упреждающей записью: каждый полученный перевод сразу дописывается
+    в файл строкой JSON (файл, ключ, хэш исходной строки, перевод).
+
+    Если запуск прервался, при продолжении переводы из журнала берутся без
+    обращения к сети - для ключей, исходная строка которых не изменилась.
+    После успешного завершения журнал удаляется.
+    """
+
+    def __init__(self, path: Path, source_lang: str, target_lang: str, resume: bool = False):
+        """
+        Args:
+            path: Путь к файлу журнала
+            source_lang: Исходный язык
+            target_lang: Целевой язык
+            resume: Загрузить записи существующего журнала (иначе он начинается заново)
+        """
+        self.path = Path(path)
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self._lock = threading.Lock()
+        # {файл: {ключ: (хэш исходной строки, перевод)}}
+        self._entries: Dict[str, Dict[str, Tuple[str, str]]] = {}
+
+        if resume and self.path.exists():
+            self._load()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self._entries:
+            self._file = open(self.path, 'a', encoding='utf-8')
+            # Запись, оборванную при сбое, завершаем переводом строки,
+            # чтобы следующая запись не склеилась с ней
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self._file.write('\n')
+        else:
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self._append({'v': JOURNAL_VERSION, 'source': source_lang, 'target': target_lang})
+            self._file.flush()
+
+    def _load(self) -> None:
+        """Читает записи журнала; оборванная последняя строка пропускается"""
+        with open(self.path, 'r', encoding='utf-8', errors='replace') as f:
+            header = None
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if header is None:
+                    header = record
+                    if (header.get('v') != JOURNAL_VERSION or header.get('source') != self.source_lang
+                            or header.get('target') != self.target_lang):
+                        # Журнал другого формата или другой пары языков не подходит
+                        return
+                    continue
+                try:
+                    self._entries.setdefault(record['f'], {})[record['k']] = (record['h'], record['t'])
+                except (KeyError, TypeError):
+                    continue
+
+    def _append(self, record: Dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def entries(self, file_id: str) -> Dict[str, Tuple[str, str]]:
+        """
+        Возвращает записи журнала для файла переводов
+
+        Args:
+            file_id: Имя файла переводов внутри мода
+
+        Returns:
+            Словарь {ключ: (хэш исходной строки, перевод)}
+        """
+        return dict(self._entries.get(file_id, {}))
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def record(self, file_id: str, translations: Dict[str, Tuple[str, str]]) -> None:
+        """
+        Дописывает переводы в журнал и сразу сбрасывает их на диск
+
+        Args:
+            file_id: Имя файла переводов внутри мода
+            translations: Словарь {ключ: (хэш исходной строки, перевод)}
+        """
+        if not translations:
+            return
+        with self._lock:
+            for key, (source_hash, translated) in translations.items():
+                self._append({'f': file_id, 'k': key, 'h': source_hash, 't': translated})
+                self._entries.setdefault(file_id, {})[key] = (source_hash, translated)
+            self._file.flush()
+
+    def close(self, remove: bool = False) -> None:
+        """
+        Закрывает журнал
+
+        Args:
+            remove: Удалить файл журнала (перевод завершен полностью).
+                Пустой журнал удаляется всегда - продолжать по нему нечего.
+        """
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+        if (remove or not len(self)) and self.path.exists():
+            self.path.unlink()
+
+
+def open_journal(target: Path, source_lang: str, target_lang: str, resume: bool) -> TranslationJournal:
+    """
+    Открывает журнал для результата перевода
+
+    Args:
+        target: Выходной .jar, ресурспак или папка
+        source_lang: Исходный язык
+        target_lang: Целевой язык
+        resume: Продолжить по существующему журналу
+
+    Returns:
+        Журнал перевода
+    """
+    journal = TranslationJournal(journal_path(target), source_lang, target_lang, resume)
+    if resume and len(journal):
+        print(f"Продолжение по журналу {journal.path}: {len(journal)} готовых переводов")
+    return journal
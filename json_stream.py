@@ -0,0 +1,358 @@
+"""
+Потоковое чтение и запись JSON без загрузки всего документа в память
+
+Документ читается порциями и разбирается в последовательность событий
+(начало/конец объекта и массива, ключ, значение). Писатель принимает те же
+события и выводит JSON в том же виде, что json.dump(indent=2, ensure_ascii=False),
+поэтому перевод можно записывать по мере получения, в исходном порядке ключей.
+"""
+import io
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple, Union
+
+
+# События разбора (как у ijson)
+START_MAP = 'start_map'
+END_MAP = 'end_map'
+START_ARRAY = 'start_array'
+END_ARRAY = 'end_array'
+MAP_KEY = 'map_key'
+STRING = 'string'
+# Число хранится исходным текстом, чтобы записать его без изменений
+NUMBER = 'number'
+BOOLEAN = 'boolean'
+NULL = 'null'
+
+Event = Tuple[str, Any]
+# Путь к значению: ключи объектов и индексы массивов от корня
+JsonPath = Tuple[Union[str, int], ...]
+
+# Размер порции чтения по умолчанию
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?')
+_WHITESPACE = ' \t\r\n'
+
+
+class JSONStreamError(ValueError):
+    """Ошибка разбора JSON"""
+
+
+class _Reader:
+    """Буфер над текстовым потоком с чтением порциями"""
+
+    def __init__(self, stream: TextIO, chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        # Смещение начала буфера от начала документа (для сообщений об ошибках)
+        self.offset = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Дочитывает порцию; False если поток закончился"""
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Прочитанную часть буфера отбрасываем, чтобы память не росла
+        self.offset += self.pos
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def error(self, message: str) -> JSONStreamError:
+        return JSONStreamError(f"{message} (символ {self.offset + self.pos})")
+
+    def peek(self) -> str:
+        """Следующий значимый символ (пробелы пропускаются); '' в конце документа"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise self.error(f"Ожидался символ '{char}'")
+        self.pos += 1
+
+    def read_string(self) -> str:
+        """Читает строку в кавычках (текущий символ - открывающая кавычка)"""
+        start = self.pos
+        search = start + 1
+        while True:
+            end = self.buffer.find('"', search)
+            while end != -1:
+                # Кавычка экранирована, если перед ней нечетное число обратных слэшей
+                slashes = 0
+                while self.buffer[end - 1 - slashes] == '\\':
+                    slashes += 1
+                if slashes % 2 == 0:
+                    break
+                end = self.buffer.find('"', end + 1)
+            if end != -1:
+                break
+            search = len(self.buffer)
+            consumed = self.pos
+            if not self._fill():
+                raise self.error("Незакрытая строка")
+            # _fill сдвинул буфер: пересчитываем позиции
+            start -= consumed
+            search -= consumed
+        raw = self.buffer[start:end + 1]
+        self.pos = end + 1
+        try:
+            return json.loads(raw)
+        except ValueError as e:
+            raise self.error(f"Некорректная строка: {e}") from e
+
+    def read_token(self) -> str:
+        """Читает число или литерал (true, false, null)"""
+        start = self.pos
+        while True:
+            end = start
+            while end < len(self.buffer) and self.buffer[end] not in _WHITESPACE + ',]}:':
+                end += 1
+            if end < len(self.buffer) or self.eof:
+                break
+            consumed = self.pos
+            if not self._fill():
+                break
+            start -= consumed
+        token = self.buffer[start:end]
+        self.pos = end
+        return token
+
+
+def iter_events(stream: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Event]:
+    """
+    Разбирает JSON документ из потока в последовательность событий
+
+    Args:
+        stream: Текстовый поток (открытый файл, io.StringIO)
+        chunk_size: Размер порции чтения в символах
+
+    Yields:
+        Пары (событие, значение); значение есть у MAP_KEY, STRING, NUMBER, BOOLEAN
+    """
+    reader = _Reader(stream, chunk_size)
+    # Стек открытых контейнеров: '{' или '['
+    stack: List[str] = []
+    # Сколько элементов уже прочитано в каждом открытом контейнере
+    counts: List[int] = []
+
+    def value() -> Iterator[Event]:
+        char = reader.peek()
+        if char == '{':
+            reader.pos += 1
+            stack.append('{')
+            counts.append(0)
+            yield START_MAP, None
+        elif char == '[':
+            reader.pos += 1
+            stack.append('[')
+            counts.append(0)
+            yield START_ARRAY, None
+        elif char == '"':
+            yield STRING, reader.read_string()
+        elif char == '':
+            raise reader.error("Неожиданный конец документа")
+        else:
+            token = reader.read_token()
+            if token == 'true' or token == 'false':
+                yield BOOLEAN, token == 'true'
+            elif token == 'null':
+                yield NULL, None
+            elif _NUMBER.fullmatch(token):
+                yield NUMBER, token
+            else:
+                raise reader.error(f"Неожиданное значение '{token[:20]}'")
+
+    yield from value()
+    while stack:
+        char = reader.peek()
+        closing = '}' if stack[-1] == '{' else ']'
+        if char == closing:
+            reader.pos += 1
+            stack.pop()
+            counts.pop()
+            yield (END_MAP if closing == '}' else END_ARRAY), None
+            continue
+        if counts[-1]:
+            reader.expect(',')
+        counts[-1] += 1
+        if stack[-1] == '{':
+            if reader.peek() != '"':
+                raise reader.error("Ожидался ключ объекта")
+            yield MAP_KEY, reader.read_string()
+            reader.expect(':')
+        yield from value()
+
+    if reader.peek() != '':
+        raise reader.error("Лишние данные после конца документа")
+
+
+def iter_paths(events: Iterator[Event]) -> Iterator[Tuple[str, Any, JsonPath]]:
+    """
+    Добавляет к событиям путь значения от корня документа
+
+    Args:
+        events: События iter_events
+
+    Yields:
+        Тройки (событие, значение, путь); для MAP_KEY путь - путь значения этого ключа
+    """
+    # Для каждого открытого контейнера: [массив ли это, текущий ключ или индекс]
+    frames: List[List[Any]] = []
+
+    def path() -> JsonPath:
+        return tuple(frame[1] for frame in frames)
+
+    for event, value in events:
+        if event in (END_MAP, END_ARRAY):
+            frames.pop()
+            yield event, value, path()
+            continue
+
+        if event == MAP_KEY:
+            frames[-1][1] = value
+            yield event, value, path()
+            continue
+
+        # Значение внутри массива получает следующий индекс
+        if frames and frames[-1][0]:
+            frames[-1][1] += 1
+        yield event, value, path()
+
+        if event == START_MAP:
+            frames.append([False, None])
+        elif event == START_ARRAY:
+            frames.append([True, -1])
+
+
+def leaf_id(path: JsonPath) -> str:
+    """
+    Идентификатор строкового значения для манифеста и журнала
+
+    Ключи верхнего уровня остаются как есть (совместимо с плоскими lang файлами),
+    вложенные значения записываются как JSON Pointer: /pages/0/text
+
+    Args:
+        path: Путь значения
+
+    Returns:
+        Строковый идентификатор
+    """
+    if len(path) == 1 and isinstance(path[0], str):
+        return path[0]
+    return ''.join('/' + str(part).replace('~', '~0').replace('/', '~1') for part in path)
+
+
+def iter_string_leaves(stream: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[str, str]]:
+    """
+    Перебирает строковые значения документа
+
+    Args:
+        stream: Текстовый поток с JSON
+        chunk_size: Размер порции чтения
+
+    Yields:
+        Пары (идентификатор значения, строка)
+    """
+    for event, value, path in iter_paths(iter_events(stream, chunk_size)):
+        if event == STRING:
+            yield leaf_id(path), value
+
+
+class JsonStreamWriter:
+    """
+    Записывает события iter_events в поток в формате json.dump(indent=2, ensure_ascii=False)
+    """
+
+    def __init__(self, stream: TextIO, indent: int = 2):
+        """
+        Args:
+            stream: Текстовый поток для записи
+            indent: Отступ одного уровня вложенности
+        """
+        self.stream = stream
+        self.indent = indent
+        # Для каждого открытого контейнера: [тип, число элементов]
+        self._stack: List[List[Any]] = []
+
+    @property
+    def depth(self) -> int:
+        """Количество открытых объектов и массивов"""
+        return len(self._stack)
+
+    def _newline(self) -> None:
+        self.stream.write('\n' + ' ' * (self.indent * len(self._stack)))
+
+    def _before_value(self) -> None:
+        """Разделитель перед элементом массива (для объекта его пишет ключ)"""
+        if self._stack and self._stack[-1][0] == START_ARRAY:
+            top = self._stack[-1]
+            if top[1]:
+                self.stream.write(',')
+            self._newline()
+            top[1] += 1
+
+    def write(self, event: str, value: Any = None) -> None:
+        """
+        Записывает одно событие
+
+        Args:
+            event: Событие (START_MAP, MAP_KEY, STRING, ...)
+            value: Значение события
+        """
+        if event == MAP_KEY:
+            top = self._stack[-1]
+            if top[1]:
+                self.stream.write(',')
+            self._newline()
+            top[1] += 1
+            self.stream.write(json.dumps(value, ensure_ascii=False) + ': ')
+        elif event in (START_MAP, START_ARRAY):
+            self._before_value()
+            self.stream.write('{' if event == START_MAP else '[')
+            self._stack.append([event, 0])
+        elif event in (END_MAP, END_ARRAY):
+            _kind, count = self._stack.pop()
+            if count:
+                self._newline()
+            self.stream.write('}' if event == END_MAP else ']')
+        else:
+            self._before_value()
+            if event == STRING:
+                self.stream.write(json.dumps(value, ensure_ascii=False))
+            elif event == NUMBER:
+                self.stream.write(value)
+            elif event == BOOLEAN:
+                self.stream.write('true' if value else 'false')
+            else:
+                self.stream.write('null')
+
+
+def read_leaves(text: Optional[str]) -> Dict[str, str]:
+    """
+    Читает строковые значения документа в словарь {идентификатор: строка}
+
+    Args:
+        text: Текст JSON документа (None или пустая строка - пустой словарь)
+
+    Returns:
+        Словарь строковых значений; пустой, если документ поврежден
+    """
+    if not text:
+        return {}
+    try:
+        return dict(iter_string_leaves(io.StringIO(text)))
+    except ValueError:
+        return {}
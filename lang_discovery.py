@@ -0,0 +1,285 @@
+"""
+Поиск файлов переводов в папке мода или в .jar за один проход
+"""
+import os
+import posixpath
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+# Имена исходных (английских) файлов переводов
+SOURCE_NAMES = ('en_us.json', 'en_US.json', 'en.json', 'en_us.lang', 'en_US.lang')
+
+# Поддерживаемые форматы файлов переводов по расширению
+LANG_FORMATS = {'.json': 'json', '.lang': 'lang'}
+
+# Коды языков Minecraft для языков перевода, у которых код страны не совпадает с кодом языка
+LOCALES = {
+    'uk': 'uk_ua', 'be': 'be_by', 'kk': 'kk_kz', 'en': 'en_us', 'ja': 'ja_jp', 'ko': 'ko_kr',
+    'zh-cn': 'zh_cn', 'zh-tw': 'zh_tw', 'pt': 'pt_br', 'cs': 'cs_cz', 'sv': 'sv_se', 'da': 'da_dk',
+    'el': 'el_gr', 'he': 'he_il', 'hi': 'hi_in', 'vi': 'vi_vn', 'sr': 'sr_sp', 'et': 'et_ee',
+}
+
+
+def locale_for(language: str) -> str:
+    """
+    Возвращает код языка Minecraft (имя файла перевода) для языка перевода
+
+    Args:
+        language: Код языка сервиса перевода (ru, uk, be, zh-CN, ...)
+
+    Returns:
+        Код языка Minecraft в нижнем регистре (ru_ru, uk_ua, be_by, zh_cn, ...)
+    """
+    language = language.lower()
+    return LOCALES.get(language, f"{language}_{language}")
+
+
+# Книги Patchouli: <assets|data>/<мод>/patchouli_books/<книга>/<язык>/.../*.json
+BOOKS_DIR = 'patchouli_books'
+BOOK_SOURCE_LOCALE = 'en_us'
+
+
+@dataclass
+class LangFile:
+    """Найденный исходный файл переводов"""
+
+    # Путь к файлу (Path) или имя записи в .jar (str)
+    path: object
+    # Пространство имен мода (assets/<namespace>/lang), None для старых модов
+    namespace: Optional[str]
+    # Код языка из имени файла, например en_us
+    locale: str
+    # Формат файла: json, lang или book (страница книги Patchouli)
+    format: str
+    # Есть ли рядом уже файл целевого языка
+    has_target: bool
+
+
+class LangIndex:
+    """
+    Индекс папок lang: для каждой папки - имена найденных в ней файлов переводов
+    """
+
+    def __init__(self):
+        self.dirs: Dict[str, List[str]] = {}
+
+    def add(self, directory: str, filename: str) -> None:
+        """
+        Добавляет файл в индекс
+
+        Args:
+            directory: Папка lang (путь или имя папки в .jar)
+            filename: Имя файла внутри папки
+        """
+        if os.path.splitext(filename)[1].lower() in LANG_FORMATS:
+            self.dirs.setdefault(directory, []).append(filename)
+
+    def locales(self, directory: str) -> List[str]:
+        """
+        Возвращает коды языков файлов в папке lang
+
+        Args:
+            directory: Папка lang
+
+        Returns:
+            Коды языков (имена файлов без расширения)
+        """
+        return [os.path.splitext(filename)[0] for filename in self.dirs.get(directory, [])]
+
+    def sources(self, join: Callable[[str, str], object], target_locale: str = 'ru_ru') -> List[LangFile]:
+        """
+        Выбирает исходные файлы переводов
+
+        Исходным считается en_us.json (en_US.json, en.json, en_us.lang,
+        en_US.lang) или единственный .json файл в папке lang.
+
+        Args:
+            join: Функция, собирающая путь к файлу из папки и имени файла
+            target_locale: Код целевого языка (для признака has_target)
+
+        Returns:
+            Список найденных исходных файлов
+        """
+        result = []
+        for directory in sorted(self.dirs):
+            filenames = sorted(self.dirs[directory])
+            json_files = [name for name in filenames if name.lower().endswith('.json')]
+            has_target = target_locale.lower() in (locale.lower() for locale in self.locales(directory))
+            namespace = _namespace(directory)
+            for filename in filenames:
+                if filename in SOURCE_NAMES or (len(json_files) == 1 and filename == json_files[0]):
+                    locale, extension = os.path.splitext(filename)
+                    result.append(LangFile(join(directory, filename), namespace, locale,
+                                           LANG_FORMATS[extension.lower()], has_target))
+        return result
+
+
+def _namespace(directory: str) -> Optional[str]:
+    """Определяет пространство имен по пути assets/<namespace>/lang"""
+    parts = directory.replace('\\', '/').rstrip('/').split('/')
+    if len(parts) >= 3 and parts[-1] == 'lang' and parts[-3] == 'assets':
+        return parts[-2]
+    return None
+
+
+def _book_locale_index(parts: List[str]) -> Optional[int]:
+    """Индекс папки языка в пути файла книги Patchouli (None, если это не книга)"""
+    for index in range(len(parts) - 3):
+        if parts[index] == BOOKS_DIR:
+            return index + 2
+    return None
+
+
+def book_target_path(path: str, target_locale: str = 'ru_ru') -> str:
+    """
+    Возвращает путь перевода страницы книги Patchouli
+
+    Args:
+        path: Путь к исходному файлу или имя записи в .jar
+        target_locale: Код целевого языка
+
+    Returns:
+        Тот же путь с папкой целевого языка вместо исходной (en_us -> ru_ru)
+    """
+    parts = path.replace('\\', '/').split('/')
+    index = _book_locale_index(parts)
+    if index is None:
+        raise ValueError(f"Файл не относится к книге Patchouli: {path}")
+    parts[index] = target_locale
+    return '/'.join(parts)
+
+
+def target_filename(filename: str, target_locale: str = 'ru_ru') -> str:
+    """
+    Возвращает имя файла перевода для исходного lang файла
+
+    Args:
+        filename: Имя исходного файла (например, en_us.json)
+        target_locale: Код целевого языка
+
+    Returns:
+        Имя файла на целевом языке (например, ru_ru.json)
+    """
+    # Старые моды называют .lang файлы en_US.lang - сохраняем это написание
+    if filename.lower().endswith('.lang') and 'en_US' in filename:
+        language, _sep, country = target_locale.partition('_')
+        return filename.replace('en_US', f"{language}_{country.upper()}")
+    # Заменяем en_us на код целевого языка или добавляем его
+    if 'en_us' in filename.lower():
+        return filename.lower().replace('en_us', target_locale)
+    elif 'en.json' in filename.lower():
+        return filename.lower().replace('en.json', f"{target_locale}.json")
+    return f"{target_locale}.json"
+
+
+def target_path(path: str, file_format: str, target_locale: str = 'ru_ru') -> str:
+    """
+    Возвращает путь файла перевода рядом с исходным
+
+    Args:
+        path: Путь к исходному файлу или имя записи в .jar
+        file_format: Формат файла (json, lang или book)
+        target_locale: Код целевого языка
+
+    Returns:
+        Путь файла перевода (для записи в .jar - с разделителями '/')
+    """
+    if file_format == 'book':
+        return book_target_path(path, target_locale)
+    directory, filename = posixpath.split(path.replace('\\', '/'))
+    return posixpath.join(directory, target_filename(filename, target_locale))
+
+
+def _book_file(path: object, name: str, has_dir: Callable[[str], bool], target_locale: str) -> Optional[LangFile]:
+    """
+    Проверяет, является ли файл исходной страницей книги Patchouli
+
+    Args:
+        path: Путь к файлу (Path) или имя записи в .jar
+        name: Путь файла относительно корня мода с разделителями '/'
+        has_dir: Проверяет, есть ли в моде папка (для признака has_target)
+        target_locale: Код целевого языка
+
+    Returns:
+        Описание файла или None
+    """
+    parts = name.split('/')
+    index = _book_locale_index(parts)
+    if (index is None or parts[index].lower() != BOOK_SOURCE_LOCALE
+            or not parts[-1].lower().endswith('.json')):
+        return None
+    books_index = index - 2
+    namespace = parts[books_index - 1] if books_index >= 2 and parts[books_index - 2] in ('assets', 'data') else None
+    return LangFile(path, namespace, parts[index], 'book', has_dir('/'.join(parts[:index] + [target_locale])))
+
+
+def discover_lang_files(mod_path: Path, target_locale: str = 'ru_ru') -> List[LangFile]:
+    """
+    Находит исходные файлы переводов в папке мода за один обход дерева
+
+    Args:
+        mod_path: Путь к папке мода
+        target_locale: Код целевого языка
+
+    Returns:
+        Список найденных файлов (без повторов)
+    """
+    index = LangIndex()
+    books = []
+    seen = set()
+    for dirpath, _dirnames, filenames in os.walk(mod_path):
+        is_lang = os.path.basename(dirpath) == 'lang'
+        relative = Path(dirpath).relative_to(mod_path).as_posix()
+        if not is_lang and BOOKS_DIR not in relative.split('/'):
+            continue
+        # Одна и та же папка не должна попасть в индекс дважды
+        real = os.path.realpath(dirpath)
+        if real in seen:
+            continue
+        seen.add(real)
+        for filename in filenames:
+            if is_lang:
+                index.add(dirpath, filename)
+                continue
+            book = _book_file(Path(dirpath) / filename, f"{relative}/{filename}",
+                              lambda directory: (Path(mod_path) / directory).is_dir(), target_locale)
+            if book is not None:
+                books.append(book)
+
+    books.sort(key=lambda book: book.path)
+    return index.sources(lambda directory, filename: Path(directory) / filename, target_locale) + books
+
+
+def discover_jar_lang_files(names: Iterable[str], target_locale: str = 'ru_ru') -> List[LangFile]:
+    """
+    Находит исходные файлы переводов по списку записей .jar (без распаковки)
+
+    Args:
+        names: Имена записей архива (ZipFile.namelist())
+        target_locale: Код целевого языка
+
+    Returns:
+        Список найденных файлов, path - имя записи в архиве
+    """
+    index = LangIndex()
+    books = []
+    names = list(dict.fromkeys(names))
+    # Папки архива со всеми родительскими (для признака has_target у книг Patchouli)
+    dirs = set()
+    for name in names:
+        directory = posixpath.dirname(name)
+        while directory and directory not in dirs:
+            dirs.add(directory)
+            directory = posixpath.dirname(directory)
+    for name in names:
+        directory, filename = posixpath.split(name)
+        if filename and posixpath.basename(directory) == 'lang':
+            index.add(directory, filename)
+        elif filename and BOOKS_DIR in name:
+            book = _book_file(name, name, dirs.__contains__, target_locale)
+            if book is not None:
+                books.append(book)
+
+    return index.sources(posixpath.join, target_locale) + books
@@ -0,0 +1,110 @@
+"""
+Построчное чтение и запись файлов переводов старого формата (.lang, Minecraft до 1.13)
+
+Формат: строки "ключ=значение", комментарии начинаются с '#'. Если в файле
+есть строка #PARSE_ESCAPES (расширение Forge), в значениях после нее
+разбираются escape-последовательности (\\n, \\t, \\uXXXX). Комментарии, пустые
+строки, порядок ключей и окончания строк сохраняются как есть.
+"""
+import io
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional, TextIO
+
+
+# Директива Forge, включающая разбор escape-последовательностей в значениях
+PARSE_ESCAPES = '#PARSE_ESCAPES'
+
+_ESCAPE = re.compile(r'\\(u[0-9a-fA-F]{4}|.)', re.DOTALL)
+_UNESCAPED = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f'}
+_ESCAPED = {'\\': '\\\\', '\n': '\\n', '\t': '\\t', '\r': '\\r'}
+
+
+@dataclass
+class LangLine:
+    """Строка .lang файла"""
+
+    # Строка как в файле, с окончанием
+    raw: str
+    # Ключ (None для комментариев, пустых и нераспознанных строк)
+    key: Optional[str]
+    # Значение (escape-последовательности уже разобраны, если они включены)
+    value: Optional[str]
+    # Окончание строки ('\n', '\r\n' или '' в конце файла)
+    ending: str
+    # Включен ли разбор escape-последовательностей
+    escapes: bool
+
+    def format(self, value: str) -> str:
+        """
+        Собирает строку файла с новым значением
+
+        Args:
+            value: Новое значение
+
+        Returns:
+            Строка "ключ=значение" с исходным окончанием; если значение
+            не изменилось, исходная строка без изменений
+        """
+        if value == self.value:
+            return self.raw
+        if self.escapes:
+            value = ''.join(_ESCAPED.get(char, char) for char in value)
+        else:
+            # Без escape-последовательностей значение не может занимать несколько строк
+            value = value.replace('\r', ' ').replace('\n', ' ')
+        return f"{self.key}={value}{self.ending}"
+
+
+def _unescape(value: str) -> str:
+    def replace(match: 're.Match') -> str:
+        sequence = match.group(1)
+        if sequence.startswith('u') and len(sequence) == 5:
+            return chr(int(sequence[1:], 16))
+        return _UNESCAPED.get(sequence, sequence)
+
+    return _ESCAPE.sub(replace, value)
+
+
+def iter_lang_lines(stream: TextIO) -> Iterator[LangLine]:
+    """
+    Читает .lang файл построчно
+
+    Поток нужно открыть с newline='', чтобы окончания строк сохранились.
+
+    Args:
+        stream: Текстовый поток
+
+    Yields:
+        Строки файла по порядку
+    """
+    escapes = False
+    for raw in stream:
+        line = raw.rstrip('\r\n')
+        ending = raw[len(line):]
+        if not line or line.startswith('#'):
+            if line.strip() == PARSE_ESCAPES:
+                escapes = True
+            yield LangLine(raw, None, None, ending, escapes)
+            continue
+        key, separator, value = line.partition('=')
+        if not separator:
+            # Строки без '=' игра пропускает, сохраняем их как есть
+            yield LangLine(raw, None, None, ending, escapes)
+            continue
+        yield LangLine(raw, key, _unescape(value) if escapes else value, ending, escapes)
+
+
+def read_lang_values(text: Optional[str]) -> Dict[str, str]:
+    """
+    Читает значения .lang файла в словарь {ключ: значение}
+
+    Args:
+        text: Текст файла (None или пустая строка - пустой словарь)
+
+    Returns:
+        Словарь значений (при повторе ключа - последнее значение, как в игре)
+    """
+    if not text:
+        return {}
+    return {line.key: line.value for line in iter_lang_lines(io.StringIO(text, newline='')) if line.key is not None}
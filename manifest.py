@@ -0,0 +1,118 @@
+"""
+Манифест исходных строк перевода
+
+Записывается рядом с каждым переводом: по нему инкрементальный режим находит
+изменившиеся строки, а сохранение готовых переводов отличает перевод мода от
+собственного результата программы.
+"""
+import hashlib
+import json
+from typing import Dict, Iterable, Optional
+
+
+# Манифест сохраняется рядом с переводом: ru_ru.json -> ru_ru.json.manifest
+MANIFEST_SUFFIX = '.manifest'
+
+MANIFEST_VERSION = 1
+
+
+def hash_value(value: str) -> str:
+    """
+    Вычисляет хэш исходной строки
+
+    Args:
+        value: Исходная строка
+
+    Returns:
+        Короткий хэш строки (16 шестнадцатеричных символов)
+    """
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()[:16]
+
+
+def source_hashes(data: Dict) -> Dict[str, str]:
+    """
+    Вычисляет хэши всех строковых значений исходного файла
+
+    Args:
+        data: Исходный словарь {ключ: значение}
+
+    Returns:
+        Словарь {ключ: хэш исходной строки}
+    """
+    return {key: hash_value(value) for key, value in data.items() if isinstance(value, str)}
+
+
+def dump_manifest(hashes: Dict[str, str], source_lang: str, target_lang: str,
+                  kept: Iterable[str] = ()) -> str:
+    """
+    Сериализует манифест
+
+    Args:
+        hashes: Хэши исходных строк по ключам
+        source_lang: Исходный язык
+        target_lang: Целевой язык
+        kept: Ключи, перевод которых взят из имеющегося перевода мода
+
+    Returns:
+        Текст манифеста (JSON)
+    """
+    return json.dumps({
+        'version': MANIFEST_VERSION,
+        'source_lang': source_lang,
+        'target_lang': target_lang,
+        'hashes': hashes,
+        'kept': sorted(kept),
+    }, ensure_ascii=False, indent=0, sort_keys=True)
+
+
+def load_manifest(text: Optional[str], source_lang: str, target_lang: str) -> Dict[str, str]:
+    """
+    Читает манифест предыдущего перевода
+
+    Args:
+        text: Текст манифеста (None если манифеста нет)
+        source_lang: Ожидаемый исходный язык
+        target_lang: Ожидаемый целевой язык
+
+    Returns:
+        Хэши исходных строк по ключам; пустой словарь, если манифест
+        отсутствует, поврежден или сделан для других языков
+    """
+    hashes = _parse_manifest(text, source_lang, target_lang).get('hashes')
+    return hashes if isinstance(hashes, dict) else {}
+
+
+def load_kept(text: Optional[str], source_lang: str, target_lang: str) -> Dict[str, str]:
+    """
+    Читает из манифеста ключи, перевод которых взят из имеющегося перевода мода
+
+    Args:
+        text: Текст манифеста
+        source_lang: Ожидаемый исходный язык
+        target_lang: Ожидаемый целевой язык
+
+    Returns:
+        Хэши исходных строк, для которых сохранялся перевод, по ключам;
+        пустой словарь, если таких ключей нет или манифест не подходит
+    """
+    manifest = _parse_manifest(text, source_lang, target_lang)
+    hashes, kept = manifest.get('hashes'), manifest.get('kept')
+    if not isinstance(hashes, dict) or not isinstance(kept, list):
+        return {}
+    return {key: hashes[key] for key in kept if isinstance(key, str) and key in hashes}
+
+
+def _parse_manifest(text: Optional[str], source_lang: str, target_lang: str) -> Dict:
+    """Разбирает манифест; пустой словарь, если он отсутствует, поврежден или сделан для других языков"""
+    if not text:
+        return {}
+    try:
+        manifest = json.loads(text)
+    except ValueError:
+        return {}
+    if (not isinstance(manifest, dict)
+            or manifest.get('version') != MANIFEST_VERSION
+            or manifest.get('source_lang') != source_lang
+            or manifest.get('target_lang') != target_lang):
+        return {}
+    return manifest
@@ -0,0 +1,241 @@
+"""
+Метрики запуска перевода: время фаз, счетчики и гистограмма задержек сервиса
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+
+# Фазы перевода в порядке выполнения
+PHASES = ('store', 'discovery', 'jar_unpack', 'parse', 'filter', 'network', 'write', 'jar_pack')
+
+# Счетчики, которые всегда есть в отчете (даже нулевые)
+COUNTERS = ('requests', 'strings_sent', 'bytes_sent', 'cache_hits', 'cache_misses',
+            'template_hits', 'store_hits', 'retries', 'throttles', 'failures',
+            'placeholder_retries', 'placeholder_failures')
+
+# Границы корзин гистограммы задержек запроса в секундах
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Префикс имен метрик в формате Prometheus
+PROMETHEUS_PREFIX = 'mod_translator'
+
+
+class LatencyHistogram:
+    """Накопительная гистограмма задержек (как histogram в Prometheus)"""
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        # counts[i] - число наблюдений не больше buckets[i]; последнее значение - +Inf
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Добавляет наблюдение"""
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Оценивает квантиль по корзинам (верхняя граница корзины)
+
+        Args:
+            q: Квантиль от 0 до 1
+
+        Returns:
+            Оценка в секундах или None, если наблюдений нет
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, count in zip(self.buckets, self.counts):
+            if count >= rank:
+                return bound
+        return float('inf')
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'buckets': {str(bound): count for bound, count in zip(self.buckets, self.counts)},
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+        }
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        """Добавляет гистограмму из to_dict() (например, из другого процесса)"""
+        for index, bound in enumerate(self.buckets):
+            self.counts[index] += data.get('buckets', {}).get(str(bound), 0)
+        self.counts[-1] += data.get('count', 0)
+        self.sum += data.get('sum', 0.0)
+        self.count += data.get('count', 0)
+
+
+class RunMetrics:
+    """
+    Метрики одного запуска. Безопасны для использования из нескольких потоков.
+
+    Время фазы суммируется по всем входам в нее, поэтому фазы, выполняемые
+    для каждого файла (parse, write), показывают общее время по моду.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.phases: Dict[str, float] = {name: 0.0 for name in PHASES}
+        self.counters: Dict[str, int] = {name: 0 for name in COUNTERS}
+        self.latency = LatencyHistogram()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Замеряет время блока и добавляет его к фазе name"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        """Добавляет время к фазе"""
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """Увеличивает счетчик"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe_latency(self, seconds: float) -> None:
+        """Добавляет задержку успешного запроса к сервису перевода"""
+        with self._lock:
+            self.latency.observe(seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Метрики в виде словаря (для JSON и отчета модпака)
+        """
+        with self._lock:
+            return {
+                'wall_seconds': round(time.time() - self.started, 3),
+                'phases': {name: round(seconds, 4) for name, seconds in self.phases.items()},
+                'counters': dict(self.counters),
+                'latency': self.latency.to_dict(),
+            }
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        """
+        Добавляет метрики из to_dict() другого запуска (например, мода из модпака)
+
+        Args:
+            data: Словарь метрик
+        """
+        with self._lock:
+            for name, seconds in data.get('phases', {}).items():
+                self.phases[name] = self.phases.get(name, 0.0) + seconds
+            for name, value in data.get('counters', {}).items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            self.latency.merge(data.get('latency', {}))
+
+
+def write_json(metrics: Dict[str, Any], path: Path) -> None:
+    """
+    Сохраняет метрики в JSON файл
+
+    Args:
+        metrics: Метрики (RunMetrics.to_dict() и статистика перевода)
+        path: Путь к файлу
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(metrics, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+def format_prometheus(metrics: Dict[str, Any], labels: Optional[Dict[str, str]] = None) -> str:
+    """
+    Форматирует метрики в текстовом формате Prometheus
+
+    Args:
+        metrics: Результат RunMetrics.to_dict()
+        labels: Метки, добавляемые ко всем метрикам (например, имя мода)
+
+    Returns:
+        Текст для node_exporter textfile collector
+    """
+    def label_text(extra: Optional[Dict[str, str]] = None) -> str:
+        merged = {**(labels or {}), **(extra or {})}
+        if not merged:
+            return ''
+        inner = ','.join(f'{key}="{_escape(str(value))}"' for key, value in sorted(merged.items()))
+        return '{' + inner + '}'
+
+    prefix = PROMETHEUS_PREFIX
+    lines = [
+        f'# HELP {prefix}_phase_seconds Time spent in each translation phase.',
+        f'# TYPE {prefix}_phase_seconds gauge',
+    ]
+    for name, seconds in metrics.get('phases', {}).items():
+        lines.append(f'{prefix}_phase_seconds{label_text({"phase": name})} {seconds}')
+
+    for name, value in metrics.get('counters', {}).items():
+        lines.append(f'# TYPE {prefix}_{name}_total counter')
+        lines.append(f'{prefix}_{name}_total{label_text()} {value}')
+
+    latency = metrics.get('latency', {})
+    lines.append(f'# HELP {prefix}_request_seconds Latency of successful backend requests.')
+    lines.append(f'# TYPE {prefix}_request_seconds histogram')
+    for bound, count in latency.get('buckets', {}).items():
+        lines.append(f'{prefix}_request_seconds_bucket{label_text({"le": bound})} {count}')
+    lines.append(f'{prefix}_request_seconds_bucket{label_text({"le": "+Inf"})} {latency.get("count", 0)}')
+    lines.append(f'{prefix}_request_seconds_sum{label_text()} {latency.get("sum", 0.0)}')
+    lines.append(f'{prefix}_request_seconds_count{label_text()} {latency.get("count", 0)}')
+
+    lines.append(f'# TYPE {prefix}_wall_seconds gauge')
+    lines.append(f'{prefix}_wall_seconds{label_text()} {metrics.get("wall_seconds", 0)}')
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(metrics: Dict[str, Any], path: Path, labels: Optional[Dict[str, str]] = None) -> None:
+    """
+    Сохраняет метрики в textfile для Prometheus (атомарно, чтобы сборщик
+    не прочитал наполовину записанный файл)
+
+    Args:
+        metrics: Результат RunMetrics.to_dict()
+        path: Путь к файлу (обычно *.prom в папке textfile collector)
+        labels: Метки, добавляемые ко всем метрикам
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(path.name + '.tmp')
+    temp_path.write_text(format_prometheus(metrics, labels), encoding='utf-8')
+    os.replace(temp_path, path)
+
+
+def format_phases(metrics: Dict[str, Any]) -> str:
+    """
+    Краткая строка со временем фаз для лога
+
+    Args:
+        metrics: Результат RunMetrics.to_dict()
+
+    Returns:
+        Строка вида "discovery 0.01 с | network 12.30 с | ..."
+    """
+    return ' | '.join(
+        f"{name} {seconds:.2f} с" for name, seconds in metrics.get('phases', {}).items() if seconds
+    )
+
+
+def _escape(value: str) -> str:
+    """Экранирует значение метки Prometheus"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
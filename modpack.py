@@ -0,0 +1,307 @@
+"""
+Перевод целого модпака (папки mods) в нескольких процессах
+"""
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from metrics import RunMetrics
+from output_store import OutputStore
+from progress import FILE_DONE, FILES_TOTAL, CancelToken, ProgressChannel, TranslationCancelled
+from rate_limiter import SharedTokenBucket
+from resource_pack import DEFAULT_PACK_FORMAT, ResourcePackBuilder
+from translation_memory import TranslationMemory
+
+
+# Имя файла отчета в выходной папке
+REPORT_NAME = 'modpack_report.json'
+
+# Состояние процесса-исполнителя (создается один раз на процесс)
+_worker_translator = None
+_worker_memory: Optional[TranslationMemory] = None
+_worker_store: Optional[OutputStore] = None
+
+
+def find_mod_jars(mods_dir: Path) -> List[Path]:
+    """
+    Находит .jar файлы модов, самые большие - первыми
+
+    Args:
+        mods_dir: Папка mods
+
+    Returns:
+        Список путей к .jar файлам
+    """
+    jars = [
+        path for path in mods_dir.iterdir()
+        if path.is_file() and path.suffix.lower() == '.jar' and not path.stem.endswith('_ru')
+    ]
+    # Большие моды переводятся дольше всех, поэтому запускаем их первыми,
+    # чтобы в конце не ждать один длинный мод
+    jars.sort(key=lambda path: path.stat().st_size, reverse=True)
+    return jars
+
+
+def _init_worker(translator_options: Dict[str, Any], cache_path: Optional[str],
+                 rate_limiter: SharedTokenBucket, store_path: Optional[str] = None,
+                 cancel_token: Optional[CancelToken] = None) -> None:
+    """Создает переводчик процесса-исполнителя"""
+    global _worker_translator, _worker_memory, _worker_store
+    from translator import MinecraftModTranslator
+
+    if cache_path:
+        _worker_memory = TranslationMemory(Path(cache_path))
+    if store_path:
+        _worker_store = OutputStore(Path(store_path))
+    _worker_translator = MinecraftModTranslator(
+        memory=_worker_memory,
+        rate_limiter=rate_limiter,
+        output_store=_worker_store,
+        cancel_token=cancel_token,
+        **translator_options
+    )
+
+
+def _translate_one(jar_path: str, output_jar: str, resource_pack_path: Optional[str]) -> Dict[str, Any]:
+    """
+    Переводит один мод в процессе-исполнителе
+
+    Returns:
+        Запись отчета для мода (в режиме ресурспака - с собранными файлами в 'entries')
+    """
+    return _translate_jar(_worker_translator, _worker_memory, jar_path, output_jar, resource_pack_path)
+
+
+def _translate_jar(translator, memory: Optional[TranslationMemory], jar_path: str, output_jar: str,
+                   resource_pack_path: Optional[str]) -> Dict[str, Any]:
+    """Переводит один мод переводчиком translator (см. _translate_one)"""
+    from jar_handler import translate_jar_mod
+
+    started = time.monotonic()
+    result: Dict[str, Any] = {'jar': jar_path, 'output': None, 'status': 'ok', 'error': None}
+    try:
+        if resource_pack_path:
+            # Ресурспак собирает родительский процесс, здесь только копим файлы
+            resource_pack = ResourcePackBuilder(Path(resource_pack_path))
+            translate_jar_mod(Path(jar_path), translator, resource_pack=resource_pack)
+            result['output'] = resource_pack_path
+            result['entries'] = resource_pack.entries
+            result['journals'] = resource_pack.journals
+        else:
+            translate_jar_mod(Path(jar_path), translator, Path(output_jar))
+            result['output'] = output_jar
+        result['stats'] = translator.stats()
+        if result['stats']['files_processed'] == 0:
+            result['status'] = 'no_lang'
+    except TranslationCancelled:
+        result['status'] = 'cancelled'
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        # Делимся переводами с другими процессами как можно раньше
+        if memory is not None:
+            memory.flush()
+    result['seconds'] = round(time.monotonic() - started, 3)
+    return result
+
+
+def translate_modpack(mods_dir: Path, output_dir: Optional[Path] = None,
+                      translator_options: Optional[Dict[str, Any]] = None,
+                      cache_path: Optional[str] = None, max_rps: float = 0,
+                      processes: Optional[int] = None,
+                      resource_pack_path: Optional[Path] = None,
+                      pack_format: int = DEFAULT_PACK_FORMAT,
+                      translator=None, store_path: Optional[str] = None,
+                      progress: Optional[ProgressChannel] = None,
+                      cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
+    """
+    Переводит все моды из папки mods
+
+    Моды распределяются по процессам, начиная с самых больших. Все процессы
+    используют одну память переводов и общий лимит запросов в секунду.
+    Ошибка в одном моде не останавливает перевод остальных.
+
+    Args:
+        mods_dir: Папка с .jar файлами модов
+        output_dir: Папка для переведенных модов (по умолчанию mods_ru рядом с mods)
+        translator_options: Параметры MinecraftModTranslator (языки, потоки, повторы)
+        cache_path: Путь к памяти переводов (если None, память не используется)
+        max_rps: Общий лимит запросов в секунду на все процессы (0 - без ограничения)
+        processes: Количество процессов (по умолчанию число ядер)
+        resource_pack_path: Если указан, переводы всех модов собираются в этот
+            ресурспак, а .jar модов не переписываются (output_dir не используется)
+        pack_format: Версия формата ресурспака
+        translator: Готовый MinecraftModTranslator (например, фонового сервиса): моды
+            переводятся по очереди в этом процессе, translator_options, cache_path,
+            store_path, max_rps и processes не используются
+        store_path: Путь к хранилищу результатов: неизмененные моды, уже переведенные
+            с теми же параметрами, не переводятся повторно (если None, не используется)
+        progress: Канал событий хода перевода (файл в событиях - мод)
+        cancel_token: Флаг отмены: еще не начатые моды не переводятся, начатые
+            останавливаются перед следующим запросом (статус 'cancelled' в отчете)
+
+    Returns:
+        Отчет: результаты по каждому моду и общая сводка
+
+    Raises:
+        ValueError: Папки модов нет или output_dir совпадает с ней
+    """
+    mods_dir = Path(mods_dir)
+    if not mods_dir.is_dir():
+        raise ValueError(f"Папка модов не существует: {mods_dir}")
+
+    resource_pack = None
+    if resource_pack_path is not None:
+        resource_pack = ResourcePackBuilder(Path(resource_pack_path), pack_format)
+        # Переводы модов, которые в этот раз не переведены (ошибка, отмена),
+        # остаются в ресурспаке от прошлого запуска
+        resource_pack.load()
+        # Отчет сохраняется рядом с ресурспаком
+        output_dir = resource_pack.path.parent
+    elif output_dir is None:
+        output_dir = mods_dir.parent / f"{mods_dir.name}_ru"
+    output_dir = Path(output_dir)
+    if resource_pack is None and output_dir.resolve() == mods_dir.resolve():
+        # Переведенные .jar сохраняются под теми же именами и заменили бы исходные моды
+        raise ValueError(f"Папка для переведенных модов совпадает с папкой модов: {output_dir}")
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    jars = find_mod_jars(mods_dir)
+    print(f"Найдено {len(jars)} модов в {mods_dir}")
+    _harvest(jars, translator_options or {}, cache_path, translator)
+    if progress is not None:
+        progress.emit(FILES_TOTAL, len(jars))
+
+    started = time.monotonic()
+    rate_limiter = SharedTokenBucket(max_rps)
+    processes = processes or os.cpu_count() or 1
+    mods: List[Dict[str, Any]] = []
+
+    resource_pack_name = str(resource_pack.path) if resource_pack is not None else None
+    if translator is not None:
+        # Переводчик уже создан и прогрет: память, соединения и ограничители общие для всех модов
+        for done, jar in enumerate(jars, 1):
+            if cancel_token is not None and cancel_token.cancelled:
+                result = _cancelled(jar)
+            else:
+                result = _translate_jar(translator, translator.memory, str(jar), str(output_dir / jar.name),
+                                        resource_pack_name)
+            mods.append(result)
+            print(f"[{done}/{len(jars)}] {jar.name}: {result['status']}")
+            if progress is not None:
+                progress.emit(FILE_DONE)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(processes, max(1, len(jars))),
+            initializer=_init_worker,
+            initargs=(translator_options or {}, cache_path, rate_limiter, store_path, cancel_token),
+        ) as executor:
+            futures = {
+                executor.submit(_translate_one, str(jar), str(output_dir / jar.name), resource_pack_name): jar
+                for jar in jars
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                jar = futures[future]
+                if cancel_token is not None and cancel_token.cancelled:
+                    # Начатые моды остановятся сами (флаг общий с процессами)
+                    for pending in futures:
+                        pending.cancel()
+                try:
+                    result = _cancelled(jar) if future.cancelled() else future.result()
+                except Exception as e:
+                    # Процесс-исполнитель упал целиком
+                    result = {'jar': str(jar), 'output': None, 'status': 'error',
+                              'error': f"{type(e).__name__}: {e}"}
+                mods.append(result)
+                print(f"[{done}/{len(jars)}] {jar.name}: {result['status']}")
+                if progress is not None:
+                    progress.emit(FILE_DONE)
+
+    # Порядок в отчете не зависит от порядка завершения
+    mods.sort(key=lambda result: Path(result['jar']).name)
+
+    if resource_pack is not None:
+        for result in mods:
+            resource_pack.merge(result.pop('entries', {}))
+            for journal in result.pop('journals', []):
+                resource_pack.attach_journal(journal)
+        resource_pack.write()
+        print(f"Ресурспак сохранен: {resource_pack.path}")
+
+    report = {
+        'mods_dir': str(mods_dir),
+        'output_dir': str(output_dir),
+        'mods': mods,
+        'summary': _summarize(mods, time.monotonic() - started),
+    }
+
+    with open(output_dir / REPORT_NAME, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    return report
+
+
+def _cancelled(jar: Path) -> Dict[str, Any]:
+    """Запись отчета для мода, перевод которого не начинался из-за отмены"""
+    return {'jar': str(jar), 'output': None, 'status': 'cancelled', 'error': None}
+
+
+def _harvest(jars: List[Path], translator_options: Dict[str, Any], cache_path: Optional[str],
+             translator) -> None:
+    """
+    Заносит в память переводы, которые уже есть в модах, до начала перевода,
+    чтобы ими пользовались все процессы
+    """
+    from harvest import harvest_mods
+    from translator import parse_languages
+
+    if translator is not None:
+        if translator.keep_existing and translator.memory is not None:
+            harvest_mods(jars, translator.memory, translator.source_lang,
+                         [target.target_lang for target in translator.targets])
+        return
+    if not cache_path or not translator_options.get('keep_existing', True):
+        return
+    memory = TranslationMemory(Path(cache_path))
+    try:
+        harvest_mods(jars, memory, translator_options.get('source_lang', 'en'),
+                     parse_languages(translator_options.get('target_lang', 'ru')))
+    finally:
+        memory.close()
+
+
+def _summarize(mods: List[Dict[str, Any]], seconds: float) -> Dict[str, Any]:
+    """Собирает общую статистику по всем модам"""
+    summary: Dict[str, Any] = {
+        'mods': len(mods),
+        'ok': 0,
+        'no_lang': 0,
+        'errors': 0,
+        'cancelled': 0,
+        'files_processed': 0,
+        'translated': 0,
+        'skipped': 0,
+        'retries': 0,
+        'throttles': 0,
+        'carried': 0,
+        'resumed': 0,
+        'kept': 0,
+        'seconds': round(seconds, 3),
+    }
+    metrics = RunMetrics()
+    for result in mods:
+        if result['status'] == 'error':
+            summary['errors'] += 1
+        else:
+            summary[result['status']] += 1
+        for key in ('files_processed', 'translated', 'skipped', 'retries', 'throttles', 'carried', 'resumed', 'kept'):
+            summary[key] += result.get('stats', {}).get(key, 0)
+        metrics.merge(result.get('stats', {}).get('metrics', {}))
+    summary['metrics'] = metrics.to_dict()
+    # Время запуска модпака целиком, а не сумма по модам
+    summary['metrics']['wall_seconds'] = summary['seconds']
+    return summary
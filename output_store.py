@@ -0,0 +1,266 @@
+"""
+Хранилище результатов перевода по содержимому .jar
+
+Переведенные файлы мода сохраняются под ключом из хэша содержимого .jar и
+параметров переводчика (языки, сервис перевода, версия правил отбора строк).
+Если тот же .jar уже переводился с теми же параметрами, результат берется из
+хранилища без разбора и перевода. Хэш .jar запоминается вместе с размером и
+временем изменения файла, поэтому неизмененный файл повторно не читается.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+# Путь к хранилищу по умолчанию (рядом с памятью переводов)
+DEFAULT_STORE_PATH = Path.home() / '.mod_translator' / 'output_store'
+
+# Максимальный размер сохраненных результатов по умолчанию (1 ГиБ)
+DEFAULT_MAX_BYTES = 1024 ** 3
+
+# Версия формата хранилища (входит в ключ)
+STORE_VERSION = 1
+
+# Размер блока при вычислении хэша файла
+_HASH_CHUNK = 1024 * 1024
+
+
+def file_sha256(path: Path) -> str:
+    """
+    Вычисляет SHA-256 содержимого файла
+
+    Args:
+        path: Путь к файлу
+
+    Returns:
+        Хэш в шестнадцатеричном виде
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class OutputStore:
+    """
+    Хранилище переведенных файлов модов, ключ - хэш .jar и параметры перевода.
+
+    Каждый результат - отдельный .zip в папке хранилища, индекс (размеры,
+    время использования, хэши файлов) - в SQLite. При превышении лимита размера
+    удаляются давно не использовавшиеся результаты (LRU). Безопасно для
+    нескольких потоков и процессов: файлы результатов записываются атомарно,
+    индекс работает в режиме WAL.
+    """
+
+    def __init__(self, path: Path = DEFAULT_STORE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Открывает (или создает) хранилище
+
+        Args:
+            path: Папка хранилища
+            max_bytes: Максимальный суммарный размер сохраненных результатов
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path / 'index.sqlite3'), timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            ' path TEXT PRIMARY KEY,'
+            ' size INTEGER NOT NULL,'
+            ' mtime_ns INTEGER NOT NULL,'
+            ' sha256 TEXT NOT NULL)'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS outputs ('
+            ' key TEXT PRIMARY KEY,'
+            ' size INTEGER NOT NULL,'
+            ' last_used REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS outputs_last_used ON outputs (last_used)')
+        self._conn.commit()
+
+    def content_hash(self, path: Path) -> str:
+        """
+        Возвращает SHA-256 файла; если размер и время изменения не поменялись
+        с прошлого раза, файл не читается
+
+        Args:
+            path: Путь к файлу
+
+        Returns:
+            Хэш содержимого
+        """
+        path = Path(path).resolve()
+        stat = path.stat()
+        with self._lock:
+            row = self._conn.execute('SELECT size, mtime_ns, sha256 FROM files WHERE path = ?',
+                                     (str(path),)).fetchone()
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+
+        sha256 = file_sha256(path)
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)',
+                               (str(path), stat.st_size, stat.st_mtime_ns, sha256))
+            self._conn.commit()
+        return sha256
+
+    @staticmethod
+    def key(content_hash: str, config: Dict[str, Any]) -> str:
+        """
+        Ключ результата
+
+        Args:
+            content_hash: Хэш содержимого .jar
+            config: Параметры переводчика, от которых зависит результат
+
+        Returns:
+            Ключ (SHA-256 хэша и параметров)
+        """
+        payload = json.dumps({'version': STORE_VERSION, 'content': content_hash, 'config': config},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _blob_path(self, key: str) -> Path:
+        """Путь к файлу результата"""
+        return self.path / key[:2] / f"{key}.zip"
+
+    def contains(self, key: str) -> bool:
+        """
+        Проверяет, есть ли результат, не меняя время использования и счетчики
+        (для оценки объема работы)
+
+        Args:
+            key: Ключ результата (см. key)
+
+        Returns:
+            True если результат сохранен
+        """
+        with self._lock:
+            row = self._conn.execute('SELECT 1 FROM outputs WHERE key = ?', (key,)).fetchone()
+        return row is not None and self._blob_path(key).exists()
+
+    def get(self, key: str) -> Optional[Dict[str, bytes]]:
+        """
+        Ищет сохраненный результат
+
+        Args:
+            key: Ключ результата (см. key)
+
+        Returns:
+            Переведенные файлы {путь в .jar: содержимое} или None, если результата нет
+        """
+        with self._lock:
+            row = self._conn.execute('SELECT size FROM outputs WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        try:
+            with zipfile.ZipFile(self._blob_path(key), 'r') as blob:
+                files = {name: blob.read(name) for name in blob.namelist()}
+        except (OSError, zipfile.BadZipFile):
+            # Файл удален другим процессом при очистке или поврежден
+            with self._lock:
+                self._conn.execute('DELETE FROM outputs WHERE key = ?', (key,))
+                self._conn.commit()
+            self.misses += 1
+            return None
+        with self._lock:
+            self._conn.execute('UPDATE outputs SET last_used = ? WHERE key = ?', (time.time(), key))
+            self._conn.commit()
+        self.hits += 1
+        return files
+
+    def put(self, key: str, files: Dict[str, bytes]) -> None:
+        """
+        Сохраняет результат и применяет лимит размера
+
+        Args:
+            key: Ключ результата (см. key)
+            files: Переведенные файлы {путь в .jar: содержимое}
+        """
+        blob_path = self._blob_path(key)
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        # У каждого процесса свой временный файл, поэтому одновременная запись
+        # одного результата безопасна: один файл просто заменит другой
+        fd, temp_name = tempfile.mkstemp(suffix='.tmp', dir=blob_path.parent)
+        try:
+            with os.fdopen(fd, 'wb') as f, zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as blob:
+                for name, payload in files.items():
+                    blob.writestr(name, payload)
+            size = os.path.getsize(temp_name)
+            os.replace(temp_name, blob_path)
+        finally:
+            if os.path.exists(temp_name):
+                os.unlink(temp_name)
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO outputs (key, size, last_used) VALUES (?, ?, ?)',
+                               (key, size, time.time()))
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Удаляет давно не использовавшиеся результаты сверх лимита (вызывается под блокировкой)"""
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM outputs').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute('SELECT key, size FROM outputs ORDER BY last_used ASC').fetchall():
+            if total <= self.max_bytes:
+                break
+            try:
+                self._blob_path(key).unlink()
+            except FileNotFoundError:
+                pass
+            except OSError:
+                # Файл сейчас читает другой процесс (Windows) - удалим в другой раз
+                continue
+            self._conn.execute('DELETE FROM outputs WHERE key = ?', (key,))
+            total -= size
+
+    def clear(self) -> None:
+        """Удаляет все сохраненные результаты"""
+        with self._lock:
+            for (key,) in self._conn.execute('SELECT key FROM outputs').fetchall():
+                try:
+                    self._blob_path(key).unlink()
+                except OSError:
+                    pass
+            self._conn.execute('DELETE FROM outputs')
+            self._conn.execute('DELETE FROM files')
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Возвращает статистику хранилища
+
+        Returns:
+            Словарь с количеством попаданий, промахов, результатов и их размером
+        """
+        with self._lock:
+            count, size = self._conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM outputs').fetchone()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': count,
+            'bytes': size,
+        }
+
+    def close(self) -> None:
+        """Закрывает индекс хранилища"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,131 @@
+"""
+Защита подстановок и кодов форматирования при машинном переводе
+
+Перед отправкой в сервис перевода подстановки (%s, %1$d, {0}), коды
+форматирования (§a), макросы Patchouli ($(l), $(item)) и переводы строк
+заменяются метками ⟦0⟧, ⟦1⟧, ... После перевода метки заменяются обратно, а
+набор подстановок перевода сверяется с исходной строкой: перевод, в котором
+подстановка потеряна, испорчена или добавлена, в игре не используется.
+
+Метки не содержат разделитель пакетного запроса (перевод строки), поэтому
+строки с переводами строк после замены можно отправлять пакетами.
+"""
+import re
+from collections import Counter
+from typing import List, Optional, Tuple
+
+
+# Скобки меток (редкие символы, которых почти не бывает в тексте модов)
+TOKEN_OPEN = '⟦'
+TOKEN_CLOSE = '⟧'
+
+# Подстановка или код форматирования
+PLACEHOLDER = re.compile(
+    r'%(?:\d+\$)?[-#+0,(]*\d*(?:\.\d+)?[a-zA-Z%]'  # printf: %s, %1$d, %.1f, %%
+    r'|\{\w*\}'                                   # MessageFormat: {0}, {}
+    r'|§[0-9a-fk-orA-FK-OR]'                      # цвет и стиль Minecraft
+    r'|\$\([^()]*\)'                              # макросы Patchouli: $(l), $(item), $()
+    r'|\\n|\n'                                    # перевод строки (экранированный и настоящий)
+)
+
+# Символы, с которых начинается любая подстановка: строки без них (а их
+# большинство) не проверяются полным выражением
+_PLACEHOLDER_START = re.compile(r'[%{§$\\\n]')
+
+# Несколько подстановок подряд заменяются одной меткой
+_PLACEHOLDER_RUN = re.compile(f"(?:{PLACEHOLDER.pattern})+")
+
+# Метка в переводе (сервис может добавить пробелы внутри скобок, а вокруг
+# перевода строки - пробелы, которые после замены не нужны)
+_TOKEN = re.compile(r'[ \t]*' + TOKEN_OPEN + r'\s*(\d+)\s*' + TOKEN_CLOSE + r'[ \t]*')
+
+
+def find_placeholders(text: str) -> List[str]:
+    """
+    Находит подстановки и коды форматирования в строке
+
+    Args:
+        text: Строка
+
+    Returns:
+        Подстановки по порядку
+    """
+    return PLACEHOLDER.findall(text)
+
+
+def mask(text: str) -> Tuple[str, List[str]]:
+    """
+    Заменяет подстановки метками
+
+    Args:
+        text: Исходная строка
+
+    Returns:
+        (строка с метками, замененные фрагменты по номерам меток). Если
+        в строке нет подстановок или в ней уже встречаются скобки меток,
+        строка возвращается без изменений и с пустым списком
+    """
+    if TOKEN_OPEN in text or TOKEN_CLOSE in text or not _PLACEHOLDER_START.search(text):
+        return text, []
+    parts: List[str] = []
+
+    def replace(match: 're.Match') -> str:
+        parts.append(match.group(0))
+        return f"{TOKEN_OPEN}{len(parts) - 1}{TOKEN_CLOSE}"
+
+    return _PLACEHOLDER_RUN.sub(replace, text), parts
+
+
+def unmask(translated: str, parts: List[str]) -> Optional[str]:
+    """
+    Возвращает подстановки на место меток
+
+    Args:
+        translated: Перевод строки с метками
+        parts: Замененные фрагменты (см. mask)
+
+    Returns:
+        Перевод с подстановками или None, если метка потеряна, повторена
+        или появилась лишняя
+    """
+    if not parts:
+        return translated
+    seen = Counter()
+
+    def replace(match: 're.Match') -> str:
+        index = int(match.group(1))
+        if index >= len(parts):
+            return match.group(0)
+        seen[index] += 1
+        part = parts[index]
+        if '\n' in part or '\\n' in part:
+            return part
+        # Пробелы вокруг обычной метки сохраняются как в переводе
+        text = match.group(0)
+        leading = text[:len(text) - len(text.lstrip(' \t'))]
+        trailing = text[len(text.rstrip(' \t')):]
+        return leading + part + trailing
+
+    restored = _TOKEN.sub(replace, translated)
+    if TOKEN_OPEN in restored or TOKEN_CLOSE in restored:
+        return None
+    if any(seen[index] != 1 for index in range(len(parts))):
+        return None
+    return restored
+
+
+def placeholders_match(source: str, translated: str) -> bool:
+    """
+    Проверяет, что в переводе те же подстановки, что и в исходной строке
+
+    Порядок подстановок может отличаться (в другом языке другой порядок
+    слов), но каждая должна встречаться столько же раз.
+
+    Args:
+        source: Исходная строка
+        translated: Перевод
+
+    Returns:
+        True если наборы подстановок совпадают
+    """
+    return Counter(find_placeholders(source)) == Counter(find_placeholders(translated))
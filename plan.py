@@ -0,0 +1,418 @@
+"""
+Оценка объема перевода до запуска (--plan)
+
+Моды разбираются так же, как при переводе, но без перевода: из .jar по
+центральному каталогу читаются только файлы переводов, строки отбираются
+правилами переводчика (should_translate_value, готовые переводы мода),
+повторы убираются, а строки из памяти переводов и моды из хранилища
+результатов не считаются. Для оставшихся строк считаются символы и запросы
+при текущих лимитах пакетов сервиса перевода, а время - по задержке запросов,
+измеренной в последних запусках (см. record_latency).
+
+Оценка сверху: строки одного шаблона (fuzzy) при переводе часто собираются
+без запроса.
+"""
+import functools
+import json
+import struct
+import time
+import zipfile
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from batching import can_batch, pack_batches
+from harvest import existing_translations, read_values
+from journal import atomic_write_text
+from json_stream import JsonPath, leaf_id
+from lang_discovery import BOOKS_DIR, LangFile, discover_jar_lang_files, discover_lang_files, target_path
+from legacy_lang import read_lang_values
+from manifest import MANIFEST_SUFFIX, load_kept
+from placeholders import mask
+from translation_memory import DEFAULT_MEMORY_PATH
+from translator import STREAM_WINDOW
+
+
+# Задержки запросов последних запусков по сервисам перевода
+LATENCY_PATH = DEFAULT_MEMORY_PATH.parent / 'latency.json'
+
+# Сколько последних запусков учитывается в оценке задержки
+LATENCY_HISTORY = 20
+
+# Структуры zip: конец центрального каталога, запись каталога, локальный заголовок
+_END_SIGNATURE = b'PK\x05\x06'
+_END_SIZE = 22
+_MAX_COMMENT = 0xFFFF
+_CENTRAL_SIGNATURE = b'PK\x01\x02'
+# Сигнатура, флаги, метод сжатия, сжатый и исходный размер, длины имени, extra и
+# комментария, смещение локального заголовка
+_CENTRAL_HEADER = struct.Struct('<4s4xHH8xIIHHH8xI')
+_LOCAL_HEADER_SIZE = 30
+_UTF8_FLAG = 0x800
+
+# Части имен записей, по которым отбираются файлы переводов (см. lang_discovery)
+_LANG_MARKERS = (b'lang/', BOOKS_DIR.encode('ascii'))
+
+
+def record_latency(backend: str, metrics: Dict[str, Any], path: Path = LATENCY_PATH) -> None:
+    """
+    Запоминает задержку запросов завершенного запуска для оценки времени
+
+    Args:
+        backend: Имя сервиса перевода
+        metrics: Метрики запуска (RunMetrics.to_dict())
+        path: Файл истории задержек
+    """
+    latency = metrics.get('latency', {})
+    if not latency.get('count'):
+        return
+    history = _read_history(path)
+    runs = history.setdefault(backend, [])
+    runs.append({'time': round(time.time()), 'count': latency['count'], 'sum': latency['sum']})
+    history[backend] = runs[-LATENCY_HISTORY:]
+    try:
+        atomic_write_text(path, json.dumps(history, ensure_ascii=False, indent=2))
+    except OSError as e:
+        print(f"Не удалось сохранить задержки запросов {path}: {e}")
+
+
+def recent_latency(backend: str, path: Path = LATENCY_PATH) -> Optional[float]:
+    """
+    Средняя задержка запроса к сервису за последние запуски
+
+    Args:
+        backend: Имя сервиса перевода
+        path: Файл истории задержек
+
+    Returns:
+        Задержка в секундах или None, если замеров нет
+    """
+    runs = _read_history(path).get(backend, [])
+    count = sum(run['count'] for run in runs)
+    return sum(run['sum'] for run in runs) / count if count else None
+
+
+def _read_history(path: Path) -> Dict[str, List[Dict[str, Any]]]:
+    """Читает историю задержек (пустая, если файла нет или он поврежден)"""
+    try:
+        history = json.loads(Path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    return history if isinstance(history, dict) else {}
+
+
+def _lang_entries(source: BinaryIO) -> Optional[Dict[str, Tuple[int, int, int]]]:
+    """
+    Читает центральный каталог .jar и отбирает записи папок lang и книг Patchouli
+
+    В модах тысячи классов, а нужны только файлы переводов, поэтому имена
+    остальных записей даже не декодируются (zipfile разбирает каждую запись).
+
+    Args:
+        source: Открытый на чтение .jar
+
+    Returns:
+        {имя записи: (смещение локального заголовка, метод сжатия, сжатый размер)}
+        или None, если архив нужно читать через zipfile (ZIP64, шифрование,
+        другой метод сжатия)
+
+    Raises:
+        zipfile.BadZipFile: Файл не является zip архивом
+    """
+    source.seek(0, 2)
+    file_size = source.tell()
+    tail_size = min(file_size, _END_SIZE + _MAX_COMMENT)
+    source.seek(file_size - tail_size)
+    tail = source.read(tail_size)
+    end = tail.rfind(_END_SIGNATURE)
+    if end < 0 or end + _END_SIZE > len(tail):
+        raise zipfile.BadZipFile("File is not a zip file")
+    count, size, offset = struct.unpack('<HII', tail[end + 10:end + 20])
+    if count == 0xFFFF or size == 0xFFFFFFFF or offset == 0xFFFFFFFF:
+        return None
+    source.seek(offset)
+    directory = source.read(size)
+
+    entries: Dict[str, Tuple[int, int, int]] = {}
+    position = 0
+    header_size = _CENTRAL_HEADER.size
+    while position + header_size <= len(directory):
+        (signature, flags, method, compressed, _size, name_length, extra_length, comment_length,
+         header_offset) = _CENTRAL_HEADER.unpack_from(directory, position)
+        if signature != _CENTRAL_SIGNATURE:
+            raise zipfile.BadZipFile("Bad magic number for central directory")
+        start = position + header_size
+        raw_name = directory[start:start + name_length]
+        position = start + name_length + extra_length + comment_length
+        if not any(marker in raw_name for marker in _LANG_MARKERS) or raw_name.endswith(b'/'):
+            continue
+        if flags & 1 or method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED) \
+                or compressed == 0xFFFFFFFF or header_offset == 0xFFFFFFFF:
+            return None
+        name = raw_name.decode('utf-8' if flags & _UTF8_FLAG else 'cp437')
+        entries[name] = (header_offset, method, compressed)
+    return entries
+
+
+def _read_entry(source: BinaryIO, entry: Tuple[int, int, int]) -> bytes:
+    """Читает и распаковывает запись по данным центрального каталога (см. _lang_entries)"""
+    header_offset, method, compressed = entry
+    source.seek(header_offset)
+    header = source.read(_LOCAL_HEADER_SIZE)
+    if len(header) < _LOCAL_HEADER_SIZE:
+        raise zipfile.BadZipFile("Обрезанная запись")
+    name_length, extra_length = struct.unpack('<HH', header[26:30])
+    source.seek(header_offset + _LOCAL_HEADER_SIZE + name_length + extra_length)
+    data = source.read(compressed)
+    return zlib.decompress(data, -15) if method == zipfile.ZIP_DEFLATED else data
+
+
+@contextmanager
+def _jar_reader(jar_path: Path) -> Iterator[Tuple[List[str], Callable[[str], Optional[str]]]]:
+    """
+    Открывает .jar для чтения файлов переводов
+
+    Yields:
+        (имена записей папок lang и книг, функция чтения записи как текста;
+        None, если записи нет)
+    """
+    with open(jar_path, 'rb') as source:
+        entries = _lang_entries(source)
+        if entries is not None:
+            def read(name: str) -> Optional[str]:
+                entry = entries.get(name)
+                return None if entry is None else _read_entry(source, entry).decode('utf-8-sig')
+
+            yield list(entries), read
+            return
+
+    with zipfile.ZipFile(jar_path, 'r') as zip_ref:
+        names = set(zip_ref.namelist())
+
+        def read(name: str) -> Optional[str]:
+            return zip_ref.read(name).decode('utf-8-sig') if name in names else None
+
+        yield zip_ref.namelist(), read
+
+
+def _json_strings(node: Any, path: JsonPath = ()) -> Iterator[Tuple[JsonPath, str]]:
+    """Перебирает строковые значения разобранного JSON с путями от корня"""
+    if isinstance(node, str):
+        yield path, node
+    elif isinstance(node, dict):
+        for key, value in node.items():
+            yield from _json_strings(value, path + (key,))
+    elif isinstance(node, list):
+        for index, value in enumerate(node):
+            yield from _json_strings(value, path + (index,))
+
+
+def _file_leaves(translator, text: str, file_format: str) -> Dict[str, str]:
+    """
+    Переводимые строки файла {ключ: строка}, как их выбирает переводчик
+
+    Raises:
+        ValueError: Документ не является корректным JSON
+    """
+    if file_format == 'lang':
+        return read_lang_values(text)
+    # Для оценки достаточно json.loads: он быстрее потокового разбора
+    data = json.loads(text)
+    if file_format == 'json':
+        # В lang файле переводятся строковые значения верхнего уровня (см. is_translatable_leaf)
+        return {key: value for key, value in data.items() if isinstance(value, str)} \
+            if isinstance(data, dict) else {}
+    return {leaf_id(path): value for path, value in _json_strings(data)
+            if translator.is_translatable_leaf(path, value, file_format)}
+
+
+def _plan_files(translator, lang_files: List[LangFile], read: Callable[[str], Optional[str]],
+                mod: Dict[str, Any], should_translate: Callable[[str], bool], in_place: bool = False) -> None:
+    """
+    Разбирает файлы переводов мода и раскладывает строки к переводу по окнам
+
+    Args:
+        translator: MinecraftModTranslator
+        lang_files: Исходные файлы переводов
+        read: Читает файл мода по имени (None, если файла нет)
+        mod: Оценка мода, заполняется на месте
+        should_translate: Проверка строки (should_translate_value)
+        in_place: Перевод записывается на место имеющегося (папка мода): файл
+            без манифеста тогда считается прежним результатом и не учитывается
+    """
+    for lang_file in lang_files:
+        name = str(lang_file.path)
+        try:
+            leaves = _file_leaves(translator, read(name) or '', lang_file.format)
+        except (ValueError, UnicodeDecodeError) as e:
+            mod['errors'].append(f"{name}: {e}")
+            continue
+        mod['files'] += 1
+        # Правила отбора строк у всех языков одни, поэтому проверяем один раз
+        translatable = {key for key, value in leaves.items() if should_translate(value)}
+        mod['strings'] += len(translatable)
+        keys = list(leaves)
+        for target in translator.targets:
+            kept: Dict[str, str] = {}
+            if target.keep_existing:
+                existing_name = target_path(name, lang_file.format, target.target_locale)
+                try:
+                    existing = read(existing_name)
+                    manifest = read(existing_name + MANIFEST_SUFFIX) if existing else None
+                except UnicodeDecodeError as e:
+                    mod['errors'].append(f"{existing_name}: {e}")
+                    existing = None
+                # Те же правила, что при переводе (MinecraftModTranslator._read_existing)
+                if existing and manifest is not None:
+                    kept = existing_translations(leaves, read_values(existing, lang_file.format),
+                                                 load_kept(manifest, target.source_lang, target.target_lang))
+                elif existing and not in_place:
+                    kept = existing_translations(leaves, read_values(existing, lang_file.format))
+            # Файл переводится окнами по STREAM_WINDOW строк, строки окна - одним набором
+            windows = mod['windows'].setdefault(target.target_lang, [])
+            for start in range(0, len(keys), STREAM_WINDOW):
+                window = dict.fromkeys(
+                    leaves[key] for key in keys[start:start + STREAM_WINDOW]
+                    if key in translatable and key not in kept
+                )
+                if window:
+                    windows.append(list(window))
+
+
+def plan_mod(mod_path: Path, translator,
+             should_translate: Optional[Callable[[str], bool]] = None) -> Dict[str, Any]:
+    """
+    Оценивает один мод (.jar или папку)
+
+    Args:
+        mod_path: Путь к .jar или папке мода
+        translator: MinecraftModTranslator с параметрами будущего перевода
+        should_translate: Проверка строки (по умолчанию translator.should_translate_value)
+
+    Returns:
+        Словарь: name, stored (перевод возьмется из хранилища результатов),
+        files, strings (строк для перевода в файлах), errors и windows -
+        строки к переводу по окнам для каждого языка {язык: [[строка, ...], ...]}
+    """
+    mod_path = Path(mod_path)
+    should_translate = should_translate or translator.should_translate_value
+    mod: Dict[str, Any] = {'name': mod_path.name, 'stored': False, 'files': 0, 'strings': 0,
+                           'errors': [], 'windows': {}}
+    formats = ('json', 'book', 'lang')
+    if mod_path.is_file() and mod_path.suffix.lower() == '.jar':
+        store = translator.output_store if not translator.incremental else None
+        try:
+            if store is not None and store.contains(store.key(store.content_hash(mod_path),
+                                                              translator.output_config())):
+                mod['stored'] = True
+                return mod
+            with _jar_reader(mod_path) as (names, read):
+                lang_files = [lang_file for lang_file in discover_jar_lang_files(names, translator.target_locale)
+                              if lang_file.format in formats]
+                _plan_files(translator, lang_files, read, mod, should_translate)
+        except (zipfile.BadZipFile, zlib.error, OSError) as e:
+            mod['errors'].append(str(e))
+    elif mod_path.is_dir():
+        lang_files = [lang_file for lang_file in discover_lang_files(mod_path, translator.target_locale)
+                      if lang_file.format in formats]
+
+        def read(name: str) -> Optional[str]:
+            path = Path(name)
+            return path.read_text(encoding='utf-8-sig') if path.is_file() else None
+
+        _plan_files(translator, lang_files, read, mod, should_translate, in_place=True)
+    else:
+        mod['errors'].append(f"Не найден мод: {mod_path}")
+    return mod
+
+
+def make_plan(mod_paths: List[Path], translator, latency_path: Path = LATENCY_PATH) -> Dict[str, Any]:
+    """
+    Оценивает объем перевода модов без обращения к сервису перевода
+
+    Моды учитываются по порядку, как при переводе: строка, которая
+    переводится в одном моде, в следующих модах берется из памяти.
+
+    Args:
+        mod_paths: Пути к .jar или папкам модов
+        translator: MinecraftModTranslator с параметрами будущего перевода
+        latency_path: Файл истории задержек запросов
+
+    Returns:
+        Словарь: mods (оценка каждого мода), languages (по каждому языку:
+        unique - уникальных строк, in_memory - из них в памяти, to_send - строк
+        к отправке, chars - символов, requests - запросов), requests, chars,
+        latency (средняя задержка запроса или None), seconds (оценка времени
+        или None) и scan_seconds (время оценки)
+    """
+    started = time.monotonic()
+    # Одни и те же строки встречаются во многих модах, проверяем каждую один раз
+    should_translate = functools.lru_cache(maxsize=None)(translator.should_translate_value)
+    mods = [plan_mod(Path(path), translator, should_translate) for path in mod_paths]
+
+    languages: Dict[str, Dict[str, int]] = {}
+    for target in translator.targets:
+        windows = [window for mod in mods for window in mod['windows'].get(target.target_lang, [])]
+        unique = {text for window in windows for text in window}
+        known: Set[str] = set()
+        if target.memory is not None:
+            known = target.memory.known(target.source_lang, target.target_lang, unique)
+        backend = target.backend
+        delimiter = backend.batch_delimiter
+        seen = set(known)
+        to_send = chars = requests = 0
+        for window in windows:
+            pending = [text for text in window if text not in seen]
+            seen.update(pending)
+            # В сервис уходят строки с метками вместо подстановок (см. placeholders)
+            masked = list(dict.fromkeys(mask(text)[0] for text in pending))
+            packable = [text for text in masked if can_batch(text, delimiter)]
+            requests += len(pack_batches(packable, backend.max_batch_chars, backend.max_batch_items, delimiter))
+            requests += len(masked) - len(packable)
+            to_send += len(masked)
+            chars += sum(len(text) for text in masked)
+        languages[target.target_lang] = {'unique': len(unique), 'in_memory': len(known),
+                                         'to_send': to_send, 'chars': chars, 'requests': requests}
+
+    requests = sum(counts['requests'] for counts in languages.values())
+    latency = recent_latency(translator.backend.name, latency_path)
+    seconds = None
+    if latency is not None:
+        # Запросы всех языков идут через общие ограничения числа потоков и частоты
+        seconds = requests * latency / translator.workers
+        if translator.rate_limiter.rate > 0:
+            seconds = max(seconds, requests / translator.rate_limiter.rate)
+    return {
+        'mods': [{key: value for key, value in mod.items() if key != 'windows'} for mod in mods],
+        'languages': languages,
+        'requests': requests,
+        'chars': sum(counts['chars'] for counts in languages.values()),
+        'latency': latency,
+        'seconds': seconds,
+        'scan_seconds': time.monotonic() - started,
+    }
+
+
+def print_plan(plan: Dict[str, Any]) -> None:
+    """Выводит оценку объема перевода"""
+    mods = plan['mods']
+    print("\n" + "="*50)
+    print("Оценка перевода (без запросов к сервису):")
+    print(f"  Модов: {len(mods)} (перевод из хранилища результатов: {sum(mod['stored'] for mod in mods)}, "
+          f"без файлов переводов: {sum(1 for mod in mods if not (mod['stored'] or mod['files'] or mod['errors']))})")
+    print(f"  Файлов переводов: {sum(mod['files'] for mod in mods)}, "
+          f"строк для перевода: {sum(mod['strings'] for mod in mods)}")
+    for language, counts in plan['languages'].items():
+        print(f"  {language}: уникальных строк {counts['unique']}, из них в памяти {counts['in_memory']}; "
+              f"к отправке {counts['to_send']} строк, {counts['chars']} символов, {counts['requests']} запросов")
+    if plan['seconds'] is None:
+        print("  Время: нет замеров задержки сервиса (появятся после первого перевода)")
+    else:
+        minutes, seconds = divmod(int(round(plan['seconds'])), 60)
+        print(f"  Время: ~{minutes}:{seconds:02d} (средняя задержка запроса {plan['latency']:.2f} с)")
+    for mod in mods:
+        for error in mod['errors']:
+            print(f"  Ошибка чтения {mod['name']}: {error}")
+    print(f"  Оценка заняла {plan['scan_seconds']:.2f} с")
+    print("="*50)
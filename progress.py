@@ -0,0 +1,207 @@
+"""
+Ход перевода для интерфейса: события прогресса и отмена
+
+Переводчик отправляет события (найдено файлов, файл готов, строки готовы,
+попадания в память) в ProgressChannel из любых потоков, а интерфейс забирает
+их пачкой по таймеру и сводит в ProgressTracker. Отмена - CancelToken:
+переводчик проверяет его перед каждым запросом и каждым файлом.
+"""
+import multiprocessing
+import queue
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Tuple
+
+
+# Виды событий
+FILES_TOTAL = 'files_total'
+FILE_DONE = 'file_done'
+STRINGS_TOTAL = 'strings_total'
+STRINGS_DONE = 'strings_done'
+CACHE_HITS = 'cache_hits'
+CACHE_MISSES = 'cache_misses'
+
+# За сколько последних секунд считать скорость перевода
+RATE_WINDOW = 10.0
+
+
+class TranslationCancelled(Exception):
+    """Перевод остановлен пользователем"""
+
+
+class CancelToken:
+    """
+    Флаг отмены перевода.
+
+    Основан на multiprocessing.Event, поэтому его видят и процессы модпака
+    (передается им при создании, через initargs у ProcessPoolExecutor).
+    """
+
+    def __init__(self):
+        self._event = multiprocessing.Event()
+
+    def cancel(self) -> None:
+        """Просит остановить перевод"""
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Запрошена ли отмена"""
+        return self._event.is_set()
+
+    def check(self) -> None:
+        """
+        Raises:
+            TranslationCancelled: Если запрошена отмена
+        """
+        if self._event.is_set():
+            raise TranslationCancelled("Перевод остановлен")
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Ждет seconds секунд, но просыпается сразу при отмене
+
+        Raises:
+            TranslationCancelled: Если запрошена отмена
+        """
+        self._event.wait(seconds)
+        self.check()
+
+
+@dataclass
+class ProgressEvent:
+    """Событие хода перевода"""
+
+    kind: str
+    count: int
+    time: float
+
+
+class ProgressChannel:
+    """Очередь событий прогресса (безопасна для нескольких потоков)"""
+
+    def __init__(self):
+        self._queue: 'queue.SimpleQueue[ProgressEvent]' = queue.SimpleQueue()
+
+    def emit(self, kind: str, count: int = 1) -> None:
+        """
+        Добавляет событие
+
+        Args:
+            kind: Вид события (FILES_TOTAL, FILE_DONE, ...)
+            count: Количество (файлов, строк)
+        """
+        if count:
+            self._queue.put(ProgressEvent(kind, count, time.monotonic()))
+
+    def drain(self, limit: int = 10000) -> List[ProgressEvent]:
+        """
+        Забирает накопившиеся события
+
+        Args:
+            limit: Максимум событий за раз
+
+        Returns:
+            События в порядке поступления
+        """
+        events = []
+        while len(events) < limit:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+
+class ProgressTracker:
+    """Сводка хода перевода по событиям: готовые файлы и строки, скорость, оставшееся время"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.files_total = 0
+        self.files_done = 0
+        self.strings_total = 0
+        self.strings_done = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Готовые строки за последние RATE_WINDOW секунд: (время, количество)
+        self._recent: Deque[Tuple[float, int]] = deque()
+
+    def update(self, events: List[ProgressEvent]) -> None:
+        """Учитывает события"""
+        for event in events:
+            if event.kind == FILES_TOTAL:
+                self.files_total += event.count
+            elif event.kind == FILE_DONE:
+                self.files_done += event.count
+            elif event.kind == STRINGS_TOTAL:
+                self.strings_total += event.count
+            elif event.kind == STRINGS_DONE:
+                self.strings_done += event.count
+                self._recent.append((event.time, event.count))
+            elif event.kind == CACHE_HITS:
+                self.cache_hits += event.count
+            elif event.kind == CACHE_MISSES:
+                self.cache_misses += event.count
+
+    def rate(self, now: Optional[float] = None) -> float:
+        """Скорость перевода за последние RATE_WINDOW секунд (строк в секунду)"""
+        now = time.monotonic() if now is None else now
+        while self._recent and self._recent[0][0] < now - RATE_WINDOW:
+            self._recent.popleft()
+        window = min(RATE_WINDOW, now - self.started)
+        if not self._recent or window <= 0:
+            return 0.0
+        return sum(count for _time, count in self._recent) / window
+
+    def hit_rate(self) -> Optional[float]:
+        """Доля строк, найденных в памяти переводов (None, пока обращений не было)"""
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else None
+
+    def eta(self, now: Optional[float] = None) -> Optional[float]:
+        """
+        Оценка оставшегося времени в секундах
+
+        Returns:
+            Большая из оценок по оставшимся строкам (при текущей скорости) и по
+            оставшимся файлам (при среднем времени на файл) или None, если
+            оценить пока нельзя
+        """
+        now = time.monotonic() if now is None else now
+        estimates = []
+        rate = self.rate(now)
+        if rate > 0 and self.strings_total > self.strings_done:
+            estimates.append((self.strings_total - self.strings_done) / rate)
+        if self.files_done and self.files_total > self.files_done:
+            per_file = (now - self.started) / self.files_done
+            estimates.append(per_file * (self.files_total - self.files_done))
+        return max(estimates) if estimates else None
+
+    def fraction(self) -> float:
+        """Доля выполненной работы (0..1) для индикатора"""
+        if self.files_total:
+            done = self.files_done
+            if self.strings_total and self.files_done < self.files_total:
+                # Текущий файл засчитывается частично
+                done += min(1.0, self.strings_done / self.strings_total)
+            return min(1.0, done / self.files_total)
+        if self.strings_total:
+            return min(1.0, self.strings_done / self.strings_total)
+        return 0.0
+
+    def summary(self) -> str:
+        """Строка состояния для интерфейса"""
+        now = time.monotonic()
+        parts = [f"Файлов: {self.files_done}/{self.files_total}",
+                 f"Строк: {min(self.strings_done, self.strings_total)}/{self.strings_total}",
+                 f"{self.rate(now):.1f} строк/с"]
+        hit_rate = self.hit_rate()
+        if hit_rate is not None:
+            parts.append(f"из памяти {hit_rate:.0%}")
+        eta = self.eta(now)
+        if eta is not None:
+            minutes, seconds = divmod(int(eta), 60)
+            parts.append(f"осталось ~{minutes}:{seconds:02d}")
+        return " | ".join(parts)
@@ -0,0 +1,195 @@
+"""
+Ограничение частоты запросов к сервису перевода
+"""
+import multiprocessing
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты запросов "ведро с токенами".
+
+    Один экземпляр разделяется всеми потоками переводчика, поэтому общий поток
+    запросов всех файлов мода не превышает заданную частоту.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            rate: Допустимое число запросов в секунду (0 - без ограничения)
+            capacity: Размер ведра, т.е. допустимый всплеск запросов
+                (по умолчанию равен rate, но не меньше 1)
+            clock: Источник времени в секундах
+            sleep: Функция ожидания
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        """Пополняет ведро с момента последнего обращения"""
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """
+        Блокирует поток, пока не появятся свободные токены
+
+        Args:
+            tokens: Количество токенов (запросов)
+        """
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """
+    Вычисляет паузу перед повтором запроса (экспоненциальный рост со случайным разбросом)
+
+    Args:
+        attempt: Номер повтора, начиная с 0
+        base: Пауза первого повтора в секундах
+        cap: Максимальная пауза в секундах
+
+    Returns:
+        Пауза в секундах
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class AdaptiveConcurrency:
+    """
+    Управление числом одновременных запросов по схеме AIMD.
+
+    Пока ответы приходят без ошибок, лимит растет примерно на 1 за каждые
+    `limit` успешных ответов; при ограничении частоты или таймауте лимит
+    уменьшается в `decrease_factor` раз, но не чаще одного раза за среднее
+    время ответа, чтобы пачка одновременных ошибок одной волны запросов не
+    сбросила лимит до минимума.
+    """
+
+    OK = 'ok'
+    CONGESTED = 'congested'
+    ERROR = 'error'
+
+    def __init__(self, max_limit: int, min_limit: int = 1, initial: Optional[float] = None,
+                 decrease_factor: float = 0.5, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_limit: Максимальное число одновременных запросов
+            min_limit: Минимальное число одновременных запросов
+            initial: Начальный лимит (по умолчанию половина максимума)
+            decrease_factor: Во сколько раз уменьшать лимит при перегрузке
+            clock: Источник времени в секундах
+        """
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        if initial is None:
+            initial = max(self.min_limit, self.max_limit / 2)
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial)))
+        self.peak_limit = self.limit
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self._clock = clock
+        self._rtt = 0.0
+        # Первое уменьшение не зависит от того, с какого значения начинается clock
+        self._last_decrease = float('-inf')
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        """Ждет, пока число запросов в работе не станет меньше лимита"""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, outcome: str = OK, latency: float = 0.0) -> None:
+        """
+        Освобождает место запроса и корректирует лимит
+
+        Args:
+            outcome: Результат запроса: OK, CONGESTED (перегрузка) или ERROR
+                (ошибка, не связанная с нагрузкой; лимит не меняется)
+            latency: Время выполнения запроса в секундах
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if outcome == self.OK:
+                self._rtt = latency if not self._rtt else 0.8 * self._rtt + 0.2 * latency
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                self.peak_limit = max(self.peak_limit, self.limit)
+            elif outcome == self.CONGESTED:
+                now = self._clock()
+                if now - self._last_decrease >= self._rtt:
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self._last_decrease = now
+            self._cond.notify_all()
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Ведро с токенами, общее для нескольких процессов.
+
+    Состояние хранится в разделяемой памяти multiprocessing, поэтому объект
+    нужно передать дочерним процессам при их создании (например, через
+    initargs у ProcessPoolExecutor).
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.time, sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            rate: Допустимое число запросов в секунду на все процессы (0 - без ограничения)
+            capacity: Размер ведра (по умолчанию равен rate, но не меньше 1)
+            clock: Источник времени в секундах, общий для всех процессов
+            sleep: Функция ожидания
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = multiprocessing.Lock()
+        self._shared_tokens = multiprocessing.Value('d', self.capacity, lock=False)
+        self._shared_updated = multiprocessing.Value('d', clock(), lock=False)
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """
+        Блокирует поток, пока не появятся свободные токены
+
+        Args:
+            tokens: Количество токенов (запросов)
+        """
+        # По умолчанию время берется из time.time(), так как оно общее для всех процессов
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self._lock:
+                now = self._clock()
+                elapsed = max(0.0, now - self._shared_updated.value)
+                available = min(self.capacity, self._shared_tokens.value + elapsed * self.rate)
+                self._shared_updated.value = now
+                if available >= tokens:
+                    self._shared_tokens.value = available - tokens
+                    return
+                self._shared_tokens.value = available
+                wait = (tokens - available) / self.rate
+            self._sleep(wait)
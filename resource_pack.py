@@ -0,0 +1,162 @@
+"""
+Сборка переводов всех модов в один ресурспак
+"""
+import json
+import os
+import threading
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Set
+
+from manifest import MANIFEST_SUFFIX
+
+
+# pack_format ресурспаков для Minecraft 1.20.1
+DEFAULT_PACK_FORMAT = 15
+
+DEFAULT_DESCRIPTION = 'Машинный перевод модов'
+
+
+class ResourcePackBuilder:
+    """
+    Собирает файлы assets/<namespace>/lang/* из всех модов в один .zip
+    ресурспак с pack.mcmeta. Моды при этом только читаются.
+    """
+
+    def __init__(self, path: Path, pack_format: int = DEFAULT_PACK_FORMAT,
+                 description: str = DEFAULT_DESCRIPTION):
+        """
+        Args:
+            path: Путь к .zip файлу ресурспака
+            pack_format: Версия формата ресурспака (зависит от версии Minecraft)
+            description: Описание ресурспака в игре
+        """
+        self.path = Path(path)
+        self.pack_format = pack_format
+        self.description = description
+        self.entries: Dict[str, bytes] = {}
+        # Файлы, добавленные в этом запуске (а не прочитанные из старого ресурспака)
+        self._fresh: Set[str] = set()
+        # Журналы переводов, которые больше не нужны после записи ресурспака
+        self.journals: List[str] = []
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """
+        Читает файлы существующего ресурспака, чтобы перевод одного мода
+        не удалил из него переводы остальных модов
+        """
+        if not self.path.exists():
+            return
+        try:
+            with zipfile.ZipFile(self.path) as zip_ref:
+                for name in zip_ref.namelist():
+                    if name.startswith('assets/') and not name.endswith('/'):
+                        self.entries[name] = zip_ref.read(name)
+        except zipfile.BadZipFile as e:
+            print(f"\nНе удалось прочитать ресурспак {self.path}: {e}")
+
+    def add(self, name: str, payload: bytes) -> bool:
+        """
+        Добавляет файл перевода в ресурспак
+
+        Если такой файл уже добавлен в этом запуске (несколько модов с одним
+        пространством имен), ключи объединяются; файл из старого ресурспака
+        заменяется целиком.
+
+        Args:
+            name: Имя файла внутри ресурспака (assets/<namespace>/lang/...)
+            payload: Содержимое файла
+
+        Returns:
+            True если файл добавлен, False если он не может быть в ресурспаке
+        """
+        if not name.startswith('assets/'):
+            return False
+        with self._lock:
+            if name in self._fresh:
+                payload = _merge(name, self.entries[name], payload)
+            self.entries[name] = payload
+            self._fresh.add(name)
+        return True
+
+    def merge(self, entries: Dict[str, bytes]) -> None:
+        """
+        Добавляет файлы, собранные другим экземпляром (например, в другом процессе)
+
+        Args:
+            entries: Словарь {имя файла: содержимое}
+        """
+        for name, payload in entries.items():
+            self.add(name, payload)
+
+    def attach_journal(self, path: Path) -> None:
+        """
+        Запоминает журнал перевода мода, чтобы удалить его после записи ресурспака
+
+        Args:
+            path: Путь к журналу
+        """
+        with self._lock:
+            self.journals.append(str(path))
+
+    def write(self) -> Path:
+        """
+        Записывает ресурспак на диск (атомарно: сначала во временный файл)
+
+        Returns:
+            Путь к ресурспаку
+        """
+        mcmeta = {'pack': {'pack_format': self.pack_format, 'description': self.description}}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+
+        with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr(_entry_info('pack.mcmeta'), json.dumps(mcmeta, ensure_ascii=False, indent=2))
+            with self._lock:
+                for name in sorted(self.entries):
+                    zipf.writestr(_entry_info(name), self.entries[name])
+
+        os.replace(temp_path, self.path)
+
+        # Переводы сохранены в ресурспаке, журналы больше не нужны
+        for journal in self.journals:
+            if os.path.exists(journal):
+                os.remove(journal)
+        self.journals.clear()
+        return self.path
+
+
+def _entry_info(name: str) -> zipfile.ZipInfo:
+    """Описание записи с фиксированной датой, чтобы одинаковые переводы давали одинаковый .zip"""
+    info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.external_attr = 0o644 << 16
+    return info
+
+
+def _merge(name: str, existing: bytes, new: bytes) -> bytes:
+    """Объединяет два файла переводов с одинаковым именем; при ошибке берется новый"""
+    if name.endswith('.lang'):
+        # В .lang при повторе ключа игра берет последнее значение
+        return existing.rstrip(b'\r\n') + b'\n' + new
+    try:
+        old_data = json.loads(existing.decode('utf-8'))
+        new_data = json.loads(new.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        return new
+    if not isinstance(old_data, dict) or not isinstance(new_data, dict):
+        return new
+
+    if name.endswith(MANIFEST_SUFFIX):
+        merged = dict(new_data)
+        new_hashes = new_data.get('hashes', {})
+        merged['hashes'] = {**old_data.get('hashes', {}), **new_hashes}
+        # Сохраненные ключи другого мода остаются, ключи нового перевода берутся из него
+        merged['kept'] = sorted({key for key in old_data.get('kept', []) if key not in new_hashes}
+                                | set(new_data.get('kept', [])))
+        return json.dumps(merged, ensure_ascii=False, indent=0, sort_keys=True).encode('utf-8')
+
+    merged = {**old_data, **new_data}
+    return json.dumps(merged, ensure_ascii=False, indent=2).encode('utf-8')
+
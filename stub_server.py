@@ -0,0 +1,155 @@
+"""
+Локальный сервер-заглушка сервиса перевода для проверки и замеров без сети
+
+Отвечает по тому же API, что ожидает бэкенд http, и переводит строки
+псевдопереводом. Задержка и доля ошибок настраиваются, поэтому на нем можно
+проверять пакетирование, повторы и подбор числа потоков.
+
+Запуск:
+    py stub_server.py --port 8765 --latency 0.2 --error-rate 0.05
+    py translator.py МОД --backend http --backend-url http://127.0.0.1:8765
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from backends import PseudoBackend
+
+
+class StubTranslationServer(ThreadingHTTPServer):
+    """HTTP сервер псевдоперевода с искусственной задержкой и ошибками"""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.0, error_rate: float = 0.0,
+                 max_items: int = 100, max_chars: int = 5000, max_inflight: int = 0,
+                 dictionary_path: Optional[str] = None, seed: Optional[int] = None):
+        """
+        Args:
+            address: Адрес (host, port)
+            latency: Задержка ответа в секундах
+            error_rate: Доля запросов, на которые сервер отвечает 429
+            max_items: Максимум строк в одном запросе
+            max_chars: Максимум символов в одном запросе
+            max_inflight: Сколько запросов обрабатывается одновременно,
+                лишние получают 429 (0 - без ограничения)
+            dictionary_path: JSON словарь готовых переводов для псевдоперевода
+            seed: Зерно генератора ошибок (для воспроизводимых замеров)
+        """
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.max_items = max_items
+        self.max_chars = max_chars
+        self.max_inflight = max_inflight
+        self.backend = PseudoBackend('auto', 'auto', dictionary_path=dictionary_path)
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.inflight = 0
+        self.requests = 0
+        self.strings = 0
+
+    @property
+    def url(self) -> str:
+        """Адрес сервера для --backend-url"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Обработчик запросов заглушки"""
+
+    server: StubTranslationServer
+
+    def log_message(self, format, *args):
+        # Журнал каждого запроса только мешает при замерах
+        pass
+
+    def _reply(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        if self.path == '/capabilities':
+            self._reply(200, {'max_items': server.max_items, 'max_chars': server.max_chars})
+        elif self.path == '/stats':
+            self._reply(200, {'requests': server.requests, 'strings': server.strings})
+        else:
+            self._reply(404, {'error': 'not found'})
+
+    def do_POST(self):
+        server = self.server
+        if self.path != '/translate':
+            self._reply(404, {'error': 'not found'})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            texts = json.loads(self.rfile.read(length).decode('utf-8'))['q']
+        except (ValueError, KeyError, UnicodeDecodeError):
+            self._reply(400, {'error': 'bad request'})
+            return
+        if len(texts) > server.max_items or sum(len(text) for text in texts) > server.max_chars:
+            self._reply(413, {'error': 'request too large'})
+            return
+
+        with server.lock:
+            server.requests += 1
+            throttled = server.random.random() < server.error_rate
+            if server.max_inflight and server.inflight >= server.max_inflight:
+                throttled = True
+            if not throttled:
+                server.inflight += 1
+        if throttled:
+            self._reply(429, {'error': 'too many requests'})
+            return
+
+        try:
+            time.sleep(server.latency)
+            translations = server.backend.translate_batch(texts)
+        finally:
+            with server.lock:
+                server.inflight -= 1
+                server.strings += len(texts)
+        self._reply(200, {'translations': translations})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сервер-заглушка перевода для проверки без сети')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Адрес (по умолчанию: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Порт (по умолчанию: 8765)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Задержка ответа в секундах')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Доля ответов 429 (от 0 до 1)')
+    parser.add_argument('--max-items', type=int, default=100, help='Максимум строк в запросе')
+    parser.add_argument('--max-chars', type=int, default=5000, help='Максимум символов в запросе')
+    parser.add_argument('--max-inflight', type=int, default=0,
+                        help='Одновременных запросов до ответа 429 (0 - без ограничения)')
+    parser.add_argument('--dictionary', type=str, default=None, help='JSON словарь готовых переводов')
+    parser.add_argument('--seed', type=int, default=None, help='Зерно генератора ошибок')
+    args = parser.parse_args()
+
+    server = StubTranslationServer(
+        (args.host, args.port), latency=args.latency, error_rate=args.error_rate,
+        max_items=args.max_items, max_chars=args.max_chars, max_inflight=args.max_inflight,
+        dictionary_path=args.dictionary, seed=args.seed
+    )
+    print(f"Сервер-заглушка перевода запущен: {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
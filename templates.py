@@ -0,0 +1,158 @@
+"""
+Шаблоны строк для нечеткой памяти переводов
+
+Строки, которые отличаются только числом, подстановкой (%s, {0}), цветовым
+кодом или словом из известного словаря (материал, порода дерева, цвет),
+приводятся к одному шаблону: "Tier 1 Upgrade" и "Tier 8 Upgrade" -> "Tier # Upgrade".
+Достаточно перевести одну строку семейства, остальные собираются из ее
+перевода заменой отличающихся частей - если эту замену можно проверить.
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+# Виды мест для подстановки в шаблоне (символы из области для частного
+# использования Unicode, чтобы не совпасть с текстом строки)
+SLOT_NUMBER = '\ue000'
+SLOT_FORMAT = '\ue001'
+SLOT_WORD = '\ue002'
+
+# Слова, которые часто различают строки одного семейства (Minecraft и популярные моды).
+# Составные слова идут раньше своих частей, чтобы "Light Blue" не стало "Light" + цвет.
+VOCABULARY = (
+    'dark oak', 'light blue', 'light gray', 'light grey',
+    'oak', 'spruce', 'birch', 'jungle', 'acacia', 'mangrove', 'cherry', 'crimson', 'warped', 'bamboo',
+    'white', 'orange', 'magenta', 'yellow', 'lime', 'pink', 'gray', 'grey', 'cyan', 'purple',
+    'blue', 'brown', 'green', 'red', 'black',
+    'wooden', 'stone', 'iron', 'golden', 'gold', 'diamond', 'netherite', 'copper', 'leather',
+    'emerald', 'lapis', 'redstone', 'quartz', 'obsidian', 'tin', 'lead', 'silver', 'bronze',
+    'steel', 'nickel', 'aluminum', 'zinc', 'brass', 'osmium', 'uranium', 'platinum',
+)
+
+_SLOT = re.compile(
+    r'(?P<format>%(?:\d+\$)?[-#+ 0,(]*\d*(?:\.\d+)?[a-zA-Z%]|\{\d*\}|§[0-9a-fk-orA-FK-OR])'
+    r'|(?P<number>(?<![\w.])\d+(?:\.\d+)?(?![\w.]))'
+    r'|(?P<word>\b(?:' + '|'.join(re.escape(word).replace(r'\ ', r'\s') for word in VOCABULARY) + r')\b)',
+    re.IGNORECASE
+)
+
+# Шаблон должен содержать хотя бы столько букв вне мест подстановки,
+# иначе вся строка - это одно слово или число, и собирать ее не из чего
+_MIN_TEMPLATE_LETTERS = 3
+
+
+@dataclass
+class Template:
+    """Строка, разобранная на шаблон и значения мест подстановки"""
+
+    # Шаблон: текст строки, в котором места подстановки заменены на SLOT_*
+    key: str
+    # Места подстановки по порядку: (вид, значение в строке)
+    slots: List[Tuple[str, str]]
+
+    def words(self) -> List[str]:
+        """Слова из словаря в этой строке"""
+        return [value for kind, value in self.slots if kind == SLOT_WORD]
+
+
+def make_template(text: str) -> Optional[Template]:
+    """
+    Приводит строку к шаблону
+
+    Args:
+        text: Исходная строка
+
+    Returns:
+        Шаблон или None, если в строке нет мест подстановки или кроме них
+        в ней почти нет текста
+    """
+    slots: List[Tuple[str, str]] = []
+
+    def replace(match: 're.Match') -> str:
+        kind = SLOT_FORMAT if match.group('format') else SLOT_NUMBER if match.group('number') else SLOT_WORD
+        slots.append((kind, match.group(0)))
+        return kind
+
+    key = _SLOT.sub(replace, text.strip())
+    if not slots or sum(char.isalpha() for char in key) < _MIN_TEMPLATE_LETTERS:
+        return None
+    return Template(key, slots)
+
+
+def _find_once(text: str, value: str, kind: str) -> Optional[re.Match]:
+    """
+    Находит значение места подстановки в переводе
+
+    Returns:
+        Вхождение или None, если вхождений не ровно одно
+    """
+    if kind == SLOT_WORD:
+        pattern = re.compile(r'(?<!\w)' + re.escape(value) + r'(?!\w)', re.IGNORECASE)
+    elif kind == SLOT_NUMBER:
+        pattern = re.compile(r'(?<![\d.])' + re.escape(value) + r'(?![\d.])')
+    else:
+        # Подстановки и цветовые коды стоят вплотную к тексту: ищем как есть
+        pattern = re.compile(re.escape(value))
+    matches = list(pattern.finditer(text))
+    return matches[0] if len(matches) == 1 else None
+
+
+def _match_case(value: str, example: str) -> str:
+    """Приводит регистр первой буквы value к регистру example"""
+    if value and example[:1].isupper():
+        return value[:1].upper() + value[1:]
+    if value and example[:1].islower():
+        return value[:1].lower() + value[1:]
+    return value
+
+
+def rebuild_translation(source: Template, translation: str, target: Template,
+                        terms: Dict[str, str]) -> Optional[str]:
+    """
+    Собирает перевод строки из перевода другой строки того же шаблона
+
+    Каждое отличающееся место подстановки должно ровно один раз встречаться
+    в переводе образца (число и подстановка - как есть, слово из словаря - в
+    виде своего перевода). Если это не так (например, слово склоняется и его
+    перевод не найден отдельным словом), собрать перевод нельзя.
+
+    Args:
+        source: Шаблон строки-образца
+        translation: Перевод строки-образца
+        target: Шаблон строки, перевод которой нужен (тот же key)
+        terms: Переводы слов из словаря {слово в нижнем регистре: перевод}
+
+    Returns:
+        Перевод строки или None, если его нельзя надежно собрать
+    """
+    if source.key != target.key or len(source.slots) != len(target.slots):
+        return None
+
+    replacements = []
+    for (kind, old), (_kind, new) in zip(source.slots, target.slots):
+        if old == new:
+            continue
+        if kind == SLOT_WORD:
+            old_text = terms.get(old.lower())
+            new_text = terms.get(new.lower())
+            if not old_text or not new_text:
+                return None
+        else:
+            old_text, new_text = old, new
+        match = _find_once(translation, old_text, kind)
+        if match is None:
+            return None
+        if kind == SLOT_WORD:
+            new_text = _match_case(new_text, match.group(0))
+        replacements.append((match.start(), match.end(), new_text))
+
+    # Замены не должны пересекаться (одно и то же место для двух значений)
+    replacements.sort()
+    for (_start, end, _text), (next_start, _end, _next) in zip(replacements, replacements[1:]):
+        if next_start < end:
+            return None
+
+    for start, end, text in reversed(replacements):
+        translation = translation[:start] + text + translation[end:]
+    return translation
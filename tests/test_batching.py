@@ -0,0 +1,145 @@
+"""
+Пакетные запросы к сервису перевода (batching.py)
+
+Запуск:
+    py -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backends import PseudoBackend  # noqa: E402
+from batching import BatchFailed, can_batch, pack_batches, translate_packed  # noqa: E402
+from translator import MinecraftModTranslator  # noqa: E402
+
+
+TEXTS = [f"Item number {index}" for index in range(64)]
+
+
+class LimitedBackend(PseudoBackend):
+    """Псевдоперевод, который отклоняет пакеты больше limit строк и запоминает запросы"""
+
+    max_batch_items = 100
+
+    def __init__(self, source_lang: str, target_lang: str, limit: int = 0, error: Exception = None):
+        super().__init__(source_lang, target_lang)
+        self.limit = limit
+        self.error = error
+        self.calls = []
+
+    def translate_batch(self, texts):
+        self.calls.append(list(texts))
+        if self.error is not None:
+            raise self.error
+        if self.limit and len(texts) > self.limit:
+            raise RuntimeError('413 Request Entity Too Large')
+        return super().translate_batch(texts)
+
+
+class FakeSender:
+    """send_batch для translate_packed с заданным ответом на каждый пакет"""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = []
+
+    def __call__(self, batch):
+        self.calls.append(list(batch))
+        return self.answer(batch)
+
+
+def batch_size(batch, delimiter='\n'):
+    return sum(len(text) for text in batch) + len(delimiter) * (len(batch) - 1)
+
+
+def test_pack_batches_respects_char_and_item_budget():
+    texts = [f"{'x' * (index % 7 + 1)}{index}" for index in range(50)]
+    batches = pack_batches(texts, max_chars=30, max_items=4)
+    assert sorted(text for batch in batches for text in batch) == sorted(texts)
+    assert all(len(batch) <= 4 for batch in batches)
+    assert all(batch_size(batch) <= 30 for batch in batches)
+
+
+def test_pack_batches_fills_batches_close_to_limit():
+    # First Fit Decreasing укладывает 10+10+10 и 20+5+5 в два полных пакета
+    texts = ['a' * 5, 'b' * 10, 'c' * 20, 'd' * 10, 'e' * 5, 'f' * 10]
+    batches = pack_batches(texts, max_chars=30, max_items=10, delimiter=None)
+    assert len(batches) == 2
+    assert sorted(batch_size(batch, '') for batch in batches) == [30, 30]
+
+
+def test_pack_batches_counts_delimiter():
+    assert pack_batches(['aaaa', 'bbbb'], max_chars=8, max_items=10) == [['aaaa'], ['bbbb']]
+    assert pack_batches(['aaaa', 'bbbb'], max_chars=9, max_items=10) == [['aaaa', 'bbbb']]
+
+
+def test_string_over_budget_gets_own_batch():
+    long_text = 'x' * 100
+    batches = pack_batches(['short', long_text, 'tiny'], max_chars=20, max_items=10)
+    assert [long_text] in batches
+    assert sorted(text for batch in batches for text in batch) == sorted(['short', long_text, 'tiny'])
+
+
+def test_can_batch_rejects_delimiter_inside_text():
+    assert can_batch('one line')
+    assert not can_batch('two\nlines')
+    # Сервис, принимающий список строк, берет любые строки
+    assert can_batch('two\nlines', None)
+
+
+def test_translate_packed_sends_whole_batch_once():
+    sender = FakeSender(lambda batch: [text.upper() for text in batch])
+    assert translate_packed(['a', 'b', 'c'], sender) == {'a': 'A', 'b': 'B', 'c': 'C'}
+    assert sender.calls == [['a', 'b', 'c']]
+
+
+@pytest.mark.parametrize('answer', [
+    lambda batch: None if len(batch) > 1 else [batch[0].upper()],
+    lambda batch: [text.upper() for text in batch][:1],
+    lambda batch: [text.upper() if len(batch) == 1 else ' ' for text in batch],
+], ids=['rejected', 'wrong_count', 'empty_parts'])
+def test_translate_packed_splits_bad_batch_down_to_single_strings(answer):
+    sender = FakeSender(answer)
+    assert translate_packed(['a', 'b', 'c', 'd'], sender) == {'a': 'A', 'b': 'B', 'c': 'C', 'd': 'D'}
+    assert sender.calls == [['a', 'b', 'c', 'd'], ['a', 'b'], ['a'], ['b'], ['c', 'd'], ['c'], ['d']]
+
+
+def test_translate_packed_gives_up_on_batch_failed():
+    def answer(batch):
+        raise BatchFailed('service unavailable')
+
+    sender = FakeSender(answer)
+    assert translate_packed(['a', 'b', 'c', 'd'], sender) == dict.fromkeys(['a', 'b', 'c', 'd'])
+    assert len(sender.calls) == 1
+
+
+def test_payload_error_splits_batch_until_accepted():
+    backend = LimitedBackend('en', 'ru', limit=8)
+    translator = MinecraftModTranslator(backend=backend, max_retries=0, fuzzy=False)
+
+    results = translator.translate_many(TEXTS)
+
+    assert results == {text: backend.translate_one(text) for text in TEXTS}
+    # 64 -> 2x32 -> 4x16 -> 8x8: 1 + 2 + 4 + 8 запросов
+    assert len(backend.calls) == 15
+    accepted = [call for call in backend.calls if len(call) <= 8]
+    assert len(accepted) == 8
+    assert sorted(text for call in accepted for text in call) == sorted(TEXTS)
+
+
+@pytest.mark.parametrize('error', [
+    ConnectionError('connection refused'),
+    RuntimeError('500 Internal Server Error'),
+], ids=['outage', 'server_error'])
+def test_other_errors_do_not_split_batch(error):
+    backend = LimitedBackend('en', 'ru', error=error)
+    translator = MinecraftModTranslator(backend=backend, max_retries=0, fuzzy=False)
+
+    results = translator.translate_many(TEXTS)
+
+    assert results == dict.fromkeys(TEXTS)
+    assert len(backend.calls) == 1
+    assert translator.metrics.counters.get('failures') == 1
@@ -0,0 +1,122 @@
+"""
+Потоковое чтение и запись JSON (json_stream.py)
+
+Запуск:
+    py -m pytest tests
+"""
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from json_stream import (  # noqa: E402
+    MAP_KEY, STRING, JSONStreamError, JsonStreamWriter, iter_events, leaf_id, read_leaves,
+)
+
+
+# Размеры порций: 1 символ разрезает каждый токен, экранирование и суррогатную пару
+CHUNK_SIZES = [1, 2, 3, 5, 7, 64, 64 * 1024]
+
+ESCAPES = {
+    'quote': 'He said "hi"',
+    'backslash': 'C:\\mods\\new',
+    'slash_before_quote': 'ends with \\',
+    'control': 'line\nbreak\ttab\r\u0001',
+    'unicode': 'caf\u00e9 \u041f\u0440\u0438\u0432\u0435\u0442',
+    'surrogate': 'emoji \U0001F600 and \U0001D11E',
+}
+
+PATCHOULI = {
+    'name': 'Guide Book',
+    'pages': [
+        {'type': 'patchouli:text', 'text': 'Hello $(br) world'},
+        {'type': 'patchouli:spotlight', 'item': 'minecraft:stone', 'text': 'Stone', 'link_recipe': True},
+        [['nested', ['deeper']], []],
+    ],
+    'extra': {'flags': [True, False, None], 'count': 3, 'ratio': 0.5, 'big': -12e3},
+    'empty_map': {},
+    'empty_list': [],
+}
+
+
+def round_trip(text: str, chunk_size: int) -> str:
+    output = io.StringIO()
+    writer = JsonStreamWriter(output)
+    for event, value in iter_events(io.StringIO(text), chunk_size):
+        writer.write(event, value)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+@pytest.mark.parametrize('document', [ESCAPES, PATCHOULI], ids=['escapes', 'patchouli'])
+def test_round_trip_matches_json_dumps(document, chunk_size):
+    expected = json.dumps(document, indent=2, ensure_ascii=False)
+    # Исходный документ - в другом оформлении и с \\u-экранированием
+    source = json.dumps(document, ensure_ascii=True)
+    assert round_trip(source, chunk_size) == expected
+    assert round_trip(expected, chunk_size) == expected
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_escaped_strings_decode_like_json_loads(chunk_size):
+    source = json.dumps(ESCAPES)
+    strings = [value for event, value in iter_events(io.StringIO(source), chunk_size) if event == STRING]
+    assert strings == list(json.loads(source).values())
+
+
+def test_surrogate_pair_escape_is_decoded():
+    events = list(iter_events(io.StringIO('["\\ud83d\\ude00"]'), chunk_size=1))
+    assert (STRING, '\U0001F600') in events
+
+
+def test_duplicate_keys_are_kept_in_order():
+    source = '{"a": "first", "b": "x", "a": "second"}'
+    events = list(iter_events(io.StringIO(source)))
+    assert [value for event, value in events if event == MAP_KEY] == ['a', 'b', 'a']
+    # Запись сохраняет оба ключа, а при чтении, как и в json.loads, побеждает последний
+    written = round_trip(source, 4)
+    assert written.count('"a"') == 2
+    assert json.loads(written) == json.loads(source)
+    assert read_leaves(source) == json.loads(source)
+
+
+def test_read_leaves_uses_json_pointer_for_nested_values():
+    leaves = read_leaves(json.dumps(PATCHOULI))
+    assert leaves['name'] == 'Guide Book'
+    assert leaves['/pages/0/text'] == 'Hello $(br) world'
+    assert leaves['/pages/1/item'] == 'minecraft:stone'
+    assert leaves['/pages/2/0/1/0'] == 'deeper'
+    assert '/extra/count' not in leaves
+
+
+def test_leaf_id_escapes_pointer_characters():
+    assert leaf_id(('item.name',)) == 'item.name'
+    assert leaf_id(('pages', 0, 'text')) == '/pages/0/text'
+    assert leaf_id(('a/b', 'c~d')) == '/a~1b/c~0d'
+    assert leaf_id((0,)) == '/0'
+
+
+@pytest.mark.parametrize('source', [
+    '',
+    '{"a": }',
+    '{"a" "b"}',
+    '{"a": 1,}',
+    '[1, 2',
+    '{"a": "unterminated',
+    '{"a": "bad \\x escape"}',
+    '{1: 2}',
+    '{"a": tru}',
+    '{"a": 01}',
+    '{"a": 1} trailing',
+])
+@pytest.mark.parametrize('chunk_size', [1, 64 * 1024])
+def test_malformed_input_raises_clear_error(source, chunk_size):
+    with pytest.raises(JSONStreamError, match=r'символ \d+'):
+        list(iter_events(io.StringIO(source), chunk_size))
+    # Ошибка разбора - ValueError, как у json.loads
+    assert issubclass(JSONStreamError, ValueError)
+    assert read_leaves(source) == {}
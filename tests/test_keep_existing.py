@@ -0,0 +1,96 @@
+"""
+Сохранение готовых переводов из мода (keep_existing)
+
+Запуск:
+    py -m pytest tests
+"""
+import json
+import sqlite3
+import sys
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from jar_handler import translate_jar_mod  # noqa: E402
+from translation_memory import TranslationMemory  # noqa: E402
+from translator import MinecraftModTranslator  # noqa: E402
+
+
+LANG_DIR = 'assets/x/lang'
+
+
+def make_translator(tmp_path: Path) -> MinecraftModTranslator:
+    memory = TranslationMemory(tmp_path / 'memory.sqlite3')
+    return MinecraftModTranslator(memory=memory, backend='pseudo', fuzzy=False)
+
+
+def memory_rows(translator: MinecraftModTranslator) -> set:
+    translator.memory.flush()
+    with sqlite3.connect(str(translator.memory.db_path)) as conn:
+        return set(conn.execute('SELECT source_text, translation FROM memory'))
+
+
+def write_lang(folder: Path, name: str, data: dict) -> Path:
+    path = folder / LANG_DIR / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    return path
+
+
+def test_changed_source_is_retranslated_in_place(tmp_path):
+    mod = tmp_path / 'mod'
+    write_lang(mod, 'en_us.json', {'a': 'Hello world', 'b': 'Goodbye world'})
+    translator = make_translator(tmp_path)
+    translator.translate_mod(str(mod))
+    stale = json.loads((mod / LANG_DIR / 'ru_ru.json').read_text(encoding='utf-8'))['b']
+
+    write_lang(mod, 'en_us.json', {'a': 'Hello world', 'b': 'Open the chest'})
+    stats = translator.translate_mod(str(mod))
+
+    result = json.loads((mod / LANG_DIR / 'ru_ru.json').read_text(encoding='utf-8'))
+    assert stats['kept'] == 0
+    assert result['b'] != stale
+    assert ('Open the chest', stale) not in memory_rows(translator)
+    assert ('Open the chest', result['b']) in memory_rows(translator)
+
+
+def test_shipped_translation_is_kept_and_remembered(tmp_path):
+    mod = tmp_path / 'mod'
+    write_lang(mod, 'en_us.json', {'a': 'Iron Sword', 'b': 'New line'})
+    write_lang(mod, 'ru_ru.json', {'a': 'Железный меч'})
+    translator = make_translator(tmp_path)
+
+    stats = translator.translate_mod(str(mod), str(tmp_path / 'out'))
+
+    # С выходной папкой перевод сохраняется под именем исходного файла
+    result = json.loads((tmp_path / 'out' / LANG_DIR / 'en_us.json').read_text(encoding='utf-8'))
+    assert stats['kept'] == 1
+    assert result['a'] == 'Железный меч'
+    assert ('Iron Sword', 'Железный меч') in memory_rows(translator)
+
+
+def test_own_output_keeps_only_unchanged_shipped_keys(tmp_path):
+    jar = tmp_path / 'mod.jar'
+    with zipfile.ZipFile(jar, 'w') as zip_ref:
+        zip_ref.writestr(f'{LANG_DIR}/en_us.json', json.dumps({'a': 'Iron Sword', 'b': 'Sharp blade'}))
+        zip_ref.writestr(f'{LANG_DIR}/ru_ru.json', json.dumps({'a': 'Железный меч', 'b': 'Острый клинок'},
+                                                              ensure_ascii=False))
+    translator = make_translator(tmp_path)
+    first = translate_jar_mod(jar, translator, tmp_path / 'mod_ru.jar')
+
+    # Новая версия мода, собранная поверх переведенного .jar: английский текст "b" изменился
+    updated = tmp_path / 'mod-1.1.jar'
+    with zipfile.ZipFile(first) as source, zipfile.ZipFile(updated, 'w') as target:
+        for name in source.namelist():
+            payload = source.read(name)
+            if name.endswith('en_us.json'):
+                payload = json.dumps({'a': 'Iron Sword', 'b': 'Blunt blade'}).encode('utf-8')
+            target.writestr(name, payload)
+    second = translate_jar_mod(updated, translator, tmp_path / 'mod-1.1_ru.jar')
+
+    with zipfile.ZipFile(second) as zip_ref:
+        result = json.loads(zip_ref.read(f'{LANG_DIR}/ru_ru.json').decode('utf-8'))
+    assert result['a'] == 'Железный меч'
+    assert result['b'] != 'Острый клинок'
+    assert ('Blunt blade', 'Острый клинок') not in memory_rows(translator)
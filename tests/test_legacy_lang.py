@@ -0,0 +1,126 @@
+"""
+Файлы переводов старого формата .lang (legacy_lang.py)
+
+Запуск:
+    py -m pytest tests
+"""
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backends import PseudoBackend  # noqa: E402
+from lang_discovery import target_filename  # noqa: E402
+from legacy_lang import LangLine, iter_lang_lines, read_lang_values  # noqa: E402
+from translator import MinecraftModTranslator  # noqa: E402
+
+
+DICTIONARY = {
+    'Iron Sword': 'Железный меч',
+    'a=b': 'а=б',
+    'Stone': 'Камень',
+}
+
+SOURCE = (
+    '# Items\r\n'
+    '\r\n'
+    'item.sword.name=Iron Sword\r\n'
+    '  # indented comment \r\n'
+    'tile.sign.text=a=b\r\n'
+    'broken line\r\n'
+    '#PARSE_ESCAPES\r\n'
+    'desc.multi=First\\nSecond\r\n'
+    'last.key=Stone'
+)
+
+EXPECTED = (
+    '# Items\r\n'
+    '\r\n'
+    'item.sword.name=Железный меч\r\n'
+    '  # indented comment \r\n'
+    'tile.sign.text=а=б\r\n'
+    'broken line\r\n'
+    '#PARSE_ESCAPES\r\n'
+    'desc.multi=Фирст\\nСецонд\r\n'
+    'last.key=Камень'
+)
+
+
+def read_lines(text: str) -> list:
+    return list(iter_lang_lines(io.StringIO(text, newline='')))
+
+
+def test_lines_keep_raw_text_and_endings():
+    lines = read_lines(SOURCE)
+    assert ''.join(line.raw for line in lines) == SOURCE
+    assert [line.ending for line in lines] == ['\r\n'] * 8 + ['']
+    assert [line.key for line in lines] == [None, None, 'item.sword.name', None, 'tile.sign.text',
+                                            None, None, 'desc.multi', 'last.key']
+
+
+def test_value_keeps_equals_signs_after_first():
+    assert read_lang_values('tile.sign.text=a=b\n=empty key\n') == {'tile.sign.text': 'a=b', '': 'empty key'}
+
+
+def test_escapes_are_parsed_only_after_directive():
+    text = 'before=a\\nb\n#PARSE_ESCAPES\nafter=a\\nb\\t\\u0041\\\\\n'
+    lines = read_lines(text)
+    assert [line.escapes for line in lines] == [False, True, True]
+    assert read_lang_values(text) == {'before': 'a\\nb', 'after': 'a\nb\tA\\'}
+
+
+def test_format_escapes_new_value_and_keeps_unchanged_line():
+    line = read_lines('#PARSE_ESCAPES\r\nkey=Old\\nvalue\r\n')[1]
+    assert line.format('Old\nvalue') is line.raw
+    assert line.format('New\nvalue\\') == 'key=New\\nvalue\\\\\r\n'
+    # Без escape-последовательностей перевод не может разорвать строку файла
+    plain = read_lines('key=value\n')[0]
+    assert plain.format('one\ntwo') == 'key=one two\n'
+
+
+def test_duplicate_key_takes_last_value():
+    assert read_lang_values('a=first\nb=x\na=second') == {'a': 'second', 'b': 'x'}
+
+
+@pytest.mark.parametrize('text', [None, ''])
+def test_empty_file_has_no_values(text):
+    assert read_lang_values(text) == {}
+
+
+@pytest.mark.parametrize('filename, locale, expected', [
+    ('en_US.lang', 'ru_ru', 'ru_RU.lang'),
+    ('en_US.lang', 'de_de', 'de_DE.lang'),
+    ('en_us.lang', 'ru_ru', 'ru_ru.lang'),
+    ('en_us.json', 'ru_ru', 'ru_ru.json'),
+])
+def test_target_filename_keeps_legacy_spelling(filename, locale, expected):
+    assert target_filename(filename, locale) == expected
+
+
+def test_translated_file_keeps_layout_byte_for_byte(tmp_path):
+    source = tmp_path / 'en_US.lang'
+    source.write_bytes(SOURCE.encode('utf-8'))
+    translator = MinecraftModTranslator(backend=PseudoBackend('en', 'ru', dictionary=DICTIONARY),
+                                        max_retries=0, fuzzy=False)
+
+    assert translator.target_filename(source.name) == 'ru_RU.lang'
+    assert translator.translate_json_file(source, file_format='lang')
+
+    result = (tmp_path / 'ru_RU.lang').read_bytes().decode('utf-8')
+    assert result == EXPECTED
+    # Перенос строки маскируется и возвращается escape-последовательностью
+    assert read_lang_values(result)['desc.multi'] == 'Фирст\nСецонд'
+
+
+def test_file_without_strings_is_copied_unchanged(tmp_path):
+    line = LangLine('key=Stone\n', 'key', 'Stone', '\n', False)
+    assert line.format('Stone') == 'key=Stone\n'
+    source = tmp_path / 'en_US.lang'
+    source.write_bytes(b'# only comments\n\n#PARSE_ESCAPES\n')
+    translator = MinecraftModTranslator(backend=PseudoBackend('en', 'ru'), max_retries=0, fuzzy=False)
+
+    assert translator.translate_json_file(source, file_format='lang')
+    assert (tmp_path / 'ru_RU.lang').read_bytes() == source.read_bytes()
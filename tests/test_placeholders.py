@@ -0,0 +1,133 @@
+"""
+Защита подстановок при переводе (placeholders.py)
+
+Запуск:
+    py -m pytest tests
+"""
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backends import PseudoBackend  # noqa: E402
+from placeholders import TOKEN_CLOSE, TOKEN_OPEN, mask, placeholders_match, unmask  # noqa: E402
+from translation_memory import TranslationMemory  # noqa: E402
+from translator import PLACEHOLDER_RETRIES, MinecraftModTranslator  # noqa: E402
+
+
+class BreakingBackend(PseudoBackend):
+    """Псевдоперевод, который первые failures раз портит метки в каждой строке"""
+
+    def __init__(self, source_lang: str, target_lang: str, failures: int, duplicate: bool = False):
+        super().__init__(source_lang, target_lang)
+        self.failures = failures
+        self.duplicate = duplicate
+        self.sent = Counter()
+
+    def translate_batch(self, texts):
+        results = []
+        for text in texts:
+            self.sent[text] += 1
+            translated = self.translate_one(text)
+            if self.sent[text] <= self.failures:
+                token = f"{TOKEN_OPEN}0{TOKEN_CLOSE}"
+                translated = translated.replace(token, token * 2 if self.duplicate else '')
+            results.append(translated)
+        return results
+
+
+def make_translator(backend: PseudoBackend) -> MinecraftModTranslator:
+    return MinecraftModTranslator(backend=backend, max_retries=0, fuzzy=False)
+
+
+@pytest.mark.parametrize('text, parts', [
+    ('Deals %s damage', ['%s']),
+    ('%1$d of %2$s items', ['%1$d', '%2$s']),
+    ('§aGreen§r text', ['§a', '§r']),
+    ('Hello {0}, you have {1}', ['{0}', '{1}']),
+    ('Line one\\nLine two', ['\\n']),
+    ('Read $(l)this$() page', ['$(l)', '$()']),
+])
+def test_mask_round_trip_restores_placeholders(text, parts):
+    masked, found = mask(text)
+    assert found == parts
+    assert '%' not in masked and '§' not in masked and '{' not in masked
+    assert unmask(masked, found) == text
+    assert placeholders_match(text, unmask(masked, found))
+
+
+def test_adjacent_placeholders_share_one_token():
+    masked, parts = mask('§a§l%s§r')
+    assert masked == f"{TOKEN_OPEN}0{TOKEN_CLOSE}"
+    assert parts == ['§a§l%s§r']
+
+
+def test_unmask_allows_reordered_tokens_and_spaces():
+    _masked, parts = mask('%1$s gives %2$s')
+    assert unmask(f"{TOKEN_OPEN} 1 {TOKEN_CLOSE} получает от {TOKEN_OPEN}0{TOKEN_CLOSE}", parts) \
+        == '%2$s получает от %1$s'
+
+
+def test_text_without_placeholders_is_not_masked():
+    assert mask('Iron Sword') == ('Iron Sword', [])
+    # Строка, где уже есть скобки меток, не маскируется: метки нельзя было бы отличить
+    text = f"{TOKEN_OPEN}0{TOKEN_CLOSE} %s"
+    assert mask(text) == (text, [])
+
+
+@pytest.mark.parametrize('translated', [
+    'Наносит урона',
+    f"Наносит {TOKEN_OPEN}0{TOKEN_CLOSE}{TOKEN_OPEN}0{TOKEN_CLOSE} урона",
+    f"Наносит {TOKEN_OPEN}1{TOKEN_CLOSE} урона",
+    f"Наносит {TOKEN_OPEN}0 урона",
+])
+def test_unmask_rejects_lost_duplicated_or_unknown_tokens(translated):
+    _masked, parts = mask('Deals %s damage')
+    assert unmask(translated, parts) is None
+
+
+def test_placeholders_match_ignores_order_but_counts_repeats():
+    assert placeholders_match('%s of %d', '%d из %s')
+    assert not placeholders_match('%s of %d', '%s из')
+    assert not placeholders_match('%s', '%s %s')
+    assert not placeholders_match('§aGreen', '§bЗеленый')
+
+
+@pytest.mark.parametrize('duplicate', [False, True], ids=['dropped', 'duplicated'])
+def test_broken_tokens_are_retried(duplicate):
+    backend = BreakingBackend('en', 'ru', failures=1, duplicate=duplicate)
+    translator = make_translator(backend)
+
+    results = translator.translate_many(['Deals %s damage', 'Iron Sword'])
+
+    assert results['Deals %s damage'] == backend.translate_one('Deals %s damage').replace(
+        f"{TOKEN_OPEN}0{TOKEN_CLOSE}", '%s')
+    assert placeholders_match('Deals %s damage', results['Deals %s damage'])
+    assert backend.sent[f"Deals {TOKEN_OPEN}0{TOKEN_CLOSE} damage"] == 2
+    assert backend.sent['Iron Sword'] == 1
+    assert translator.metrics.counters.get('placeholder_retries') == 1
+    assert not translator.metrics.counters.get('placeholder_failures')
+
+
+def test_repeated_failure_is_counted_and_not_written(tmp_path):
+    backend = BreakingBackend('en', 'ru', failures=PLACEHOLDER_RETRIES + 1)
+    memory = TranslationMemory(tmp_path / 'memory.sqlite3')
+    translator = MinecraftModTranslator(memory=memory, backend=backend, max_retries=0, fuzzy=False)
+    source = tmp_path / 'en_us.json'
+    source.write_text(json.dumps({'a': 'Deals %s damage', 'b': 'Iron Sword'}), encoding='utf-8')
+
+    assert translator.translate_json_file(source, tmp_path / 'ru_ru.json')
+
+    assert backend.sent[f"Deals {TOKEN_OPEN}0{TOKEN_CLOSE} damage"] == PLACEHOLDER_RETRIES + 1
+    assert translator.metrics.counters.get('placeholder_failures') == 1
+    result = json.loads((tmp_path / 'ru_ru.json').read_text(encoding='utf-8'))
+    assert result['b'] == backend.translate_one('Iron Sword')
+    # Испорченный перевод не попадает в файл: остается исходная строка
+    assert result['a'] == 'Deals %s damage'
+    memory.flush()
+    assert memory.get('en', 'ru', 'Deals %s damage') is None
+    assert memory.get('en', 'ru', 'Iron Sword') == result['b']
@@ -0,0 +1,145 @@
+"""
+Ограничение частоты и числа одновременных запросов (rate_limiter.py)
+
+Запуск:
+    py -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rate_limiter import AdaptiveConcurrency, SharedTokenBucket, TokenBucket  # noqa: E402
+
+
+class FakeClock:
+    """Часы, которые идут только при ожидании или вручную"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def finish(concurrency: AdaptiveConcurrency, outcome: str = AdaptiveConcurrency.OK, latency: float = 1.0) -> None:
+    concurrency.acquire()
+    concurrency.release(outcome, latency)
+
+
+def test_limit_grows_by_about_one_per_window_of_successes():
+    concurrency = AdaptiveConcurrency(100, initial=4, clock=FakeClock())
+    for _ in range(4):
+        finish(concurrency)
+    assert 4.9 < concurrency.limit < 5
+    assert concurrency.peak_limit == concurrency.limit
+    assert concurrency.in_flight == 0
+
+
+def test_limit_does_not_exceed_ceiling():
+    concurrency = AdaptiveConcurrency(3, initial=3, clock=FakeClock())
+    for _ in range(50):
+        finish(concurrency)
+    assert concurrency.limit == 3
+
+
+def test_burst_of_congestion_decreases_once_per_rtt():
+    clock = FakeClock()
+    concurrency = AdaptiveConcurrency(100, initial=16, clock=clock)
+    finish(concurrency, latency=2.0)
+    start = concurrency.limit
+
+    # Ошибки одной волны запросов уменьшают лимит один раз
+    for _ in range(5):
+        finish(concurrency, AdaptiveConcurrency.CONGESTED)
+    assert concurrency.limit == start / 2
+
+    clock.now += 1.5
+    finish(concurrency, AdaptiveConcurrency.CONGESTED)
+    assert concurrency.limit == start / 2
+
+    clock.now += 0.5
+    finish(concurrency, AdaptiveConcurrency.CONGESTED)
+    assert concurrency.limit == start / 4
+
+
+def test_first_congestion_decreases_regardless_of_clock_start():
+    concurrency = AdaptiveConcurrency(10, initial=8, clock=FakeClock(now=0.0))
+    finish(concurrency, latency=5.0)
+    finish(concurrency, AdaptiveConcurrency.CONGESTED)
+    assert concurrency.limit < 8
+
+
+def test_limit_does_not_drop_below_floor():
+    clock = FakeClock()
+    concurrency = AdaptiveConcurrency(64, min_limit=2, initial=64, clock=clock)
+    for _ in range(20):
+        clock.now += 10
+        finish(concurrency, AdaptiveConcurrency.CONGESTED)
+    assert concurrency.limit == 2
+    assert concurrency.peak_limit == 64
+
+
+def test_other_errors_do_not_change_limit():
+    concurrency = AdaptiveConcurrency(10, initial=5, clock=FakeClock())
+    for _ in range(10):
+        finish(concurrency, AdaptiveConcurrency.ERROR)
+    assert concurrency.limit == 5
+
+
+def test_limit_is_kept_within_bounds_on_creation():
+    assert AdaptiveConcurrency(8).limit == 4
+    assert AdaptiveConcurrency(8, initial=100).limit == 8
+    assert AdaptiveConcurrency(8, min_limit=3, initial=1).limit == 3
+    assert AdaptiveConcurrency(0).limit == 1
+
+
+@pytest.fixture(params=[TokenBucket, SharedTokenBucket])
+def bucket_class(request):
+    return request.param
+
+
+def test_bucket_allows_burst_up_to_capacity(bucket_class):
+    clock = FakeClock()
+    bucket = bucket_class(2, capacity=3, clock=clock, sleep=clock.sleep)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+
+def test_bucket_paces_requests_at_rate(bucket_class):
+    clock = FakeClock()
+    bucket = bucket_class(5, capacity=1, clock=clock, sleep=clock.sleep)
+    start = clock.now
+    for _ in range(11):
+        bucket.acquire()
+    assert clock.now - start == pytest.approx(2.0)
+
+
+def test_bucket_refill_is_capped_by_capacity(bucket_class):
+    clock = FakeClock()
+    bucket = bucket_class(1, capacity=2, clock=clock, sleep=clock.sleep)
+    bucket.acquire(2)
+    clock.now += 100
+    bucket.acquire(2)
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+
+def test_bucket_without_rate_never_waits(bucket_class):
+    clock = FakeClock()
+    bucket = bucket_class(0, clock=clock, sleep=clock.sleep)
+    for _ in range(1000):
+        bucket.acquire()
+    assert clock.sleeps == []
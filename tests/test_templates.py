@@ -0,0 +1,136 @@
+"""
+Нечеткая память переводов: шаблоны строк (templates.py)
+
+Запуск:
+    py -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backends import PseudoBackend  # noqa: E402
+from templates import SLOT_FORMAT, SLOT_NUMBER, SLOT_WORD, make_template, rebuild_translation  # noqa: E402
+from translation_memory import TranslationMemory  # noqa: E402
+from translator import MinecraftModTranslator  # noqa: E402
+
+
+TERMS = {'oak': 'Дубовые', 'birch': 'Березовые', 'iron': 'Железо', 'gold': 'Золото'}
+
+
+class RecordingBackend(PseudoBackend):
+    """Перевод по словарю с записью отправленных строк"""
+
+    def __init__(self, source_lang: str, target_lang: str, dictionary: dict):
+        super().__init__(source_lang, target_lang, dictionary=dictionary)
+        self.sent = []
+
+    def translate_batch(self, texts):
+        self.sent.extend(texts)
+        return super().translate_batch(texts)
+
+
+def rebuild(source: str, translation: str, target: str, terms: dict = TERMS):
+    return rebuild_translation(make_template(source), translation, make_template(target), terms)
+
+
+def test_strings_of_one_family_share_template():
+    first = make_template('Tier 1 Upgrade')
+    second = make_template('Tier 8 Upgrade')
+    assert first.key == second.key
+    assert first.slots == [(SLOT_NUMBER, '1')]
+    assert make_template('Light Blue Wool').slots == [(SLOT_WORD, 'Light Blue')]
+    assert make_template('Oak Planks').key == make_template('Birch Planks').key
+    assert make_template('Deals %s damage to §cenemies').slots == [(SLOT_FORMAT, '%s'), (SLOT_FORMAT, '§c')]
+
+
+@pytest.mark.parametrize('text', ['Iron', '64', 'Oak 12', 'Plain text'])
+def test_string_without_template(text):
+    assert make_template(text) is None
+
+
+@pytest.mark.parametrize('source, translation, target, expected', [
+    ('Tier 1 Upgrade', 'Улучшение уровня 1', 'Tier 8 Upgrade', 'Улучшение уровня 8'),
+    ('Stores 10.5 buckets', 'Вмещает 10.5 ведра', 'Stores 2 buckets', 'Вмещает 2 ведра'),
+    ('Oak Planks', 'Дубовые доски', 'Birch Planks', 'Березовые доски'),
+    ('Stripped oak log', 'Обтесанное бревно (дубовые)', 'Stripped birch log', 'Обтесанное бревно (березовые)'),
+    ('Deals %s damage', 'Наносит %s урона', 'Deals %d damage', 'Наносит %d урона'),
+    ('Level 1 of 3', 'Уровень 1 из 3', 'Level 2 of 5', 'Уровень 2 из 5'),
+])
+def test_rebuilt_translation_substitutes_values(source, translation, target, expected):
+    assert rebuild(source, translation, target) == expected
+
+
+@pytest.mark.parametrize('source, translation, target', [
+    # Число встречается в переводе дважды - неясно, какое заменить
+    ('Tier 1 Upgrade', 'Улучшение 1 уровня 1', 'Tier 8 Upgrade'),
+    # Число записано словами
+    ('Tier 1 Upgrade', 'Улучшение первого уровня', 'Tier 8 Upgrade'),
+    # Одно и то же число на месте двух разных значений
+    ('Level 1 of 1', 'Уровень 1 из 1', 'Level 2 of 3'),
+    # Слово склоняется, его перевод не найден отдельным словом
+    ('Iron Block', 'Железный блок', 'Gold Block'),
+    # Перевода слова нет в словаре
+    ('Oak Planks', 'Дубовые доски', 'Spruce Planks'),
+])
+def test_unsafe_rebuild_is_rejected(source, translation, target):
+    assert rebuild(source, translation, target) is None
+
+
+def test_rebuild_requires_same_template():
+    assert rebuild('Tier 1 Upgrade', 'Улучшение уровня 1', 'Tier 1 Upgrade Kit') is None
+
+
+def test_family_is_translated_from_one_request():
+    backend = RecordingBackend('en', 'ru', {'Tier 1 Upgrade': 'Улучшение уровня 1'})
+    translator = MinecraftModTranslator(backend=backend, max_retries=0)
+
+    results = translator.translate_many(['Tier 1 Upgrade', 'Tier 8 Upgrade', ' Tier 12 Upgrade '])
+
+    assert backend.sent == ['Tier 1 Upgrade']
+    assert results == {
+        'Tier 1 Upgrade': 'Улучшение уровня 1',
+        'Tier 8 Upgrade': 'Улучшение уровня 8',
+        ' Tier 12 Upgrade ': ' Улучшение уровня 12 ',
+    }
+    assert translator.metrics.counters.get('template_hits') == 2
+
+
+def test_string_that_cannot_be_rebuilt_goes_to_backend():
+    backend = RecordingBackend('en', 'ru', {
+        'Tier 1 Upgrade': 'Улучшение первого уровня',
+        'Tier 8 Upgrade': 'Улучшение восьмого уровня',
+        'Iron Block': 'Железный блок',
+        'Gold Block': 'Золотой блок',
+        'Iron': 'Железо',
+        'Gold': 'Золото',
+    })
+    translator = MinecraftModTranslator(backend=backend, max_retries=0)
+
+    results = translator.translate_many(['Tier 1 Upgrade', 'Tier 8 Upgrade', 'Iron Block', 'Gold Block'])
+
+    assert results['Tier 8 Upgrade'] == 'Улучшение восьмого уровня'
+    assert results['Gold Block'] == 'Золотой блок'
+    assert 'Tier 8 Upgrade' in backend.sent and 'Gold Block' in backend.sent
+    assert not translator.metrics.counters.get('template_hits')
+
+
+def test_find_template_returns_same_family_from_memory(tmp_path):
+    memory = TranslationMemory(tmp_path / 'memory.sqlite3')
+    memory.put('en', 'ru', 'Tier 1 Upgrade', 'Улучшение уровня 1')
+    memory.put('en', 'ru', 'Iron Sword', 'Железный меч')
+    memory.put('en', 'de', 'Tier 2 Upgrade', 'Stufe 2 Verbesserung')
+    key = make_template('Tier 5 Upgrade').key
+
+    assert memory.find_template('en', 'ru', key) == [('Tier 1 Upgrade', 'Улучшение уровня 1')]
+    assert memory.find_template('en', 'de', key) == [('Tier 2 Upgrade', 'Stufe 2 Verbesserung')]
+    assert memory.find_template('en', 'ru', '') == []
+
+    backend = RecordingBackend('en', 'ru', {})
+    translator = MinecraftModTranslator(memory=memory, backend=backend, max_retries=0)
+    assert translator.translate_many(['Tier 5 Upgrade']) == {'Tier 5 Upgrade': 'Улучшение уровня 5'}
+    assert backend.sent == []
+    # Собранный перевод запоминается как обычный
+    assert memory.get('en', 'ru', 'Tier 5 Upgrade') == 'Улучшение уровня 5'
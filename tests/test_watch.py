@@ -0,0 +1,105 @@
+"""
+Слежение за папкой mods (watch.py)
+
+Запуск:
+    py -m pytest tests
+"""
+import json
+import os
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backends import PseudoBackend  # noqa: E402
+from translator import MinecraftModTranslator  # noqa: E402
+from watch import RETRY_DELAY, ModsWatcher  # noqa: E402
+
+
+class FlakyBackend(PseudoBackend):
+    """Псевдоперевод, который можно «отключить», и счетчик отправленных строк"""
+
+    def __init__(self, source_lang: str, target_lang: str):
+        super().__init__(source_lang, target_lang)
+        self.down = False
+        self.sent = []
+
+    def translate_batch(self, texts):
+        if self.down:
+            raise ConnectionError('connection refused')
+        self.sent.extend(texts)
+        return super().translate_batch(texts)
+
+
+def make_translator() -> MinecraftModTranslator:
+    return MinecraftModTranslator(backend=FlakyBackend('en', 'ru'), max_retries=0, fuzzy=False)
+
+
+def write_jar(path: Path, namespace: str, strings: dict) -> None:
+    with zipfile.ZipFile(path, 'w') as zip_ref:
+        zip_ref.writestr(f'assets/{namespace}/lang/en_us.json', json.dumps(strings))
+    # Время изменения должно отличаться от прежней версии файла
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def pack_names(pack: Path) -> set:
+    with zipfile.ZipFile(pack) as zip_ref:
+        return {name for name in zip_ref.namelist() if name.endswith('ru_ru.json')}
+
+
+def test_failed_mod_is_retried_after_pause(tmp_path):
+    mods = tmp_path / 'mods'
+    mods.mkdir()
+    write_jar(mods / 'a.jar', 'a', {'a.title': 'Iron Sword'})
+    translator = make_translator()
+    watcher = ModsWatcher(mods, translator, output_dir=tmp_path / 'out', settle=0)
+    watcher.start()
+
+    translator.backend.down = True
+    now = time.monotonic()
+    assert watcher.poll(now) == 0
+
+    translator.backend.down = False
+    assert watcher.poll(now + 1) == 0
+    assert watcher.poll(now + RETRY_DELAY) == 1
+    with zipfile.ZipFile(tmp_path / 'out' / 'a.jar') as zip_ref:
+        result = json.loads(zip_ref.read('assets/a/lang/ru_ru.json').decode('utf-8'))
+    assert result['a.title'] != 'Iron Sword'
+
+
+def test_restart_translates_only_changed_mod_into_pack(tmp_path):
+    mods = tmp_path / 'mods'
+    mods.mkdir()
+    write_jar(mods / 'a.jar', 'a', {'a.title': 'Iron Sword'})
+    write_jar(mods / 'b.jar', 'b', {'b.title': 'Golden Apple'})
+    pack = tmp_path / 'ru.zip'
+
+    first = ModsWatcher(mods, make_translator(), resource_pack_path=pack, settle=0)
+    first.start()
+    assert first.poll() == 2
+    assert pack_names(pack) == {'assets/a/lang/ru_ru.json', 'assets/b/lang/ru_ru.json'}
+
+    # После перезапуска обновился один мод: остальные берутся из сохраненного состояния
+    write_jar(mods / 'a.jar', 'a', {'a.title': 'Diamond Sword'})
+    translator = make_translator()
+    second = ModsWatcher(mods, translator, resource_pack_path=pack, settle=0)
+    second.start()
+    assert second.poll() == 1
+    assert translator.backend.sent == ['Diamond Sword']
+    assert pack_names(pack) == {'assets/a/lang/ru_ru.json', 'assets/b/lang/ru_ru.json'}
+
+    os.remove(mods / 'b.jar')
+    second.poll()
+    assert pack_names(pack) == {'assets/a/lang/ru_ru.json'}
+
+
+def test_output_dir_must_differ_from_mods_dir(tmp_path):
+    mods = tmp_path / 'mods'
+    mods.mkdir()
+    with pytest.raises(ValueError):
+        ModsWatcher(mods, make_translator(), output_dir=tmp_path / 'mods' / '..' / 'mods')
@@ -0,0 +1,314 @@
+"""
+Постоянная память переводов (translation memory) на SQLite
+"""
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from templates import make_template
+
+
+# Путь к памяти переводов по умолчанию (общий для всех модов и запусков)
+DEFAULT_MEMORY_PATH = Path.home() / '.mod_translator' / 'translation_memory.sqlite3'
+
+# Максимальное число записей по умолчанию
+DEFAULT_MAX_ENTRIES = 500_000
+
+# Как часто (в количестве записей) фиксировать изменения и проверять лимит
+_COMMIT_EVERY = 200
+
+# Сколько строк обрабатывать за раз при заполнении шаблонов старых записей
+_BACKFILL_CHUNK = 5000
+
+# Сколько строк проверяется одним запросом в known (лимит параметров SQLite - 999)
+_LOOKUP_CHUNK = 500
+
+
+def normalize_text(text: str) -> str:
+    """
+    Нормализует текст для использования в качестве ключа памяти
+
+    Args:
+        text: Исходный текст
+
+    Returns:
+        Текст в форме NFC без пробелов по краям
+    """
+    return unicodedata.normalize('NFC', text).strip()
+
+
+def template_key(text: str) -> str:
+    """
+    Ключ шаблона строки для поиска похожих переводов
+
+    Args:
+        text: Нормализованный текст
+
+    Returns:
+        Шаблон (см. templates.make_template) или пустая строка, если его нет
+    """
+    template = make_template(text)
+    return template.key if template is not None else ''
+
+
+def _split_outer_whitespace(text: str) -> Tuple[str, str]:
+    """Возвращает пробельные символы в начале и в конце строки"""
+    if not text.strip():
+        return text, ''
+    leading = text[:len(text) - len(text.lstrip())]
+    trailing = text[len(text.rstrip()):]
+    return leading, trailing
+
+
+class TranslationMemory:
+    """
+    Память переводов, ключ - (исходный язык, целевой язык, нормализованный текст).
+
+    Хранит записи в SQLite, при превышении лимита удаляет давно не
+    использовавшиеся записи (LRU). Безопасна для использования из нескольких
+    потоков; несколько процессов могут работать с одним файлом (режим WAL).
+
+    Для каждой записи хранится шаблон строки (числа, подстановки и слова из
+    словаря заменены метками), по которому находятся переводы похожих строк.
+    """
+
+    def __init__(self, db_path: Path = DEFAULT_MEMORY_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Открывает (или создает) память переводов
+
+        Args:
+            db_path: Путь к файлу базы SQLite
+            max_entries: Максимальное количество хранимых переводов
+        """
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS memory ('
+            ' source_lang TEXT NOT NULL,'
+            ' target_lang TEXT NOT NULL,'
+            ' source_text TEXT NOT NULL,'
+            ' translation TEXT NOT NULL,'
+            ' last_used REAL NOT NULL,'
+            ' template TEXT,'
+            ' PRIMARY KEY (source_lang, target_lang, source_text))'
+        )
+        columns = [row[1] for row in self._conn.execute('PRAGMA table_info(memory)')]
+        if 'template' not in columns:
+            # Память, созданная до появления шаблонов
+            self._conn.execute('ALTER TABLE memory ADD COLUMN template TEXT')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS memory_last_used ON memory (last_used)')
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS memory_template ON memory (source_lang, target_lang, template)'
+        )
+        self._conn.commit()
+        self._backfill_templates()
+
+    def _backfill_templates(self) -> None:
+        """Вычисляет шаблоны для записей, сохраненных без них"""
+        while True:
+            rows = self._conn.execute(
+                'SELECT rowid, source_text FROM memory WHERE template IS NULL LIMIT ?', (_BACKFILL_CHUNK,)
+            ).fetchall()
+            if not rows:
+                return
+            self._conn.executemany(
+                'UPDATE memory SET template = ? WHERE rowid = ?',
+                [(template_key(text), rowid) for rowid, text in rows]
+            )
+            self._conn.commit()
+
+    def get(self, source_lang: str, target_lang: str, text: str) -> Optional[str]:
+        """
+        Ищет перевод в памяти
+
+        Args:
+            source_lang: Исходный язык
+            target_lang: Целевой язык
+            text: Текст для перевода
+
+        Returns:
+            Сохраненный перевод или None, если его нет
+        """
+        key = normalize_text(text)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT translation FROM memory WHERE source_lang = ? AND target_lang = ? AND source_text = ?',
+                (source_lang, target_lang, key)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._conn.execute(
+                'UPDATE memory SET last_used = ? WHERE source_lang = ? AND target_lang = ? AND source_text = ?',
+                (time.time(), source_lang, target_lang, key)
+            )
+            self._touch()
+
+        # Возвращаем пробелы по краям такими же, как в исходной строке
+        leading, trailing = _split_outer_whitespace(text)
+        return leading + row[0] + trailing
+
+    def known(self, source_lang: str, target_lang: str, texts: Iterable[str]) -> Set[str]:
+        """
+        Проверяет, какие строки уже есть в памяти, не меняя время
+        использования записей и счетчики попаданий (для оценки объема работы)
+
+        Args:
+            source_lang: Исходный язык
+            target_lang: Целевой язык
+            texts: Строки
+
+        Returns:
+            Строки из texts, перевод которых есть в памяти
+        """
+        by_key: Dict[str, List[str]] = {}
+        for text in texts:
+            by_key.setdefault(normalize_text(text), []).append(text)
+        keys = list(by_key)
+        found: Set[str] = set()
+        with self._lock:
+            for start in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[start:start + _LOOKUP_CHUNK]
+                rows = self._conn.execute(
+                    'SELECT source_text FROM memory WHERE source_lang = ? AND target_lang = ? '
+                    f'AND source_text IN ({", ".join("?" * len(chunk))})',
+                    (source_lang, target_lang, *chunk)
+                ).fetchall()
+                for (key,) in rows:
+                    found.update(by_key[key])
+        return found
+
+    def put(self, source_lang: str, target_lang: str, text: str, translation: str) -> None:
+        """
+        Сохраняет перевод в памяти
+
+        Args:
+            source_lang: Исходный язык
+            target_lang: Целевой язык
+            text: Исходный текст
+            translation: Перевод
+        """
+        self.put_many(source_lang, target_lang, {text: translation})
+
+    def put_many(self, source_lang: str, target_lang: str, translations: Dict[str, str]) -> int:
+        """
+        Сохраняет несколько переводов за один запрос к базе
+
+        Args:
+            source_lang: Исходный язык
+            target_lang: Целевой язык
+            translations: Словарь {исходный текст: перевод}
+
+        Returns:
+            Количество переданных переводов с непустым текстом
+        """
+        now = time.time()
+        rows = []
+        for text, translation in translations.items():
+            key = normalize_text(text)
+            if key:
+                rows.append((source_lang, target_lang, key, translation.strip(), now, template_key(key)))
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO memory (source_lang, target_lang, source_text, translation, last_used, template) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            if len(rows) == 1:
+                self._touch()
+            else:
+                self._flush()
+        return len(rows)
+
+    def find_template(self, source_lang: str, target_lang: str, template: str,
+                      limit: int = 8) -> List[Tuple[str, str]]:
+        """
+        Ищет переводы строк с тем же шаблоном
+
+        Args:
+            source_lang: Исходный язык
+            target_lang: Целевой язык
+            template: Ключ шаблона (Template.key)
+            limit: Максимум результатов
+
+        Returns:
+            Список (исходная строка, перевод), недавно использованные первыми
+        """
+        if not template:
+            return []
+        with self._lock:
+            return self._conn.execute(
+                'SELECT source_text, translation FROM memory '
+                'WHERE source_lang = ? AND target_lang = ? AND template = ? '
+                'ORDER BY last_used DESC LIMIT ?',
+                (source_lang, target_lang, template, limit)
+            ).fetchall()
+
+    def _touch(self) -> None:
+        """Периодически фиксирует изменения и применяет лимит размера"""
+        self._pending += 1
+        if self._pending >= _COMMIT_EVERY:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Фиксирует изменения и удаляет лишние записи (вызывается под блокировкой)"""
+        self._pending = 0
+        count = self._conn.execute('SELECT COUNT(*) FROM memory').fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                'DELETE FROM memory WHERE rowid IN '
+                '(SELECT rowid FROM memory ORDER BY last_used ASC LIMIT ?)',
+                (count - self.max_entries,)
+            )
+        self._conn.commit()
+
+    def flush(self) -> None:
+        """Сохраняет накопленные изменения на диск"""
+        with self._lock:
+            self._flush()
+
+    def clear(self) -> None:
+        """Удаляет все записи из памяти"""
+        with self._lock:
+            self._conn.execute('DELETE FROM memory')
+            self._conn.commit()
+            self._pending = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM memory').fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Возвращает статистику обращений к памяти
+
+        Returns:
+            Словарь с количеством попаданий, промахов и записей
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self),
+        }
+
+    def close(self) -> None:
+        """Сохраняет изменения и закрывает базу"""
+        with self._lock:
+            self._flush()
+            self._conn.close()
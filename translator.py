@@ -1,32 +1,237 @@
 """
 Программа для машинного перевода модов Minecraft на русский язык
 """
-import json
 import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional
-from deep_translator import GoogleTranslator
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set, TextIO, Tuple, Union
 from tqdm import tqdm
 
+from backends import BACKENDS, TranslationBackend, create_backend, is_congestion_error, is_payload_error
+from batching import BatchFailed, can_batch, pack_batches, translate_packed
+from daemon import DEFAULT_DAEMON_URL
+from harvest import existing_translations, read_values
+from journal import TranslationJournal, atomic_path, atomic_write_text, open_journal
+from json_stream import END_MAP, MAP_KEY, STRING, JsonPath, JsonStreamWriter, iter_events, iter_paths, leaf_id
+from lang_discovery import book_target_path, discover_lang_files, locale_for, target_filename
+from legacy_lang import LangLine, iter_lang_lines
+from manifest import MANIFEST_SUFFIX, dump_manifest, hash_value, load_kept, load_manifest, source_hashes
+from metrics import RunMetrics, format_phases, write_json, write_prometheus
+from output_store import DEFAULT_STORE_PATH, OutputStore
+from placeholders import mask, placeholders_match, unmask
+from progress import (CACHE_HITS, CACHE_MISSES, FILE_DONE, FILES_TOTAL, STRINGS_DONE, STRINGS_TOTAL,
+                      CancelToken, ProgressChannel, TranslationCancelled)
+from rate_limiter import AdaptiveConcurrency, TokenBucket, backoff_delay
+from resource_pack import DEFAULT_PACK_FORMAT, ResourcePackBuilder
+from templates import SLOT_WORD, Template, make_template, rebuild_translation
+from translation_memory import DEFAULT_MEMORY_PATH, TranslationMemory
+from watch import DEFAULT_INTERVAL as DEFAULT_WATCH_INTERVAL
+
+
+# Сколько строк переводится за раз при потоковой обработке файла
+STREAM_WINDOW = 10000
+
+# Поля книг Patchouli с текстом для игрока (остальные - id, иконки, типы страниц)
+BOOK_TEXT_KEYS = frozenset({'name', 'title', 'text', 'subtitle', 'description', 'landing_text', 'link_text'})
+
+# Сколько раз повторно запрашивать строку, в переводе которой испорчены подстановки
+PLACEHOLDER_RETRIES = 2
+
+# Версия правил отбора строк (should_translate_value) и состава результата
+# (манифесты, готовые переводы); входит в ключ хранилища результатов,
+# поэтому при изменении правил нужно увеличить
+TRANSLATE_RULES_VERSION = 2
+
+# Строка только из чисел, пробелов и спецсимволов
+_NON_TEXT = re.compile(r'^[\d\s\W]+$')
+
+
+def parse_languages(target_lang: Union[str, Sequence[str]]) -> List[str]:
+    """
+    Разбирает список целевых языков
+
+    Args:
+        target_lang: Язык, несколько языков через запятую или список языков
+
+    Returns:
+        Языки по порядку без повторов (первый - основной)
+    """
+    items = [target_lang] if isinstance(target_lang, str) else list(target_lang)
+    languages: List[str] = []
+    for item in items:
+        for language in item.split(','):
+            language = language.strip()
+            if language and language not in languages:
+                languages.append(language)
+    if not languages:
+        raise ValueError("Не указан целевой язык")
+    return languages
+
+
+@dataclass
+class StreamTarget:
+    """Перевод файла на один язык при потоковой обработке (см. translate_stream_targets)"""
+
+    translator: 'MinecraftModTranslator'
+    # Поток для записи перевода
+    output: TextIO
+    # Предыдущий перевод {ключ: строка} и хэши его исходных строк
+    previous: Dict = field(default_factory=dict)
+    previous_hashes: Dict[str, str] = field(default_factory=dict)
+    # Имя файла для журнала (если None, журнал не ведется)
+    file_id: Optional[str] = None
+    # Имеющийся перевод из самого мода {ключ: перевод} (сохраняется как есть)
+    existing: Dict[str, str] = field(default_factory=dict)
+    # Хэши исходных строк сохраненных ключей из манифеста, если имеющийся перевод
+    # записан программой; None - перевод поставлен с модом и не проверен
+    existing_hashes: Optional[Dict[str, str]] = None
+    # Ключи, перевод которых взят из имеющегося перевода (заполняется при переводе)
+    kept_keys: Set[str] = field(default_factory=set)
+
 
 class MinecraftModTranslator:
     """Класс для перевода файлов переводов модов Minecraft"""
     
-    def __init__(self, source_lang: str = 'en', target_lang: str = 'ru'):
+    def __init__(self, source_lang: str = 'en', target_lang: Union[str, Sequence[str]] = 'ru',
+                 memory: Optional[TranslationMemory] = None,
+                 workers: int = 1, max_rps: float = 0, max_retries: int = 5,
+                 rate_limiter: Optional[TokenBucket] = None, incremental: bool = False,
+                 backend: Union[str, TranslationBackend] = 'google',
+                 backend_options: Optional[Dict[str, Any]] = None, resume: bool = False,
+                 fuzzy: bool = True, keep_existing: bool = True,
+                 output_store: Optional[OutputStore] = None, progress: Optional[ProgressChannel] = None,
+                 cancel_token: Optional[CancelToken] = None):
         """
         Инициализация переводчика
         
         Args:
             source_lang: Исходный язык (по умолчанию английский)
-            target_lang: Целевой язык (по умолчанию русский)
+            target_lang: Целевой язык (по умолчанию русский) или несколько языков
+                (список или через запятую): файлы разбираются один раз, а переводы
+                на все языки идут через общие ограничения запросов
+            memory: Память переводов (если None, каждый текст отправляется в сеть)
+            workers: Максимальное количество одновременных запросов к сервису перевода
+                (фактическое число подбирается автоматически по ответам сервиса)
+            max_rps: Максимум запросов в секунду на все файлы мода (0 - без ограничения)
+            max_retries: Сколько раз повторять запрос при перегрузке сервиса
+            rate_limiter: Общий ограничитель частоты запросов (если None, создается
+                свой с лимитом max_rps)
+            incremental: Переводить только новые и измененные строки, сохраняя
+                остальные переводы из предыдущего результата (по манифесту)
+            backend: Сервис перевода - имя (google, pseudo, http) или готовый экземпляр
+            backend_options: Параметры сервиса, если он задан именем (например, url)
+            resume: Продолжить прерванный перевод по журналу (переводы из журнала
+                повторно не запрашиваются)
+            fuzzy: Собирать переводы строк, отличающихся только числом, подстановкой
+                или словом из словаря, из перевода похожей строки
+            keep_existing: Сохранять переводы, которые уже есть в моде (ru_ru.json
+                рядом с en_us.json), и переводить только недостающие ключи;
+                готовые переводы заносятся в память переводов
+            output_store: Хранилище результатов: неизмененный .jar, уже переведенный
+                с теми же параметрами, не переводится повторно (если None, не используется)
+            progress: Канал событий хода перевода для интерфейса (если None, не используется)
+            cancel_token: Флаг отмены: перевод останавливается перед следующим запросом
+                с исключением TranslationCancelled, журнал сохраняется для --resume
         """
+        languages = parse_languages(target_lang)
+        if len(languages) > 1 and not isinstance(backend, str):
+            raise ValueError("Для нескольких языков сервис перевода задается именем")
         self.source_lang = source_lang
-        self.target_lang = target_lang
-        self.translator = GoogleTranslator(source=source_lang, target=target_lang)
+        self.target_lang = languages[0]
+        backend_name = backend
+        if isinstance(backend, str):
+            backend = create_backend(backend, source_lang, self.target_lang, **(backend_options or {}))
+        self.backend = backend
+        self.memory = memory
+        self.incremental = incremental
+        self.resume = resume
+        self.fuzzy = fuzzy
+        self.keep_existing = keep_existing
+        self.output_store = output_store
+        self.progress = progress
+        self.cancel_token = cancel_token
+        # Журнал текущего перевода (открывается в translate_mod / translate_jar_mod)
+        self.journal: Optional[TranslationJournal] = None
+        self.workers = max(1, workers)
+        self.max_retries = max_retries
+        self.rate_limiter = rate_limiter if rate_limiter is not None else TokenBucket(max_rps)
+        self.concurrency = AdaptiveConcurrency(self.workers)
+        # Переводчики на остальные языки: общие память, ограничитель частоты и число потоков
+        self.extra_targets = [
+            MinecraftModTranslator(source_lang, language, memory, workers, max_rps, max_retries,
+                                   self.rate_limiter, incremental, backend_name, backend_options,
+                                   resume, fuzzy, keep_existing, progress=progress, cancel_token=cancel_token)
+            for language in languages[1:]
+        ]
+        for extra in self.extra_targets:
+            extra.concurrency = self.concurrency
+        self.reset_stats()
+        
+    def reset_stats(self) -> None:
+        """Сбрасывает счетчики перед новым запуском"""
         self.translated_count = 0
         self.skipped_count = 0
-        
+        self.carried_count = 0
+        self.resumed_count = 0
+        self.kept_count = 0
+        self.files_processed = 0
+        self.metrics = RunMetrics()
+        for extra in self.extra_targets:
+            extra.reset_stats()
+            extra.metrics = self.metrics
+    
+    def emit(self, kind: str, count: int = 1) -> None:
+        """Отправляет событие хода перевода (см. progress), если канал задан"""
+        if self.progress is not None:
+            self.progress.emit(kind, count)
+    
+    def check_cancelled(self) -> None:
+        """
+        Raises:
+            TranslationCancelled: Если перевод остановлен (cancel_token)
+        """
+        if self.cancel_token is not None:
+            self.cancel_token.check()
+    
+    @property
+    def retry_count(self) -> int:
+        """Сколько раз запросы повторялись после перегрузки сервиса"""
+        return self.metrics.counters['retries']
+    
+    @property
+    def throttle_count(self) -> int:
+        """Сколько раз сервис сообщил о перегрузке"""
+        return self.metrics.counters['throttles']
+    
+    @property
+    def failed_count(self) -> int:
+        """Сколько запросов завершилось ошибкой"""
+        return self.metrics.counters['failures']
+    
+    @property
+    def targets(self) -> List['MinecraftModTranslator']:
+        """Переводчики на все целевые языки (основной - первый)"""
+        return [self] + self.extra_targets
+    
+    @property
+    def target_label(self) -> str:
+        """Все целевые языки через запятую (для заголовка журнала)"""
+        return ','.join(target.target_lang for target in self.targets)
+    
+    @property
+    def target_locale(self) -> str:
+        """Код языка файлов перевода (имя файла без расширения, например ru_ru)"""
+        return locale_for(self.target_lang)
+    
+    def set_journal(self, journal: Optional[TranslationJournal]) -> None:
+        """Назначает журнал перевода для всех целевых языков"""
+        for target in self.targets:
+            target.journal = journal
+    
     def find_lang_files(self, mod_path: Path) -> List[Path]:
         """
         Находит все файлы переводов в моде
@@ -37,32 +242,27 @@ class MinecraftModTranslator:
         Returns:
             Список путей к файлам переводов
         """
-        lang_files = []
-        
-        # Ищем файлы в стандартных местах:
+        # Ищем файлы в стандартных местах за один обход дерева:
         # - assets/*/lang/*.json (Forge/Fabric)
         # - lang/*.json (старые моды)
-        patterns = [
-            '**/assets/*/lang/*.json',
-            '**/lang/*.json',
-            '**/lang/*.lang',  # старые моды используют .lang
-        ]
-        
-        for pattern in patterns:
-            lang_files.extend(mod_path.rglob(pattern))
-        
-        # Фильтруем только файлы с английским языком или без указания языка
-        filtered_files = []
-        for file in lang_files:
-            if 'en_us.json' in str(file) or 'en_US.json' in str(file) or 'en.json' in str(file):
-                filtered_files.append(file)
-            elif 'lang' in str(file) and file.suffix == '.json':
-                # Если это единственный файл в папке lang, тоже переводим
-                parent = file.parent
-                if len(list(parent.glob('*.json'))) == 1:
-                    filtered_files.append(file)
+        return [lang_file.path for lang_file in discover_lang_files(mod_path, self.target_locale)]
+    
+    def output_config(self) -> Dict[str, Any]:
+        """
+        Параметры, от которых зависит результат перевода (для хранилища результатов)
         
-        return filtered_files
+        Returns:
+            Словарь с языками, сервисом перевода и версией правил отбора строк
+        """
+        return {
+            'source_lang': self.source_lang,
+            'target_langs': [target.target_lang for target in self.targets],
+            'backend': self.backend.name,
+            'backend_url': getattr(self.backend, 'url', None),
+            'rules': TRANSLATE_RULES_VERSION,
+            'fuzzy': self.fuzzy,
+            'keep_existing': self.keep_existing,
+        }
     
     def should_translate_value(self, value: str) -> bool:
         """
@@ -86,7 +286,7 @@ class MinecraftModTranslator:
             return False
         
         # Не переводим если это только числа или спецсимволы
-        if re.match(r'^[\d\s\W]+$', value):
+        if _NON_TEXT.match(value):
             return False
         
         # Не переводим очень короткие строки (обычно это коды)
@@ -95,6 +295,65 @@ class MinecraftModTranslator:
         
         return True
     
+    def _send_batch(self, texts: List[str]) -> Optional[List[str]]:
+        """
+        Отправляет один запрос к сервису перевода (без обращения к памяти)
+        
+        При перегрузке сервиса запрос повторяется с растущей паузой,
+        а число одновременных запросов уменьшается.
+        
+        Args:
+            texts: Строки запроса
+            
+        Returns:
+            Переводы строк или None, если сервис не принял запрос (пакет стоит разделить)
+            
+        Raises:
+            BatchFailed: Ошибка, не связанная с составом пакета (сеть, сбой или
+                перегрузка сервиса после всех повторов)
+        """
+        metrics = self.metrics
+        size = sum(len(text.encode('utf-8')) for text in texts)
+        attempt = 0
+        while True:
+            self.check_cancelled()
+            self.concurrency.acquire()
+            self.rate_limiter.acquire()
+            metrics.increment('requests')
+            metrics.increment('strings_sent', len(texts))
+            metrics.increment('bytes_sent', size)
+            started = time.monotonic()
+            try:
+                translated = self.backend.translate_batch(texts)
+            except Exception as e:
+                congested = is_congestion_error(e)
+                if congested:
+                    self.concurrency.release(AdaptiveConcurrency.CONGESTED)
+                    metrics.increment('throttles')
+                else:
+                    self.concurrency.release(AdaptiveConcurrency.ERROR)
+                
+                if not congested or attempt >= self.max_retries:
+                    label = f"'{texts[0]}'" if len(texts) == 1 else f"пакета из {len(texts)} строк"
+                    print(f"\nОшибка при переводе {label}: {e}")
+                    metrics.increment('failures')
+                    if not congested and is_payload_error(e):
+                        return None
+                    raise BatchFailed(str(e)) from e
+                
+                metrics.increment('retries')
+                if self.cancel_token is not None:
+                    self.cancel_token.sleep(backoff_delay(attempt))
+                else:
+                    time.sleep(backoff_delay(attempt))
+                attempt += 1
+                continue
+            
+            latency = time.monotonic() - started
+            metrics.observe_latency(latency)
+            self.concurrency.release(AdaptiveConcurrency.OK, latency)
+            return translated
+    
     def translate_text(self, text: str) -> Optional[str]:
         """
         Переводит текст
@@ -105,78 +364,810 @@ class MinecraftModTranslator:
         Returns:
             Переведенный текст или None в случае ошибки
         """
-        try:
-            # Обрабатываем форматирование Minecraft
-            # Сохраняем цветовые коды и форматирование
-            translated = self.translator.translate(text)
-            return translated
-        except Exception as e:
-            print(f"\nОшибка при переводе '{text}': {e}")
+        # Сначала ищем перевод в памяти, чтобы не обращаться к сети
+        if self.memory is not None:
+            cached = self.memory.get(self.source_lang, self.target_lang, text)
+            if cached is not None:
+                self.metrics.increment('cache_hits')
+                return cached
+            self.metrics.increment('cache_misses')
+        
+        if self.fuzzy:
+            # Похожую строку из памяти переводов можно взять как образец
+            return self._translate_templated([text], "Перевод", None).get(text)
+        
+        # Цветовые коды и подстановки защищаются метками (см. _translate_pending)
+        return self._translate_pending([text], "Перевод", None).get(text)
+    
+    def translate_many(self, texts: List[str], desc: str = "Перевод",
+                       on_result: Optional[Callable[[Dict[str, str]], None]] = None) -> Dict[str, Optional[str]]:
+        """
+        Переводит набор строк пакетными запросами
+        
+        Повторяющиеся строки переводятся один раз, строки из памяти переводов
+        в сеть не отправляются, остальные упаковываются в запросы как можно
+        ближе к лимиту сервиса. Строки одного шаблона ("Tier 1 Upgrade",
+        "Tier 2 Upgrade") собираются из перевода одной из них (см. fuzzy).
+        
+        Args:
+            texts: Строки для перевода
+            desc: Подпись для индикатора прогресса
+            on_result: Вызывается с каждой порцией готовых переводов
+                {исходная строка: перевод} сразу по их получении
+            
+        Returns:
+            Словарь {исходная строка: перевод или None в случае ошибки}
+        """
+        results: Dict[str, Optional[str]] = {}
+        pending = []
+        unique = dict.fromkeys(texts)
+        for text in unique:
+            if self.memory is not None:
+                cached = self.memory.get(self.source_lang, self.target_lang, text)
+                if cached is not None:
+                    results[text] = cached
+                    continue
+            pending.append(text)
+        if self.memory is not None:
+            self.metrics.increment('cache_hits', len(results))
+            self.metrics.increment('cache_misses', len(pending))
+        
+        reported = 0
+        if self.progress is not None:
+            self.emit(STRINGS_TOTAL, len(unique))
+            if self.memory is not None:
+                self.emit(CACHE_HITS, len(results))
+                self.emit(CACHE_MISSES, len(pending))
+            report_to = on_result
+            
+            def on_result(batch: Dict[str, str]) -> None:
+                # Готовые строки этого набора (в пакетах бывают и слова для шаблонов)
+                nonlocal reported
+                done = sum(1 for text in batch if text in unique)
+                reported += done
+                self.emit(STRINGS_DONE, done)
+                if report_to is not None:
+                    report_to(batch)
+        
+        if on_result is not None and results:
+            on_result(dict(results))
+        
+        if self.fuzzy:
+            results.update(self._translate_templated(pending, desc, on_result))
+        else:
+            results.update(self._translate_pending(pending, desc, on_result))
+        if self.progress is not None:
+            # Строки, которые не удалось перевести, тоже обработаны
+            self.emit(STRINGS_DONE, max(0, len(unique) - reported))
+        return results
+    
+    def _translate_pending(self, texts: List[str], desc: str,
+                           on_result: Optional[Callable[[Dict[str, str]], None]]) -> Dict[str, Optional[str]]:
+        """
+        Отправляет строки в сервис перевода пакетами (без обращения к памяти)
+        и сохраняет полученные переводы в память
+        
+        Подстановки и коды форматирования заменяются метками (см. placeholders).
+        Строки, в переводе которых подстановки испорчены, запрашиваются повторно
+        по одной (PLACEHOLDER_RETRIES раз), а если это не помогло - остаются
+        без перевода.
+        
+        Args:
+            texts: Уникальные строки для перевода
+            desc: Подпись для индикатора прогресса
+            on_result: Вызывается с каждой порцией готовых переводов
+            
+        Returns:
+            Словарь {исходная строка: перевод или None в случае ошибки}
+        """
+        results: Dict[str, Optional[str]] = {}
+        if not texts:
+            return results
+        
+        # Строки с метками вместо подстановок; разные строки могут дать
+        # одинаковую строку с метками ("%s apples" и "%d apples"), она
+        # отправляется один раз
+        masked: Dict[str, Tuple[str, List[str]]] = {text: mask(text) for text in texts}
+        sources: Dict[str, List[str]] = {}
+        for text, (masked_text, _parts) in masked.items():
+            sources.setdefault(masked_text, []).append(text)
+        
+        delimiter = self.backend.batch_delimiter
+        packable = [text for text in sources if can_batch(text, delimiter)]
+        batches = pack_batches(packable, self.backend.max_batch_chars,
+                               self.backend.max_batch_items, delimiter)
+        # Строки с разделителем внутри отправляются по одной
+        batches.extend([text] for text in sources if not can_batch(text, delimiter))
+        
+        def restore(batch: Dict[str, Optional[str]]) -> Tuple[Dict[str, str], List[str]]:
+            """Возвращает подстановки; (готовые переводы, строки с испорченными подстановками)"""
+            done: Dict[str, str] = {}
+            broken: List[str] = []
+            for masked_text, translated in batch.items():
+                for text in sources[masked_text]:
+                    value = unmask(translated, masked[text][1]) if translated else None
+                    if value and placeholders_match(text, value):
+                        done[text] = value
+                    elif translated:
+                        broken.append(text)
+                    else:
+                        results.setdefault(text, None)
+            return done, broken
+        
+        def accept(done: Dict[str, str]) -> None:
+            results.update(done)
+            if self.memory is not None:
+                for text, translated in done.items():
+                    self.memory.put(self.source_lang, self.target_lang, text, translated)
+            if on_result is not None and done:
+                on_result(done)
+        
+        # Результаты собираются по исходной строке, поэтому порядок
+        # завершения запросов не влияет на итоговый файл
+        broken: List[str] = []
+        with self.metrics.phase('network'), ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(translate_packed, batch, self._send_batch) for batch in batches]
+            for future in tqdm(as_completed(futures), total=len(futures), desc=desc, leave=False):
+                done, batch_broken = restore(future.result())
+                accept(done)
+                broken.extend(batch_broken)
+            
+            # Повторно запрашиваются только строки с испорченными подстановками,
+            # по одной (в пакете сервис чаще путает метки); запросы проходят
+            # через общие ограничения частоты и числа потоков
+            for _attempt in range(PLACEHOLDER_RETRIES):
+                if not broken:
+                    break
+                self.metrics.increment('placeholder_retries', len(broken))
+                retry = list(dict.fromkeys(masked[text][0] for text in broken))
+                broken = []
+                for future in as_completed([executor.submit(translate_packed, [text], self._send_batch)
+                                            for text in retry]):
+                    done, batch_broken = restore(future.result())
+                    accept({text: value for text, value in done.items() if text not in results})
+                    broken.extend(batch_broken)
+        
+        if broken:
+            self.metrics.increment('placeholder_failures', len(broken))
+            for text in broken:
+                results[text] = None
+        return results
+    
+    def _translate_templated(self, texts: List[str], desc: str,
+                             on_result: Optional[Callable[[Dict[str, str]], None]]) -> Dict[str, Optional[str]]:
+        """
+        Переводит строки, собирая строки одного шаблона из перевода образца
+        
+        Образец для строки - похожая строка из памяти переводов (тот же шаблон)
+        или первая строка того же шаблона в наборе. В сеть отправляются образцы,
+        строки без шаблона и еще не переведенные слова из словаря, которыми
+        строки отличаются от образцов. Строки, перевод которых не удалось
+        надежно собрать, отправляются вторым запросом.
+        
+        Args:
+            texts: Уникальные строки, которых нет в памяти переводов
+            desc: Подпись для индикатора прогресса
+            on_result: Вызывается с каждой порцией готовых переводов
+            
+        Returns:
+            Словарь {исходная строка: перевод или None в случае ошибки}
+        """
+        with self.metrics.phase('filter'):
+            templates = {text: make_template(text) for text in texts}
+            # Образец каждой строки: исходная строка образца
+            models: Dict[str, str] = {}
+            # Шаблоны и переводы образцов, найденных в памяти переводов
+            known_templates: Dict[str, Template] = {}
+            known: Dict[str, str] = {}
+            heads: Dict[str, str] = {}
+            first = []
+            for text in texts:
+                template = templates[text]
+                if template is None:
+                    first.append(text)
+                    continue
+                model = self._memory_model(template)
+                if model is not None:
+                    source, translation, source_template = model
+                    known[source] = translation
+                    known_templates[source] = source_template
+                    models[text] = source
+                elif template.key in heads:
+                    models[text] = heads[template.key]
+                else:
+                    heads[template.key] = text
+                    first.append(text)
+            
+            # Слова из словаря, которыми строки отличаются от образцов:
+            # {слово в нижнем регистре: слово как в строке}
+            words: Dict[str, str] = {}
+            for text, model in models.items():
+                model_template = known_templates.get(model) or templates[model]
+                for (kind, old), (_kind, new) in zip(model_template.slots, templates[text].slots):
+                    if kind == SLOT_WORD and old.lower() != new.lower():
+                        words.setdefault(old.lower(), old)
+                        words.setdefault(new.lower(), new)
+            terms: Dict[str, str] = {}
+            if self.memory is not None:
+                for word, written in words.items():
+                    cached = self.memory.get(self.source_lang, self.target_lang, written)
+                    if cached:
+                        terms[word] = cached
+        
+        unseen = [words[word] for word in sorted(words) if word not in terms]
+        translated = self._translate_pending(first + [word for word in unseen if word not in templates],
+                                             desc, on_result)
+        terms.update({word.lower(): translated[word] for word in unseen if translated.get(word)})
+        results = {text: translated.get(text) for text in first}
+        
+        rebuilt: Dict[str, str] = {}
+        second = []
+        for text, model in models.items():
+            model_translation = known.get(model) or results.get(model)
+            value = None
+            if model_translation:
+                value = rebuild_translation(known_templates.get(model) or templates[model],
+                                            model_translation, templates[text], terms)
+            if value:
+                # Пробелы по краям - как в исходной строке
+                leading = text[:len(text) - len(text.lstrip())]
+                trailing = text[len(text.rstrip()):]
+                rebuilt[text] = leading + value.strip() + trailing
+            else:
+                second.append(text)
+        
+        if rebuilt:
+            self.metrics.increment('template_hits', len(rebuilt))
+            if self.memory is not None:
+                for text, value in rebuilt.items():
+                    self.memory.put(self.source_lang, self.target_lang, text, value)
+            if on_result is not None:
+                on_result(dict(rebuilt))
+        results.update(rebuilt)
+        results.update(self._translate_pending(second, desc, on_result))
+        return results
+    
+    def _memory_model(self, template: Template) -> Optional[Tuple[str, str, Template]]:
+        """
+        Ищет в памяти переводов строку-образец с тем же шаблоном
+        
+        Args:
+            template: Шаблон строки
+            
+        Returns:
+            (исходная строка, перевод, шаблон) образца, который отличается от
+            строки меньшим числом слов из словаря, или None
+        """
+        if self.memory is None:
             return None
+        best = None
+        best_words = None
+        for source, translation in self.memory.find_template(self.source_lang, self.target_lang, template.key):
+            source_template = make_template(source)
+            if source_template is None or len(source_template.slots) != len(template.slots):
+                continue
+            differing = sum(
+                1 for (kind, old), (_kind, new) in zip(source_template.slots, template.slots)
+                if kind == SLOT_WORD and old.lower() != new.lower()
+            )
+            if best_words is None or differing < best_words:
+                best, best_words = (source, translation, source_template), differing
+        return best
+    
+    def is_translatable_leaf(self, path: JsonPath, value: str, file_format: str = 'json') -> bool:
+        """
+        Проверяет, относится ли строковое значение JSON к переводимому тексту
+        
+        В lang файлах переводятся значения ключей верхнего уровня, в книгах
+        Patchouli - только текстовые поля (name, title, text, ...) на любой глубине.
+        
+        Args:
+            path: Путь значения от корня документа
+            value: Значение
+            file_format: Формат файла (json - lang файл, book - книга Patchouli)
+            
+        Returns:
+            True если значение - текст для перевода
+        """
+        if file_format != 'book':
+            return len(path) == 1 and isinstance(path[0], str)
+        if not path or path[-1] not in BOOK_TEXT_KEYS:
+            return False
+        # Ключи переводов и идентификаторы (book.mod.entry, mod:item) не переводим
+        return bool(re.search(r'\s', value)) or not re.search(r'[.:]', value)
+    
+    def _translate_leaves(self, leaves: Dict[str, str], desc: str, previous: Dict,
+                          previous_hashes: Dict[str, str], file_id: Optional[str],
+                          journaled: Dict[str, Tuple[str, str]],
+                          existing: Optional[Dict[str, str]] = None,
+                          existing_hashes: Optional[Dict[str, str]] = None,
+                          kept_keys: Optional[Set[str]] = None) -> Dict[str, str]:
+        """
+        Переводит строки файла с учетом предыдущего перевода и журнала
+        
+        Args:
+            leaves: Исходные строки {ключ: строка}; ключ - ключ lang файла
+                или путь значения во вложенном JSON (/pages/0/text)
+            desc: Подпись для индикатора прогресса
+            previous: Предыдущий перевод {ключ: строка}
+            previous_hashes: Хэши исходных строк предыдущего перевода
+            file_id: Имя файла внутри мода для журнала (если None, журнал не ведется)
+            journaled: Записи журнала этого файла {ключ: (хэш, перевод)}
+            existing: Имеющийся в моде перевод {ключ: перевод}
+            existing_hashes: Хэши исходных строк сохраненных ключей из манифеста
+                имеющегося перевода (None - перевод без манифеста)
+            kept_keys: Множество, в которое добавляются ключи, взятые из existing
+            
+        Returns:
+            Словарь {ключ: итоговая строка} для всех leaves
+            (непереведенные строки остаются исходными)
+        """
+        with self.metrics.phase('filter'):
+            # Переводы неизменившихся строк (в том числе исправленные вручную) сохраняем
+            carried = {}
+            for key, value in leaves.items():
+                if (key in previous and isinstance(previous[key], str)
+                        and previous_hashes.get(key) == hash_value(value)):
+                    carried[key] = previous[key]
+            
+            # Переводы, которые уже есть в моде (сделаны людьми)
+            kept = {}
+            if existing:
+                verified = existing_translations(leaves, existing, existing_hashes)
+                if kept_keys is not None:
+                    kept_keys.update(verified)
+                kept = {key: value for key, value in verified.items() if key not in carried}
+                if kept and self.memory is not None:
+                    self.memory.put_many(self.source_lang, self.target_lang,
+                                         {leaves[key]: value for key, value in kept.items()})
+            
+            # Переводы, полученные до сбоя прошлого запуска
+            resumed = {}
+            for key, value in leaves.items():
+                entry = journaled.get(key)
+                if key not in carried and key not in kept and entry is not None and entry[0] == hash_value(value):
+                    resumed[key] = entry[1]
+            
+            keys_by_text: Dict[str, List[str]] = {}
+            for key, value in leaves.items():
+                if (key not in carried and key not in kept and key not in resumed
+                        and self.should_translate_value(value)):
+                    keys_by_text.setdefault(value, []).append(key)
+        
+        on_result = None
+        journal = self.journal if file_id is not None else None
+        if journal is not None:
+            def on_result(batch: Dict[str, str]) -> None:
+                journal.record(file_id, {
+                    key: (hash_value(text), translated)
+                    for text, translated in batch.items() for key in keys_by_text.get(text, ())
+                })
+        
+        translations = self.translate_many(list(keys_by_text), desc=desc, on_result=on_result)
+        
+        values = {}
+        for key, value in leaves.items():
+            if key in carried:
+                values[key] = carried[key]
+                self.carried_count += 1
+            elif key in kept:
+                values[key] = kept[key]
+                self.kept_count += 1
+            elif key in resumed:
+                values[key] = resumed[key]
+                self.resumed_count += 1
+            elif self.should_translate_value(value):
+                translated = translations.get(value)
+                if translated:
+                    values[key] = translated
+                    self.translated_count += 1
+                else:
+                    values[key] = value
+                    self.skipped_count += 1
+            else:
+                values[key] = value
+        return values
+    
+    def _journaled(self, file_id: Optional[str]) -> Dict[str, Tuple[str, str]]:
+        """Записи журнала для файла (пустой словарь, если журнал не ведется)"""
+        if self.journal is None or file_id is None:
+            return {}
+        return self.journal.entries(file_id)
+    
+    def translate_data(self, data: Dict, desc: str = "Перевод",
+                       previous: Optional[Dict] = None,
+                       previous_hashes: Optional[Dict[str, str]] = None,
+                       file_id: Optional[str] = None, existing: Optional[Dict] = None) -> Dict:
+        """
+        Переводит словарь с переводами (содержимое lang файла)
+        
+        Args:
+            data: Исходный словарь {ключ: значение}
+            desc: Подпись для индикатора прогресса
+            previous: Предыдущий перевод этого файла (для инкрементального режима)
+            previous_hashes: Хэши исходных строк, по которым был сделан предыдущий перевод
+            file_id: Имя файла внутри мода для журнала (если None, журнал не ведется)
+            existing: Имеющийся в моде перевод {ключ: перевод} (ключи сохраняются,
+                если включен keep_existing)
+            
+        Returns:
+            Словарь с тем же порядком ключей и переведенными значениями
+            (ключи, которых нет в исходном файле, не попадают в результат)
+        """
+        leaves = {key: value for key, value in data.items() if isinstance(value, str)}
+        values = self._translate_leaves(leaves, desc, previous or {}, previous_hashes or {},
+                                        file_id, self._journaled(file_id),
+                                        existing if self.keep_existing else None)
+        return {key: values.get(key, value) for key, value in data.items()}
+    
+    def translate_stream(self, source: TextIO, output: TextIO, desc: str = "Перевод",
+                         previous: Optional[Dict] = None,
+                         previous_hashes: Optional[Dict[str, str]] = None,
+                         file_id: Optional[str] = None, file_format: str = 'json') -> Dict[str, str]:
+        """
+        Переводит файл переводов потоком, не загружая его в память целиком
+        
+        Файл читается порциями (JSON) или построчно (.lang); переводимые строки
+        собираются в окна по STREAM_WINDOW строк, каждое окно переводится пакетными
+        запросами и сразу записывается в output в исходном порядке ключей.
+        В памяти одновременно находится только одно окно.
+        
+        Args:
+            source: Исходный файл (текстовый поток; для .lang - открытый с newline='')
+            output: Поток для записи перевода
+            desc: Подпись для индикатора прогресса
+            previous: Предыдущий перевод {ключ: строка} (для инкрементального режима)
+            previous_hashes: Хэши исходных строк предыдущего перевода
+            file_id: Имя файла внутри мода для журнала (если None, журнал не ведется)
+            file_format: Формат файла (json - lang файл, book - книга Patchouli,
+                lang - .lang файл старых версий)
+            
+        Returns:
+            Хэши исходных строк {ключ: хэш} для манифеста
+            
+        Raises:
+            ValueError: Документ не является корректным JSON
+        """
+        target = StreamTarget(self, output, previous or {}, previous_hashes or {}, file_id)
+        return self.translate_stream_targets(source, [target], desc, file_format)
+    
+    def translate_stream_targets(self, source: TextIO, targets: List[StreamTarget],
+                                 desc: str = "Перевод", file_format: str = 'json') -> Dict[str, str]:
+        """
+        Переводит файл переводов потоком сразу на несколько языков
+        
+        Файл разбирается и фильтруется один раз; каждое окно строк переводится
+        на все языки параллельно и записывается в поток каждого языка.
+        
+        Args:
+            source: Исходный файл (текстовый поток; для .lang - открытый с newline='')
+            targets: Языки перевода (переводчик, поток записи, предыдущий перевод)
+            desc: Подпись для индикатора прогресса
+            file_format: Формат файла (json, book или lang)
+            
+        Returns:
+            Хэши исходных строк {ключ: хэш} для манифеста
+            
+        Raises:
+            ValueError: Документ не является корректным JSON
+        """
+        writes: List[Callable[[Any, Optional[str]], None]] = []
+        # Ключи исходного файла: ключи имеющегося перевода, которых в нем нет,
+        # дописываются в конец файла, чтобы не потерять готовый перевод
+        source_keys: Set[str] = set()
+        
+        def extra_keys(target: StreamTarget) -> List[Tuple[str, str]]:
+            # Ключи, удаленные из исходного файла после прошлого перевода программой, не сохраняются
+            if (file_format == 'book' or not target.translator.keep_existing
+                    or target.existing_hashes is not None):
+                return []
+            return [(key, value) for key, value in target.existing.items()
+                    if key not in source_keys and not key.startswith('/')]
+        
+        if file_format == 'lang':
+            # Последняя строка исходного файла (окончание и режим escape-последовательностей)
+            # и окончание строк в файле
+            last = LangLine('', None, None, '', False)
+            newline = '\n'
+            
+            def items() -> Iterator[Tuple[Any, Optional[str], Optional[str]]]:
+                nonlocal last, newline
+                for line in iter_lang_lines(source):
+                    last = line
+                    newline = line.ending or newline
+                    if line.key is not None:
+                        source_keys.add(line.key)
+                    yield line, line.key, line.value
+            
+            for target in targets:
+                def write(line: LangLine, value: Optional[str], output: TextIO = target.output) -> None:
+                    output.write(line.raw if value is None else line.format(value))
+                writes.append(write)
+        else:
+            def items() -> Iterator[Tuple[Any, Optional[str], Optional[str]]]:
+                for event, value, path in iter_paths(iter_events(source)):
+                    if event == MAP_KEY and len(path) == 1:
+                        source_keys.add(value)
+                    if event == STRING and self.is_translatable_leaf(path, value, file_format):
+                        yield (event, value), leaf_id(path), value
+                    else:
+                        yield (event, value), None, None
+            
+            for target in targets:
+                def write(token: Tuple[str, Any], value: Optional[str], target: StreamTarget = target,
+                          writer: JsonStreamWriter = JsonStreamWriter(target.output)) -> None:
+                    if token[0] == END_MAP and writer.depth == 1:
+                        for key, translated in extra_keys(target):
+                            writer.write(MAP_KEY, key)
+                            writer.write(STRING, translated)
+                    writer.write(token[0], token[1] if value is None else value)
+                writes.append(write)
+        
+        hashes = self._translate_windows(items(), targets, writes, desc)
+        if file_format == 'lang':
+            for target in targets:
+                extras = extra_keys(target)
+                if extras and last.raw and not last.ending:
+                    target.output.write(newline)
+                for key, translated in extras:
+                    target.output.write(LangLine('', key, None, newline, last.escapes).format(translated))
+        return hashes
+    
+    def _translate_windows(self, items: Iterator[Tuple[Any, Optional[str], Optional[str]]],
+                           targets: List[StreamTarget],
+                           writes: List[Callable[[Any, Optional[str]], None]], desc: str) -> Dict[str, str]:
+        """
+        Переводит поток элементов файла окнами и передает их на запись по порядку
+        
+        Args:
+            items: Элементы файла (элемент, ключ, строка); ключ и строка - None
+                для элементов без переводимого текста
+            targets: Языки перевода
+            writes: Функции записи для каждого языка; второй аргумент - итоговая
+                строка переводимого элемента или None
+            desc: Подпись для индикатора прогресса
+            
+        Returns:
+            Хэши исходных строк для манифеста
+        """
+        journaled = [target.translator._journaled(target.file_id) for target in targets]
+        hashes: Dict[str, str] = {}
+        # Элементы окна: (элемент, ключ переводимой строки или None)
+        buffer: List[Tuple[Any, Optional[str]]] = []
+        leaves: Dict[str, str] = {}
+        
+        def translate(index: int) -> Dict[str, str]:
+            target = targets[index]
+            label = desc if len(targets) == 1 else f"{desc} [{target.translator.target_lang}]"
+            translator = target.translator
+            return translator._translate_leaves(leaves, label, target.previous, target.previous_hashes,
+                                                target.file_id, journaled[index],
+                                                target.existing if translator.keep_existing else None,
+                                                target.existing_hashes, target.kept_keys)
+        
+        def flush() -> None:
+            self.check_cancelled()
+            if not leaves:
+                results = [{} for _target in targets]
+            elif len(targets) == 1:
+                results = [translate(0)]
+            else:
+                # Языки переводятся одновременно через общие ограничения запросов
+                with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+                    results = list(executor.map(translate, range(len(targets))))
+            with self.metrics.phase('write'):
+                for write, values in zip(writes, results):
+                    for item, key in buffer:
+                        write(item, None if key is None else values[key])
+            buffer.clear()
+            leaves.clear()
+        
+        # Разбор идет вперемешку с переводом, поэтому его время считаем вручную
+        parse_seconds = 0.0
+        started = time.perf_counter()
+        for item, key, value in items:
+            if key is not None:
+                leaves[key] = value
+                hashes[key] = hash_value(value)
+            buffer.append((item, key))
+            if len(leaves) >= STREAM_WINDOW or len(buffer) >= STREAM_WINDOW * 4:
+                parse_seconds += time.perf_counter() - started
+                flush()
+                started = time.perf_counter()
+        parse_seconds += time.perf_counter() - started
+        self.metrics.add_time('parse', parse_seconds)
+        flush()
+        return hashes
     
-    def translate_json_file(self, file_path: Path, output_path: Optional[Path] = None) -> bool:
+    def load_previous(self, output_text: Optional[str], manifest_text: Optional[str],
+                      file_format: str = 'json') -> Tuple[Dict, Dict[str, str]]:
         """
-        Переводит JSON файл с переводами
+        Загружает предыдущий перевод и его манифест для инкрементального режима
+        
+        Args:
+            output_text: Содержимое ранее созданного файла перевода (None если его нет)
+            manifest_text: Содержимое манифеста (None если его нет)
+            file_format: Формат файла перевода (json, book или lang)
+            
+        Returns:
+            Кортеж (предыдущий перевод, хэши исходных строк); пустые словари,
+            если инкрементальный режим выключен или данных нет
+        """
+        if not self.incremental or not output_text:
+            return {}, {}
+        hashes = load_manifest(manifest_text, self.source_lang, self.target_lang)
+        if not hashes:
+            return {}, {}
+        # Строки предыдущего перевода - по тем же ключам, что и в манифесте
+        previous = read_values(output_text, file_format)
+        if not previous:
+            return {}, {}
+        return previous, hashes
+    
+    def dump_manifest(self, data: Dict) -> str:
+        """
+        Создает манифест исходных строк для сохранения рядом с переводом
+        
+        Args:
+            data: Исходный словарь {ключ: значение}
+            
+        Returns:
+            Текст манифеста
+        """
+        return dump_manifest(source_hashes(data), self.source_lang, self.target_lang)
+    
+    def target_filename(self, filename: str) -> str:
+        """
+        Возвращает имя файла перевода для исходного lang файла
+        
+        Args:
+            filename: Имя исходного файла (например, en_us.json)
+            
+        Returns:
+            Имя файла на целевом языке (например, ru_ru.json)
+        """
+        return target_filename(filename, self.target_locale)
+    
+    def translate_json_file(self, file_path: Path, output_path: Optional[Path] = None,
+                            file_id: Optional[str] = None, file_format: str = 'json') -> bool:
+        """
+        Переводит файл с переводами (JSON или .lang)
+        
+        Файл читается и записывается потоком, поэтому большие файлы и вложенные
+        документы (книги Patchouli) не загружаются в память целиком. Результат
+        записывается атомарно: при сбое прежний файл перевода остается нетронутым.
         
         Args:
             file_path: Путь к исходному файлу
             output_path: Путь для сохранения (если None, создается рядом с исходным)
+            file_id: Имя файла внутри мода для журнала перевода
+            file_format: Формат файла (json - lang файл, book - книга Patchouli,
+                lang - .lang файл старых версий)
             
         Returns:
             True если перевод успешен, False иначе
         """
         try:
-            # Читаем исходный файл
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Определяем путь для сохранения
-            if output_path is None:
-                # Создаем русскую версию файла
-                parent = file_path.parent
-                filename = file_path.name
-                
-                # Заменяем en_us на ru_ru или добавляем ru_ru
-                if 'en_us' in filename.lower():
-                    filename = filename.lower().replace('en_us', 'ru_ru')
-                elif 'en_US' in filename:
-                    filename = filename.replace('en_US', 'ru_RU')
-                elif 'en.json' in filename.lower():
-                    filename = filename.lower().replace('en.json', 'ru_ru.json')
-                else:
-                    filename = 'ru_ru.json'
-                
-                output_path = parent / filename
-            
-            # Переводим данные
-            translated_data = {}
-            for key, value in tqdm(data.items(), desc=f"Перевод {file_path.name}", leave=False):
-                if isinstance(value, str) and self.should_translate_value(value):
-                    translated = self.translate_text(value)
-                    if translated:
-                        translated_data[key] = translated
-                        self.translated_count += 1
-                    else:
-                        translated_data[key] = value
-                        self.skipped_count += 1
-                else:
-                    translated_data[key] = value
+            # Определяем путь для сохранения на каждый язык
+            output_paths = self._output_paths(file_path, output_path, file_format)
+            # Переводы, которые уже лежат в моде рядом с исходным файлом
+            existing_paths = self._output_paths(file_path, None, file_format)
             
-            # Сохраняем переведенный файл
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(translated_data, f, ensure_ascii=False, indent=2)
+            # В инкрементальном режиме берем предыдущий перевод и его манифест
+            targets = []
+            newline = '' if file_format == 'lang' else None
+            with ExitStack() as stack:
+                source = stack.enter_context(open(file_path, 'r', encoding='utf-8-sig', newline=newline))
+                for translator, path, existing_path in zip(self.targets, output_paths, existing_paths):
+                    manifest_path = path.with_name(path.name + MANIFEST_SUFFIX)
+                    previous, previous_hashes = {}, {}
+                    if self.incremental and path.exists() and manifest_path.exists():
+                        previous, previous_hashes = translator.load_previous(
+                            path.read_text(encoding='utf-8-sig'),
+                            manifest_path.read_text(encoding='utf-8'),
+                            file_format
+                        )
+                    existing, existing_hashes = {}, None
+                    if self.keep_existing and existing_path.is_file():
+                        existing, existing_hashes = translator._read_existing(existing_path, path, file_format)
+                    # Перевод пишется во временный файл; в .lang окончания строк сохраняются как в исходном
+                    temp_path = stack.enter_context(atomic_path(path))
+                    output = stack.enter_context(open(temp_path, 'w', encoding='utf-8', newline=newline))
+                    target_id = file_id
+                    if file_id is not None and translator is not self:
+                        target_id = f"{translator.target_locale}/{file_id}"
+                    targets.append(StreamTarget(translator, output, previous, previous_hashes, target_id,
+                                                existing, existing_hashes))
+                
+                hashes = self.translate_stream_targets(source, targets, desc=f"Перевод {file_path.name}",
+                                                       file_format=file_format)
+            # Манифест пишется всегда: по нему следующий запуск отличает сохраненный
+            # перевод мода от машинного перевода программы
+            with self.metrics.phase('write'):
+                for target, path in zip(targets, output_paths):
+                    translator = target.translator
+                    atomic_write_text(path.with_name(path.name + MANIFEST_SUFFIX),
+                                      dump_manifest(hashes, translator.source_lang, translator.target_lang,
+                                                    target.kept_keys))
             
             return True
             
-        except json.JSONDecodeError as e:
-            print(f"\nОшибка парсинга JSON в файле {file_path}: {e}")
+        except ValueError as e:
+            print(f"\nОшибка парсинга файла {file_path}: {e}")
             return False
+        except TranslationCancelled:
+            raise
         except Exception as e:
             print(f"\nОшибка при обработке файла {file_path}: {e}")
             return False
     
-    def translate_mod(self, mod_path: str, output_path: Optional[str] = None) -> Dict[str, int]:
+    def _read_existing(self, existing_path: Path, output_path: Path,
+                       file_format: str) -> Tuple[Dict[str, str], Optional[Dict[str, str]]]:
+        """
+        Читает имеющийся перевод, лежащий в моде рядом с исходным файлом
+        
+        Если рядом с переводом есть манифест, перевод записан программой, и из
+        него берутся только ключи, сохраненные из перевода мода. Файл без
+        манифеста на месте результата не читается: это может быть прежний
+        машинный перевод, а не перевод мода.
+        
+        Args:
+            existing_path: Путь к имеющемуся переводу
+            output_path: Путь, куда будет записан перевод
+            file_format: Формат файла (json, book или lang)
+            
+        Returns:
+            Кортеж (перевод {ключ: перевод}, хэши исходных строк сохраненных
+            ключей или None, если перевод поставлен с модом)
+        """
+        manifest_path = existing_path.with_name(existing_path.name + MANIFEST_SUFFIX)
+        try:
+            if manifest_path.is_file():
+                kept_hashes = load_kept(manifest_path.read_text(encoding='utf-8'),
+                                        self.source_lang, self.target_lang)
+                if not kept_hashes:
+                    return {}, kept_hashes
+                existing = read_values(existing_path.read_text(encoding='utf-8-sig'), file_format)
+                return {key: value for key, value in existing.items() if key in kept_hashes}, kept_hashes
+            if existing_path == output_path:
+                print(f"\nПеревод {existing_path} без манифеста будет заменен: "
+                      f"нельзя проверить, что он сделан для текущих исходных строк")
+                return {}, None
+            return read_values(existing_path.read_text(encoding='utf-8-sig'), file_format), None
+        except UnicodeDecodeError as e:
+            print(f"\nНе удалось прочитать имеющийся перевод {existing_path}: {e}")
+            return {}, None
+    
+    def _output_paths(self, file_path: Path, output_path: Optional[Path], file_format: str) -> List[Path]:
+        """
+        Пути файлов перевода на каждый целевой язык
+        
+        Args:
+            file_path: Путь к исходному файлу
+            output_path: Путь для основного языка (если None, рядом с исходным)
+            file_format: Формат файла (json, book или lang)
+            
+        Returns:
+            Пути в порядке self.targets
+        """
+        paths = []
+        for translator in self.targets:
+            if translator is self and output_path is not None:
+                paths.append(Path(output_path))
+                continue
+            # Остальные языки - рядом с основным (или исходным) файлом
+            base = Path(output_path) if output_path is not None else file_path
+            if file_format == 'book':
+                # Страницы книги лежат в папке языка: en_us/... -> ru_ru/...
+                try:
+                    paths.append(Path(book_target_path(str(base), translator.target_locale)))
+                except ValueError:
+                    paths.append(Path(book_target_path(str(file_path), translator.target_locale)))
+            else:
+                paths.append(base.parent / translator.target_filename(file_path.name))
+        return paths
+    
+    def translate_mod(self, mod_path: str, output_path: Optional[str] = None) -> Dict[str, Any]:
         """
         Переводит все файлы переводов в моде
         
@@ -192,36 +1183,80 @@ class MinecraftModTranslator:
             raise ValueError(f"Путь к моде не существует: {mod_path}")
         
         # Сбрасываем счетчики
-        self.translated_count = 0
-        self.skipped_count = 0
+        self.reset_stats()
         
         # Находим все файлы переводов
-        lang_files = self.find_lang_files(mod_path)
+        with self.metrics.phase('discovery'):
+            lang_files = [lang_file for lang_file in discover_lang_files(mod_path, self.target_locale)
+                          if lang_file.format in ('json', 'book', 'lang')]
         
         if not lang_files:
             print(f"Файлы переводов не найдены в {mod_path}")
-            return {
-                'translated': 0,
-                'skipped': 0,
-                'files_processed': 0
-            }
+            return self.stats()
         
         print(f"Найдено {len(lang_files)} файлов переводов")
+        self.emit(FILES_TOTAL, len(lang_files))
         
-        # Переводим каждый файл
-        for lang_file in tqdm(lang_files, desc="Обработка файлов"):
-            if output_path:
-                # Если указан выходной путь, сохраняем туда с сохранением структуры
-                relative_path = lang_file.relative_to(mod_path)
-                output_file = Path(output_path) / relative_path
-                self.translate_json_file(lang_file, output_file)
-            else:
-                self.translate_json_file(lang_file)
+        # Каждый полученный перевод сразу пишется в журнал, чтобы после сбоя
+        # можно было продолжить с --resume
+        self.set_journal(open_journal(Path(output_path) if output_path else mod_path,
+                                      self.source_lang, self.target_label, self.resume))
+        files_ok = True
+        finished = False
+        try:
+            # Переводим каждый файл
+            for lang_file in tqdm(lang_files, desc="Обработка файлов"):
+                self.check_cancelled()
+                relative_path = lang_file.path.relative_to(mod_path)
+                output_file = None
+                if output_path:
+                    # Если указан выходной путь, сохраняем туда с сохранением структуры
+                    output_file = Path(output_path) / relative_path
+                ok = self.translate_json_file(lang_file.path, output_file, relative_path.as_posix(),
+                                              file_format=lang_file.format)
+                files_ok = files_ok and ok
+                self.files_processed += 1
+                self.emit(FILE_DONE)
+            finished = True
+        finally:
+            # Журнал нужен, пока остались ошибки: по нему их можно доперевести
+            self.journal.close(remove=finished and files_ok and self.failed_count == 0)
+            self.set_journal(None)
         
+        return self.stats()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Собирает статистику текущего запуска
+        
+        Returns:
+            Словарь со статистикой перевода; в 'metrics' - время фаз,
+            счетчики запросов и гистограмма задержек сервиса; в 'by_language' -
+            счетчики строк по каждому целевому языку
+        """
+        by_language = {
+            target.target_lang: {
+                'translated': target.translated_count,
+                'skipped': target.skipped_count,
+                'carried': target.carried_count,
+                'resumed': target.resumed_count,
+                'kept': target.kept_count,
+            }
+            for target in self.targets
+        }
         return {
-            'translated': self.translated_count,
-            'skipped': self.skipped_count,
-            'files_processed': len(lang_files)
+            'translated': sum(counts['translated'] for counts in by_language.values()),
+            'skipped': sum(counts['skipped'] for counts in by_language.values()),
+            'carried': sum(counts['carried'] for counts in by_language.values()),
+            'resumed': sum(counts['resumed'] for counts in by_language.values()),
+            'kept': sum(counts['kept'] for counts in by_language.values()),
+            'by_language': by_language,
+            'files_processed': self.files_processed,
+            'retries': self.retry_count,
+            'throttles': self.throttle_count,
+            'failed': self.failed_count,
+            'concurrency': int(self.concurrency.limit),
+            'metrics': self.metrics.to_dict(),
         }
 
 
@@ -235,7 +1270,7 @@ def main():
     parser.add_argument(
         'mod_path',
         type=str,
-        help='Путь к папке мода или .jar файлу мода'
+        help='Путь к папке мода, .jar файлу мода или папке mods (с --modpack)'
     )
     parser.add_argument(
         '-o', '--output',
@@ -252,13 +1287,380 @@ def main():
     parser.add_argument(
         '--target-lang',
         type=str,
-        default='ru',
-        help='Целевой язык (по умолчанию: ru)'
+        nargs='+',
+        default=['ru'],
+        help='Целевой язык или несколько языков (через пробел или запятую: ru uk be); '
+             'файлы разбираются один раз, .jar записывается один раз со всеми переводами '
+             '(по умолчанию: ru)'
+    )
+    parser.add_argument(
+        '--cache',
+        type=str,
+        default=str(DEFAULT_MEMORY_PATH),
+        help=f'Путь к памяти переводов (по умолчанию: {DEFAULT_MEMORY_PATH})'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Не использовать память переводов (все строки отправляются в сеть)'
+    )
+    parser.add_argument(
+        '--clear-cache',
+        action='store_true',
+        help='Очистить память переводов и хранилище результатов перед запуском'
+    )
+    parser.add_argument(
+        '--output-store',
+        type=str,
+        default=str(DEFAULT_STORE_PATH),
+        help='Хранилище результатов: .jar, уже переведенный с теми же параметрами, '
+             f'не переводится повторно (по умолчанию: {DEFAULT_STORE_PATH})'
+    )
+    parser.add_argument(
+        '--no-output-store',
+        action='store_true',
+        help='Не использовать хранилище результатов (каждый .jar переводится заново)'
+    )
+    parser.add_argument(
+        '--no-fuzzy',
+        action='store_true',
+        help='Не собирать переводы похожих строк ("Tier 1 Upgrade" -> "Tier 2 Upgrade") '
+             'по шаблону, переводить каждую строку отдельно'
+    )
+    parser.add_argument(
+        '--overwrite-existing',
+        action='store_true',
+        help='Переводить заново все строки, даже если в моде уже есть перевод '
+             '(по умолчанию имеющийся ru_ru.json сохраняется и дополняется недостающими ключами)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=8,
+        help='Максимум одновременных запросов, фактическое число подбирается '
+             'автоматически по ответам сервиса (по умолчанию: 8)'
+    )
+    parser.add_argument(
+        '--max-rps',
+        type=float,
+        default=0,
+        help='Максимум запросов в секунду, 0 - без ограничения (по умолчанию: 0)'
+    )
+    parser.add_argument(
+        '--max-retries',
+        type=int,
+        default=5,
+        help='Повторов запроса при перегрузке сервиса (по умолчанию: 5)'
+    )
+    parser.add_argument(
+        '--backend',
+        type=str,
+        choices=sorted(BACKENDS),
+        default='google',
+        help='Сервис перевода: google - Google Translate, pseudo - офлайн псевдоперевод '
+             'для проверки, http - свой сервер с JSON API (по умолчанию: google)'
+    )
+    parser.add_argument(
+        '--backend-url',
+        type=str,
+        default=None,
+        help='Адрес сервера для --backend http (по умолчанию: http://127.0.0.1:8765)'
+    )
+    parser.add_argument(
+        '--metrics-json',
+        type=str,
+        default=None,
+        help='Сохранить метрики запуска (время фаз, запросы, задержки) в JSON файл'
+    )
+    parser.add_argument(
+        '--metrics-prom',
+        type=str,
+        default=None,
+        help='Сохранить метрики запуска в textfile для Prometheus (node_exporter)'
+    )
+    parser.add_argument(
+        '--modpack',
+        action='store_true',
+        help='Перевести все .jar моды из папки mods (переведенные моды сохраняются в -o, '
+             'по умолчанию в папку mods_ru рядом с mods)'
+    )
+    parser.add_argument(
+        '--processes',
+        type=int,
+        default=None,
+        help='Количество процессов для режима --modpack (по умолчанию: число ядер)'
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Переводить только новые и измененные строки, сохраняя предыдущий перевод '
+             '(манифест исходных строк сохраняется рядом с переводом)'
+    )
+    parser.add_argument(
+        '--previous',
+        type=str,
+        default=None,
+        help='Ранее переведенный .jar для режима --incremental '
+             '(по умолчанию используется выходной .jar, если он существует)'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Продолжить прерванный перевод: переводы из журнала (*.journal рядом '
+             'с результатом) повторно не запрашиваются'
+    )
+    parser.add_argument(
+        '--resource-pack',
+        type=str,
+        default=None,
+        help='Собирать переводы в этот ресурспак (.zip) вместо переписывания .jar модов '
+             '(для .jar и --modpack)'
+    )
+    parser.add_argument(
+        '--pack-format',
+        type=int,
+        default=DEFAULT_PACK_FORMAT,
+        help=f'pack_format ресурспака (по умолчанию: {DEFAULT_PACK_FORMAT}, Minecraft 1.20.1)'
+    )
+    parser.add_argument(
+        '--daemon',
+        type=str,
+        nargs='?',
+        const=DEFAULT_DAEMON_URL,
+        default=None,
+        help='Отправить задание запущенному фоновому сервису (py daemon.py) вместо перевода '
+             f'в этом процессе (по умолчанию адрес {DEFAULT_DAEMON_URL}); --cache, --no-cache '
+             'и --processes задаются при запуске сервиса'
+    )
+    parser.add_argument(
+        '--plan',
+        action='store_true',
+        help='Только оценить объем перевода (строки и символы к отправке, число запросов, '
+             'время) без запросов к сервису перевода; с --modpack - для всей папки mods'
+    )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Следить за папкой mods и переводить новые и обновленные моды по мере появления '
+             '(результат в --output или mods_ru; с --resource-pack - в ресурспак)'
+    )
+    parser.add_argument(
+        '--watch-interval',
+        type=float,
+        default=DEFAULT_WATCH_INTERVAL,
+        help=f'Интервал опроса папки в режиме --watch, секунд (по умолчанию: {DEFAULT_WATCH_INTERVAL})'
     )
     
     args = parser.parse_args()
     
+    if args.daemon and not args.plan:
+        _run_daemon(args)
+        return
+    
+    memory = None
+    if not args.no_cache:
+        memory = TranslationMemory(Path(args.cache))
+        if args.clear_cache:
+            memory.clear()
+            print(f"Память переводов очищена: {args.cache}")
+    store = None
+    if not args.no_output_store:
+        store = OutputStore(Path(args.output_store))
+        if args.clear_cache:
+            store.clear()
+            print(f"Хранилище результатов очищено: {args.output_store}")
+    
+    if args.modpack and not args.plan:
+        # Каждый процесс модпака открывает память переводов и хранилище сам
+        if memory is not None:
+            memory.close()
+        if store is not None:
+            store.close()
+        _run_modpack(args)
+        return
+    
+    try:
+        if args.plan:
+            _run_plan(args, memory, store)
+        elif args.watch:
+            _run_watch(args, memory, store)
+        else:
+            _run(args, memory, store)
+    finally:
+        if memory is not None:
+            stats = memory.stats()
+            print(f"Память переводов: попаданий {stats['hits']}, промахов {stats['misses']}, записей {stats['entries']}")
+            memory.close()
+        if store is not None:
+            store.close()
+
+
+def _translator_options(args) -> Dict[str, Any]:
+    """Параметры MinecraftModTranslator из аргументов командной строки (для модпака и сервиса)"""
+    return {
+        'source_lang': args.source_lang,
+        'target_lang': args.target_lang,
+        'workers': args.workers,
+        'max_retries': args.max_retries,
+        'incremental': args.incremental,
+        'resume': args.resume,
+        'fuzzy': not args.no_fuzzy,
+        'keep_existing': not args.overwrite_existing,
+        'backend': args.backend,
+        'backend_options': _backend_options(args),
+    }
+
+
+def _run_daemon(args) -> None:
+    """Отправляет задание фоновому сервису и выводит его журнал"""
+    from daemon import DaemonError, follow_job, submit_job
+    
     mod_path = Path(args.mod_path)
+    if args.modpack:
+        kind = 'modpack'
+    elif mod_path.is_file() and mod_path.suffix.lower() == '.jar':
+        kind = 'jar'
+    else:
+        kind = 'folder'
+    
+    try:
+        job_id = submit_job(
+            args.daemon, kind, args.mod_path, args.output,
+            translator_options={**_translator_options(args), 'max_rps': args.max_rps},
+            previous=args.previous, resource_pack=args.resource_pack, pack_format=args.pack_format
+        )
+        print(f"Задание {job_id} отправлено фоновому сервису {args.daemon}")
+        state = follow_job(args.daemon, job_id)
+    except DaemonError as e:
+        print(f"Ошибка: {e}")
+        return
+    
+    if state['status'] == 'error':
+        print(f"Ошибка задания: {state['error']}")
+        return
+    result = state['result']
+    if 'report' in result:
+        _print_modpack_report(result['report'])
+        _write_metrics(args, result['report']['summary'])
+        return
+    print("\n" + "="*50)
+    _print_stats(result['stats'])
+    _write_metrics(args, result['stats'])
+
+
+def _run_modpack(args) -> None:
+    """Переводит модпак по аргументам командной строки"""
+    from modpack import translate_modpack
+    
+    try:
+        report = translate_modpack(
+            Path(args.mod_path),
+            Path(args.output) if args.output else None,
+            translator_options=_translator_options(args),
+            cache_path=None if args.no_cache else args.cache,
+            store_path=None if args.no_output_store else args.output_store,
+            max_rps=args.max_rps,
+            processes=args.processes,
+            resource_pack_path=Path(args.resource_pack) if args.resource_pack else None,
+            pack_format=args.pack_format
+        )
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+        return
+    
+    _print_modpack_report(report)
+    _write_metrics(args, report['summary'])
+
+
+def _print_modpack_report(report: Dict[str, Any]) -> None:
+    """Выводит итоги перевода модпака"""
+    from modpack import REPORT_NAME
+    
+    summary = report['summary']
+    print("\n" + "="*50)
+    print("Перевод модпака завершен!")
+    print(f"  Модов: {summary['mods']} (успешно: {summary['ok']}, без переводов: {summary['no_lang']}, "
+          f"с ошибками: {summary['errors']})")
+    print(f"  Переведено строк: {summary['translated']}")
+    print(f"  Пропущено строк: {summary['skipped']}")
+    store_hits = summary['metrics']['counters'].get('store_hits', 0)
+    if store_hits:
+        print(f"  Модов без изменений (перевод из хранилища результатов): {store_hits}")
+    print(f"  Время: {summary['seconds']} с")
+    print(f"  Время по фазам (сумма по модам): {format_phases(summary['metrics'])}")
+    print(f"  Отчет: {Path(report['output_dir']) / REPORT_NAME}")
+    print("="*50)
+
+
+def _backend_options(args) -> Dict[str, Any]:
+    """Собирает параметры сервиса перевода из аргументов командной строки"""
+    options = {}
+    if args.backend == 'http' and args.backend_url:
+        options['url'] = args.backend_url
+    return options
+
+
+def _create_translator(args, memory: Optional[TranslationMemory],
+                       store: Optional[OutputStore] = None) -> MinecraftModTranslator:
+    """Создает переводчик по аргументам командной строки"""
+    return MinecraftModTranslator(
+        source_lang=args.source_lang,
+        target_lang=args.target_lang,
+        memory=memory,
+        workers=args.workers,
+        max_rps=args.max_rps,
+        max_retries=args.max_retries,
+        incremental=args.incremental,
+        resume=args.resume,
+        fuzzy=not args.no_fuzzy,
+        keep_existing=not args.overwrite_existing,
+        backend=args.backend,
+        backend_options=_backend_options(args),
+        output_store=store
+    )
+
+
+def _run_plan(args, memory: Optional[TranslationMemory], store: Optional[OutputStore] = None) -> None:
+    """Оценивает объем перевода мода или модпака без запросов к сервису перевода"""
+    from modpack import find_mod_jars
+    from plan import make_plan, print_plan
+    
+    mod_path = Path(args.mod_path)
+    if args.modpack:
+        if not mod_path.is_dir():
+            print(f"Ошибка: папка модов не существует: {mod_path}")
+            return
+        mod_paths = find_mod_jars(mod_path)
+    else:
+        mod_paths = [mod_path]
+    print_plan(make_plan(mod_paths, _create_translator(args, memory, store)))
+
+
+def _run_watch(args, memory: Optional[TranslationMemory], store: Optional[OutputStore] = None) -> None:
+    """Следит за папкой mods и переводит новые и обновленные моды одним переводчиком"""
+    from watch import ModsWatcher
+    
+    try:
+        watcher = ModsWatcher(
+            Path(args.mod_path),
+            _create_translator(args, memory, store),
+            output_dir=Path(args.output) if args.output else None,
+            resource_pack_path=Path(args.resource_pack) if args.resource_pack else None,
+            pack_format=args.pack_format,
+            interval=args.watch_interval
+        )
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+        return
+    watcher.run()
+
+
+def _run(args, memory: Optional[TranslationMemory], store: Optional[OutputStore] = None) -> None:
+    """Выполняет перевод по аргументам командной строки"""
+    mod_path = Path(args.mod_path)
+    
+    # Создаем переводчик
+    translator = _create_translator(args, memory, store)
     
     # Проверяем, является ли входной файл .jar
     if mod_path.is_file() and mod_path.suffix.lower() == '.jar':
@@ -266,42 +1668,97 @@ def main():
         try:
             from jar_handler import translate_jar_mod
             
-            translator = MinecraftModTranslator(
-                source_lang=args.source_lang,
-                target_lang=args.target_lang
-            )
-            
             output_jar = Path(args.output) if args.output else None
-            result_jar = translate_jar_mod(mod_path, translator, output_jar)
+            previous_jar = Path(args.previous) if args.previous else None
+            resource_pack = None
+            if args.resource_pack:
+                resource_pack = ResourcePackBuilder(Path(args.resource_pack), args.pack_format)
+                resource_pack.load()
+            result_jar = translate_jar_mod(mod_path, translator, output_jar, previous_jar, resource_pack)
+            if resource_pack is not None:
+                resource_pack.write()
             
             print("\n" + "="*50)
             print("Перевод завершен!")
             print(f"Переведенный мод сохранен: {result_jar}")
-            print("="*50)
+            stats = translator.stats()
+            _print_stats(stats)
+            _write_metrics(args, stats)
             return
         except ImportError:
             print("Ошибка: не удалось импортировать jar_handler")
             print("Убедитесь, что файл jar_handler.py находится в той же папке")
             return
-    
-    # Создаем переводчик
-    translator = MinecraftModTranslator(
-        source_lang=args.source_lang,
-        target_lang=args.target_lang
-    )
+        except ValueError as e:
+            print(f"Ошибка: {e}")
+            return
     
     # Переводим мод
     print(f"Начинаем перевод мода: {args.mod_path}")
     stats = translator.translate_mod(args.mod_path, args.output)
     
-    # Выводим статистику
     print("\n" + "="*50)
+    _print_stats(stats)
+    _write_metrics(args, stats)
+
+
+def _print_stats(stats: Dict[str, Any]) -> None:
+    """Выводит статистику перевода"""
     print("Статистика перевода:")
     print(f"  Обработано файлов: {stats['files_processed']}")
     print(f"  Переведено строк: {stats['translated']}")
     print(f"  Пропущено строк: {stats['skipped']}")
+    print(f"  Взято из предыдущего перевода: {stats['carried']}")
+    if stats.get('kept'):
+        print(f"  Сохранено из перевода в моде: {stats['kept']}")
+    template_hits = stats['metrics']['counters'].get('template_hits', 0)
+    if template_hits:
+        print(f"  Собрано по шаблонам без запроса: {template_hits}")
+    if stats['resumed']:
+        print(f"  Взято из журнала прерванного перевода: {stats['resumed']}")
+    store_hits = stats['metrics']['counters'].get('store_hits', 0)
+    if store_hits:
+        print(f"  Модов без изменений (перевод из хранилища результатов): {store_hits}")
+    placeholder_retries = stats['metrics']['counters'].get('placeholder_retries', 0)
+    if placeholder_retries:
+        print(f"  Повторных запросов из-за испорченных подстановок: {placeholder_retries} "
+              f"(оставлено без перевода: {stats['metrics']['counters'].get('placeholder_failures', 0)})")
+    by_language = stats.get('by_language', {})
+    if len(by_language) > 1:
+        for language, counts in by_language.items():
+            print(f"    {language}: переведено {counts['translated']}, пропущено {counts['skipped']}, "
+                  f"из предыдущего перевода {counts['carried']}")
+    print(f"  Повторов запросов: {stats['retries']} (перегрузок сервиса: {stats['throttles']})")
+    print(f"  Итоговое число потоков: {stats['concurrency']}")
+    print(f"  Время по фазам: {format_phases(stats['metrics'])}")
     print("="*50)
 
 
+def _write_metrics(args, stats: Dict[str, Any]) -> None:
+    """
+    Сохраняет метрики запуска в файлы, указанные в аргументах командной строки,
+    и задержку запросов для оценки времени следующих запусков (--plan)
+    """
+    from plan import record_latency
+    
+    record_latency(args.backend, stats['metrics'])
+    if args.metrics_json:
+        write_json(stats, Path(args.metrics_json))
+        print(f"Метрики сохранены: {args.metrics_json}")
+    if args.metrics_prom:
+        metrics = dict(stats['metrics'])
+        # Итоги перевода тоже выгружаем как счетчики
+        metrics['counters'] = {
+            **metrics['counters'],
+            'strings_translated': stats['translated'],
+            'strings_skipped': stats['skipped'],
+            'strings_carried': stats.get('carried', 0),
+            'strings_kept': stats.get('kept', 0),
+            'files_processed': stats['files_processed'],
+        }
+        write_prometheus(metrics, Path(args.metrics_prom))
+        print(f"Метрики для Prometheus сохранены: {args.metrics_prom}")
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,356 @@
+"""
+Слежение за папкой mods: новые и обновленные моды переводятся сразу
+
+Папка опрашивается через os.scandir (без сторонних зависимостей, работает
+и в Windows). Мод берется в перевод, когда его размер и время изменения не
+меняются settle секунд и он читается как .jar, - так недокопированный файл не
+попадет в перевод. Переводчик создается один раз, поэтому память переводов,
+хранилище результатов и соединения с сервисом перевода остаются прогретыми.
+
+В режиме ресурспака состояние переведенных модов и файлы переводов каждого
+мода сохраняются рядом с ним (<ресурспак>.watch.zip), а сам ресурспак
+записывается один раз за проход. Мод, который не удалось перевести, переводится
+снова через растущую паузу.
+"""
+import json
+import os
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from journal import atomic_path
+from resource_pack import DEFAULT_PACK_FORMAT, ResourcePackBuilder
+
+
+# Интервал опроса папки по умолчанию (секунды)
+DEFAULT_INTERVAL = 2.0
+
+# Сколько секунд файл не должен меняться, чтобы считаться докопированным
+DEFAULT_SETTLE = 3.0
+
+# Состояние режима ресурспака: <ресурспак>.watch.zip - state.json с состоянием
+# модов и mods/<имя .jar>/<файл> - переводы каждого мода
+STATE_SUFFIX = '.watch.zip'
+STATE_NAME = 'state.json'
+STATE_MODS_DIR = 'mods/'
+
+# Пауза перед повторным переводом мода после ошибки (удваивается до RETRY_MAX_DELAY)
+RETRY_DELAY = 30.0
+RETRY_MAX_DELAY = 600.0
+
+
+def scan_mods(mods_dir: Path) -> Dict[Path, Tuple[int, int]]:
+    """
+    Читает список модов папки одним проходом
+
+    Args:
+        mods_dir: Папка mods
+
+    Returns:
+        Словарь {путь к .jar: (размер, время изменения в нс)}
+    """
+    jars = {}
+    with os.scandir(mods_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            if not name.lower().endswith('.jar') or Path(name).stem.endswith('_ru'):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except OSError:
+                # Файл удалили между чтением списка и stat
+                continue
+            jars[Path(entry.path)] = (stat.st_size, stat.st_mtime_ns)
+    return jars
+
+
+def _is_complete(jar_path: Path) -> bool:
+    """Проверяет, что .jar скопирован целиком (центральный каталог в конце файла на месте)"""
+    try:
+        return zipfile.is_zipfile(jar_path)
+    except OSError:
+        return False
+
+
+class ModsWatcher:
+    """
+    Следит за папкой mods и переводит новые и измененные моды одним переводчиком
+    """
+
+    def __init__(self, mods_dir: Path, translator, output_dir: Optional[Path] = None,
+                 resource_pack_path: Optional[Path] = None, pack_format: int = DEFAULT_PACK_FORMAT,
+                 interval: float = DEFAULT_INTERVAL, settle: float = DEFAULT_SETTLE):
+        """
+        Args:
+            mods_dir: Папка с .jar файлами модов
+            translator: MinecraftModTranslator, общий для всех модов
+            output_dir: Папка для переведенных модов (по умолчанию mods_ru рядом с mods)
+            resource_pack_path: Если указан, переводы добавляются в этот ресурспак,
+                а .jar модов не переписываются
+            pack_format: Версия формата ресурспака
+            interval: Интервал опроса папки в секундах
+            settle: Сколько секунд файл не должен меняться перед переводом
+        """
+        self.mods_dir = Path(mods_dir)
+        if not self.mods_dir.is_dir():
+            raise ValueError(f"Папка модов не существует: {self.mods_dir}")
+        self.translator = translator
+        self.output_dir = Path(output_dir) if output_dir else self.mods_dir.parent / f"{self.mods_dir.name}_ru"
+        self.resource_pack_path = Path(resource_pack_path) if resource_pack_path else None
+        if self.resource_pack_path is None and self.output_dir.resolve() == self.mods_dir.resolve():
+            # Переведенные .jar заменили бы исходные и снова попали бы в слежение
+            raise ValueError(f"Папка для переведенных модов совпадает с папкой модов: {self.output_dir}")
+        self.pack_format = pack_format
+        self.interval = interval
+        self.settle = settle
+        # Переведенные версии модов: {путь: (размер, время изменения)}
+        self._done: Dict[Path, Tuple[int, int]] = {}
+        # Измененные моды, ожидающие окончания копирования: {путь: (размер, время изменения, когда замечено)}
+        self._pending: Dict[Path, Tuple[int, int, float]] = {}
+        # Число ошибок подряд при переводе мода (для паузы перед повтором)
+        self._failures: Dict[Path, int] = {}
+        # Режим ресурспака: файлы переводов каждого мода
+        self._entries: Dict[Path, Dict[str, bytes]] = {}
+        # Режим ресурспака: состояние модов из прошлого запуска и нужна ли пересборка
+        self._pack_state: Dict[str, Tuple[int, int]] = {}
+        self._rebuild = False
+
+    def output_jar(self, jar_path: Path) -> Path:
+        """Путь переведенного .jar для мода"""
+        return self.output_dir / jar_path.name
+
+    @property
+    def state_path(self) -> Optional[Path]:
+        """Файл состояния модов ресурспака (None, если ресурспак не используется)"""
+        if self.resource_pack_path is None:
+            return None
+        return self.resource_pack_path.with_name(self.resource_pack_path.name + STATE_SUFFIX)
+
+    def _load_pack_state(self) -> Tuple[Dict[str, Tuple[int, int]], Dict[str, Dict[str, bytes]]]:
+        """
+        Читает состояние модов, переводы которых уже собраны в ресурспак
+
+        Returns:
+            Кортеж (состояние {имя .jar: (размер, время изменения)},
+            файлы переводов {имя .jar: {имя файла: содержимое}})
+        """
+        if not self.resource_pack_path.is_file() or not self.state_path.is_file():
+            return {}, {}
+        saved: Dict[str, Dict[str, bytes]] = {}
+        try:
+            with zipfile.ZipFile(self.state_path) as zip_ref:
+                data = json.loads(zip_ref.read(STATE_NAME).decode('utf-8'))
+                for name in zip_ref.namelist():
+                    jar_name, _, entry = name[len(STATE_MODS_DIR):].partition('/')
+                    if name.startswith(STATE_MODS_DIR) and entry:
+                        saved.setdefault(jar_name, {})[entry] = zip_ref.read(name)
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+            print(f"Не удалось прочитать {self.state_path}: {e}")
+            return {}, {}
+        if not isinstance(data, dict):
+            return {}, {}
+        state = {name: tuple(value) for name, value in data.items()
+                 if isinstance(value, list) and len(value) == 2}
+        return state, saved
+
+    def _write_pack_state(self, failed: List[Path]) -> None:
+        """
+        Сохраняет состояние и файлы переводов модов, собранных в ресурспак
+
+        Args:
+            failed: Моды, которые не удалось перевести (после перезапуска переводятся снова)
+        """
+        saved = [jar_path for jar_path in sorted(self._entries)
+                 if jar_path in self._done and jar_path not in failed]
+        state = {jar_path.name: list(self._done[jar_path]) for jar_path in saved}
+        with atomic_path(self.state_path) as temp_path, \
+                zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr(STATE_NAME, json.dumps(state, ensure_ascii=False, indent=2, sort_keys=True))
+            for jar_path in saved:
+                for name, payload in sorted(self._entries[jar_path].items()):
+                    zipf.writestr(f"{STATE_MODS_DIR}{jar_path.name}/{name}", payload)
+
+    def _up_to_date(self, jar_path: Path, state: Tuple[int, int]) -> bool:
+        """
+        Есть ли уже перевод этой версии мода: переведенный .jar новее исходного
+        или, в режиме ресурспака, мод в том же состоянии собран в ресурспак
+        """
+        if self.resource_pack_path is not None:
+            return self._pack_state.get(jar_path.name) == state
+        try:
+            return self.output_jar(jar_path).stat().st_mtime_ns >= state[1]
+        except OSError:
+            return False
+
+    def poll(self, now: Optional[float] = None) -> int:
+        """
+        Один проход: находит изменения и переводит докопированные моды
+
+        Args:
+            now: Текущее время (time.monotonic), для проверок
+
+        Returns:
+            Количество переведенных модов
+        """
+        now = time.monotonic() if now is None else now
+        jars = scan_mods(self.mods_dir)
+
+        for jar_path in [path for path in self._done if path not in jars]:
+            del self._done[jar_path]
+            if self.resource_pack_path is not None:
+                self._entries.pop(jar_path, None)
+                self._rebuild = True
+                print(f"Мод удален: {jar_path.name}, перевод будет удален из {self.resource_pack_path}")
+            elif self.output_jar(jar_path).exists():
+                self.output_jar(jar_path).unlink()
+                print(f"Мод удален: {jar_path.name}, перевод удален из {self.output_dir}")
+        for jar_path in [path for path in self._pending if path not in jars]:
+            del self._pending[jar_path]
+            self._failures.pop(jar_path, None)
+            if self._entries.pop(jar_path, None) is not None:
+                # Перевод прежней версии мода, который не удалось обновить
+                self._rebuild = True
+
+        ready = []
+        for jar_path, state in jars.items():
+            if self._done.get(jar_path) == state:
+                continue
+            pending = self._pending.get(jar_path)
+            if pending is None or pending[:2] != state:
+                # Новое или снова изменившееся состояние: ждем, пока файл перестанет меняться
+                self._pending[jar_path] = (*state, now)
+            elif now - pending[2] >= self.settle and _is_complete(jar_path):
+                ready.append(jar_path)
+
+        for jar_path in ready:
+            self._done[jar_path] = self._pending.pop(jar_path)[:2]
+        if self.resource_pack_path is not None:
+            failed = self._update_pack(ready) if ready or self._rebuild else []
+        else:
+            failed = [jar_path for jar_path in ready if not self._translate(jar_path)]
+
+        # Моды с ошибкой не считаются переведенными и переводятся снова после паузы
+        for jar_path in failed:
+            self._retry_later(jar_path, self._done.pop(jar_path), now)
+        for jar_path in ready:
+            if jar_path not in failed:
+                self._failures.pop(jar_path, None)
+        return len(ready) - len(failed)
+
+    def _retry_later(self, jar_path: Path, state: Tuple[int, int], now: float) -> None:
+        """Откладывает повторный перевод мода; пауза растет с числом ошибок подряд"""
+        failures = self._failures.get(jar_path, 0) + 1
+        self._failures[jar_path] = failures
+        delay = min(RETRY_MAX_DELAY, RETRY_DELAY * 2 ** (failures - 1))
+        # Мод готов к переводу через settle секунд после «когда замечено»
+        self._pending[jar_path] = (*state, now + delay - self.settle)
+        print(f"{jar_path.name}: повторная попытка через {delay:.0f} с")
+
+    def _update_pack(self, ready: List[Path]) -> List[Path]:
+        """
+        Собирает ресурспак заново и записывает его один раз за проход
+
+        Переводы модов с одним пространством имен объединяются в общих файлах,
+        поэтому перевод удаленного или прежней версии мода нельзя вычесть из
+        старого ресурспака. Ресурспак собирается из сохраненных переводов
+        каждого мода; заново переводятся только моды из ready.
+
+        Args:
+            ready: Моды, которые нужно перевести в этом проходе
+
+        Returns:
+            Моды, которые не удалось перевести
+        """
+        resource_pack = ResourcePackBuilder(self.resource_pack_path, self.pack_format)
+        failed = []
+        for jar_path in sorted(set(self._done) | set(self._entries)):
+            if jar_path in ready or (jar_path in self._done and jar_path not in self._entries):
+                mod_pack = ResourcePackBuilder(self.resource_pack_path, self.pack_format)
+                if self._translate(jar_path, mod_pack):
+                    self._entries[jar_path] = mod_pack.entries
+                    resource_pack.journals.extend(mod_pack.journals)
+                else:
+                    failed.append(jar_path)
+            # Для мода, который не удалось обновить, остается перевод прежней версии
+            resource_pack.merge(self._entries.get(jar_path, {}))
+        try:
+            resource_pack.write()
+            self._write_pack_state(failed)
+        except OSError as e:
+            print(f"Не удалось записать ресурспак {self.resource_pack_path}: {e}")
+            self._rebuild = True
+            return failed
+        self._rebuild = False
+        print(f"Ресурспак обновлен: {self.resource_pack_path} (модов {len(self._entries)})")
+        return failed
+
+    def _translate(self, jar_path: Path, resource_pack: Optional[ResourcePackBuilder] = None) -> bool:
+        """
+        Переводит один мод; ошибка не останавливает слежение
+
+        Args:
+            jar_path: Путь к .jar мода
+            resource_pack: Если указан, переводы добавляются в него (без записи на диск)
+
+        Returns:
+            True если мод переведен полностью (без строк с ошибками перевода)
+        """
+        from jar_handler import translate_jar_mod
+
+        started = time.monotonic()
+        try:
+            if resource_pack is not None:
+                result = translate_jar_mod(jar_path, self.translator, resource_pack=resource_pack)
+            else:
+                result = translate_jar_mod(jar_path, self.translator, self.output_jar(jar_path))
+        except Exception as e:
+            print(f"Ошибка перевода {jar_path.name}: {type(e).__name__}: {e}")
+            return False
+        finally:
+            if self.translator.memory is not None:
+                self.translator.memory.flush()
+        stats = self.translator.stats()
+        print(f"{jar_path.name}: переведено строк {stats['translated']}, файлов {stats['files_processed']}, "
+              f"{time.monotonic() - started:.1f} с -> {result}")
+        if stats['failed']:
+            print(f"{jar_path.name}: не переведено строк из-за ошибок: {stats['failed']}")
+            return False
+        return True
+
+    def start(self) -> None:
+        """
+        Запоминает моды, перевод которых уже есть, чтобы не переводить их повторно;
+        остальные переводятся при первом проходе без ожидания settle
+        """
+        # Ожидание уже прошло: моды лежали в папке до запуска
+        settled = time.monotonic() - self.settle
+        jars = scan_mods(self.mods_dir)
+        saved: Dict[str, Dict[str, bytes]] = {}
+        if self.resource_pack_path is not None:
+            self._pack_state, saved = self._load_pack_state()
+            # Моды, удаленные, пока слежение не работало, убираются из ресурспака
+            names = {jar_path.name for jar_path in jars}
+            self._rebuild = any(name not in names for name in self._pack_state)
+        for jar_path, state in jars.items():
+            if self._up_to_date(jar_path, state):
+                self._done[jar_path] = state
+                if self.resource_pack_path is not None:
+                    self._entries[jar_path] = saved.get(jar_path.name, {})
+            else:
+                self._pending[jar_path] = (*state, settled)
+        print(f"Слежение за {self.mods_dir}: модов уже переведено {len(self._done)}, "
+              f"к переводу {len(self._pending)}")
+
+    def run(self) -> None:
+        """Следит за папкой до прерывания (Ctrl+C)"""
+        self.start()
+        try:
+            self.poll()
+            while True:
+                time.sleep(self.interval)
+                self.poll()
+        except KeyboardInterrupt:
+            print("\nСлежение остановлено")